@@ -128,7 +128,11 @@ setup(
     provides=['yubico_client'],
     install_requires=[
         'requests>=2.7,<3.0',
+        'futures>=3.0.0; python_version < "3.2"',
     ],
+    extras_require={
+        'local': ['cryptography>=2.0'],
+    },
     cmdclass={
         'test': TestCommand,
     },
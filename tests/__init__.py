@@ -0,0 +1,22 @@
+import requests
+
+# Address of the mock validation servers which are started for the tests
+MOCK_SERVER_URL = 'http://127.0.0.1:%s'
+
+
+class MockServerTestMixin(object):
+    """
+    Helpers for controlling the mock validation servers.
+    """
+
+    def _set_mock_action(self, action, port=8881, signature=None):
+        path = '/set_mock_action?action=%s' % (action)
+
+        if signature:
+            path += '&signature=%s' % (signature)
+
+        requests.get(url=(MOCK_SERVER_URL % (port)) + path)
+
+    def _get_request_count(self, port=8881):
+        url = (MOCK_SERVER_URL % (port)) + '/get_request_count'
+        return int(requests.get(url=url).text)
@@ -6,12 +6,13 @@ import sys
 
 try:
     import BaseHTTPServer
+    from SocketServer import ThreadingMixIn
     BaseHTTPRequestHandler = BaseHTTPServer.BaseHTTPRequestHandler
-    server_class = BaseHTTPServer.HTTPServer
+    HTTPServer = BaseHTTPServer.HTTPServer
 except ImportError:
-    from http.server import HTTPServer as BaseHTTPServer
+    from http.server import HTTPServer
     from http.server import BaseHTTPRequestHandler
-    server_class = BaseHTTPServer
+    from socketserver import ThreadingMixIn
 
 from optparse import OptionParser
 from os.path import join as pjoin
@@ -23,11 +24,20 @@ from yubico_client.py3 import b
 mock_action = None
 signature = None
 
+# Number of verification requests received since the last mock action change
+request_count = 0
+
+
+class ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
 
 class Handler(BaseHTTPRequestHandler):
+    # Keep connections alive so the client connection pooling can be tested
+    protocol_version = 'HTTP/1.1'
 
     def do_GET(self):
-        global mock_action, signature
+        global mock_action, signature, request_count
 
         if self.path.find('?') != -1:
             self.path, self.query_string = self.path.split('?', 1)
@@ -47,9 +57,16 @@ class Handler(BaseHTTPRequestHandler):
 
             print('Setting mock_action to %s' % (action))
             mock_action = action
+            request_count = 0
             self._end(status_code=200)
             return
 
+        if self.path == '/get_request_count':
+            self._end(status_code=200, body=str(request_count))
+            return
+
+        request_count += 1
+
         if mock_action in BAD_STATUS_CODES:
             return self._send_status(status=mock_action)
         elif mock_action == 'no_such_client':
@@ -71,15 +88,20 @@ class Handler(BaseHTTPRequestHandler):
         elif mock_action == 'one_gateway_error':
             mock_action = 'no_signature_ok'
             return self._end(status_code=502)
+        elif mock_action == 'one_service_unavailable_retry_after':
+            mock_action = 'no_signature_ok'
+            return self._end(status_code=503, headers={'Retry-After': '1'})
         else:
             self._end(status_code=500)
             return
 
-    def _end(self, status_code=200, body=''):
+    def _end(self, status_code=200, body='', headers=None):
         print('Sending response: status_code=%s, body=%s' %
               (status_code, body))
         self.send_response(status_code)
         self.send_header('Content-Type', 'text/plain')
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
         self.send_header('Content-Length', str(len(body)))
         self.end_headers()
         self.wfile.write(b(body))
@@ -107,7 +129,7 @@ def main():
 
     (options, args) = parser.parse_args()
 
-    httpd = server_class(('127.0.0.1', int(options.port)), Handler)
+    httpd = ThreadingHTTPServer(('127.0.0.1', int(options.port)), Handler)
     print('Mock API server listening on 127.0.0.1:%s' % (options.port))
 
     try:
@@ -0,0 +1,233 @@
+import sys
+import time
+
+from yubico_client.py3 import unittest2_required
+from yubico_client.yubico_exceptions import StatusCodeError
+
+from tests import MockServerTestMixin
+
+if unittest2_required:
+    import unittest2 as unittest  # NOQA
+else:
+    import unittest
+
+if sys.version_info >= (3, 5):
+    import asyncio
+    from yubico_client.async_yubico import AsyncYubico
+else:
+    AsyncYubico = None
+
+LOCAL_SERVER = ('http://127.0.0.1:8881/wsapi/2.0/verify',)
+LOCAL_SERVERS = ('http://127.0.0.1:8881/wsapi/2.0/verify',
+                 'http://127.0.0.1:8883/wsapi/2.0/verify')
+
+
+@unittest.skipIf(AsyncYubico is None, 'asyncio client requires Python 3.5+')
+class TestAsyncYubico(MockServerTestMixin, unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.client = AsyncYubico('1234', None, api_urls=LOCAL_SERVER)
+
+    def tearDown(self):
+        self.loop.run_until_complete(self.client.close())
+        self.loop.close()
+
+    def test_verify_ok(self):
+        self._set_mock_action('no_signature_ok')
+
+        for _ in range(3):
+            status = self.loop.run_until_complete(self.client.verify('test'))
+            self.assertTrue(status)
+
+        # All the requests should have been sent over a single connection
+        self.assertEqual(len(self.client._transport._idle), 1)
+        idle = list(self.client._transport._idle.values())[0]
+        self.assertEqual(len(idle), 1)
+
+    def test_verify_return_response(self):
+        self._set_mock_action('no_signature_ok')
+
+        response = self.loop.run_until_complete(
+            self.client.verify('test', return_response=True))
+        self.assertEqual(response, {'status': 'OK'})
+
+    def test_verify_replayed_otp(self):
+        self._set_mock_action('REPLAYED_OTP')
+
+        try:
+            self.loop.run_until_complete(self.client.verify('test'))
+        except StatusCodeError:
+            e = sys.exc_info()[1]
+            self.assertEqual(e.status_code, 'REPLAYED_OTP')
+        else:
+            self.fail('Exception was not thrown')
+
+    def test_verify_retries_500_responses(self):
+        self._set_mock_action('one_gateway_error')
+
+        status = self.loop.run_until_complete(self.client.verify('test'))
+        self.assertTrue(status)
+
+    def test_verify_local_timeout(self):
+        self._set_mock_action('timeout')
+
+        expected_msg = 'NO_VALID_ANSWERS'
+        self.assertRaisesRegexp(Exception, expected_msg,
+                                self.loop.run_until_complete,
+                                self.client.verify('test', timeout=0.5))
+
+    def test_verify_multiple_servers_losing_requests_are_cancelled(self):
+        self._set_mock_action('no_signature_ok')
+        self._set_mock_action('timeout', port=8883)
+
+        client = AsyncYubico('1234', None, api_urls=LOCAL_SERVERS)
+        status = self.loop.run_until_complete(client.verify('test'))
+        self.assertTrue(status)
+
+        pending = [task for task in asyncio.all_tasks(self.loop)
+                   if not task.done()]
+        self.assertEqual(pending, [])
+        self.loop.run_until_complete(client.close())
+
+    def test_hedged_requests_first_server_answers(self):
+        self._set_mock_action('no_signature_ok')
+        self._set_mock_action('no_signature_ok', port=8883)
+
+        client = AsyncYubico('1234', None, api_urls=LOCAL_SERVERS,
+                             hedge_delay=1)
+        self.assertTrue(self.loop.run_until_complete(client.verify('test')))
+        self.loop.run_until_complete(client.close())
+
+        # Request should only be sent to the first server
+        self.assertEqual(self._get_request_count(), 1)
+        self.assertEqual(self._get_request_count(port=8883), 0)
+
+    def test_hedged_requests_first_server_is_slow(self):
+        # First server takes 1 second to respond
+        self._set_mock_action('timeout')
+        self._set_mock_action('no_signature_ok', port=8883)
+
+        client = AsyncYubico('1234', None, api_urls=LOCAL_SERVERS,
+                             hedge_delay=0.2)
+
+        start_time = time.time()
+        self.assertTrue(self.loop.run_until_complete(client.verify('test')))
+        self.assertTrue((time.time() - start_time) < 0.8)
+        self.loop.run_until_complete(client.close())
+
+        self.assertEqual(self._get_request_count(port=8883), 1)
+
+    def test_server_stats_are_recorded(self):
+        self._set_mock_action('server_error')
+        self._set_mock_action('no_signature_ok', port=8883)
+
+        client = AsyncYubico('1234', None, api_urls=LOCAL_SERVERS,
+                             hedge_delay=5, max_retries=1,
+                             rank_api_urls=True)
+
+        for _ in range(2):
+            self.assertTrue(self.loop.run_until_complete(
+                client.verify('test')))
+
+        self.loop.run_until_complete(client.close())
+
+        # Failing server is ranked last after the first verification
+        stats = client.get_server_stats()
+        self.assertEqual(stats[0]['request_count'], 1)
+        self.assertEqual(stats[0]['error_count'], 1)
+        self.assertEqual(stats[1]['request_count'], 2)
+        self.assertEqual(stats[1]['error_count'], 0)
+        self.assertEqual(client._ranking.get_ranked_urls(),
+                         [LOCAL_SERVERS[1], LOCAL_SERVERS[0]])
+
+    def test_circuit_breaker_skips_failing_server(self):
+        self._set_mock_action('server_error')
+        self._set_mock_action('no_signature_ok', port=8883)
+
+        client = AsyncYubico('1234', None, api_urls=LOCAL_SERVERS,
+                             hedge_delay=5, max_retries=1,
+                             circuit_breaker_threshold=2)
+
+        for _ in range(2):
+            self.assertTrue(self.loop.run_until_complete(
+                client.verify('test')))
+
+        circuit_breakers = client.get_circuit_breakers()
+        self.assertEqual(circuit_breakers[LOCAL_SERVERS[0]].state, 'open')
+        self.assertEqual(circuit_breakers[LOCAL_SERVERS[1]].state, 'closed')
+
+        # Failing server should be skipped now
+        self._set_mock_action('server_error')
+        self.assertTrue(self.loop.run_until_complete(client.verify('test')))
+        self.assertEqual(self._get_request_count(), 0)
+        self.loop.run_until_complete(client.close())
+
+    def test_context_manager(self):
+        self._set_mock_action('no_signature_ok')
+
+        async def verify():
+            async with AsyncYubico('1234', None,
+                                   api_urls=LOCAL_SERVER) as client:
+                return await client.verify('test')
+
+        self.assertTrue(self.loop.run_until_complete(verify()))
+
+    def test_sync_context_manager_is_not_supported(self):
+        def use_client():
+            with self.client:
+                pass
+
+        self.assertRaisesRegexp(TypeError, 'async with', use_client)
+
+    def test_no_worker_threads_are_created(self):
+        self.assertEqual(self.client._executor, None)
+        self.assertEqual(self.client._verify_executor, None)
+
+    def test_verify_many(self):
+        self._set_mock_action('REPLAYED_OTP')
+
+        results = self.loop.run_until_complete(
+            self.client.verify_many(['a', 'b', 'c'], concurrency=2))
+        self.assertEqual(len(results), 3)
+
+        for result in results:
+            self.assertTrue(isinstance(result, StatusCodeError))
+
+    def test_verify_multi_different_device_ids(self):
+        otp_list = [
+            'tlerefhcvijlngibueiiuhkeibbcbecehvjiklltnbbl',
+            'blerefhcvijlngibueiiuhkeibbcbecehvjiklltnbbl',
+        ]
+
+        expected_msg = 'OTPs contain different device ids'
+        self.assertRaisesRegexp(Exception, expected_msg,
+                                self.loop.run_until_complete,
+                                self.client.verify_multi(otp_list))
+
+    def test_verify_multi_success(self):
+        otp_list = [
+            'tlerefhcvijlngibueiiuhkeibbcbecehvjiklltnbbl',
+            'tlerefhcvijlngibueiiuhkeibbcbecehvjiklltnbbc',
+        ]
+
+        def mock_verify(*args, **kwargs):
+            otp = args[0]
+
+            if otp == 'tlerefhcvijlngibueiiuhkeibbcbecehvjiklltnbbl':
+                timestamp = 1383997754 * 8
+            else:
+                timestamp = (1383997754 + 2) * 8
+
+            future = self.loop.create_future()
+            future.set_result({'timestamp': timestamp})
+            return future
+
+        self.client.verify = mock_verify
+
+        status = self.loop.run_until_complete(
+            self.client.verify_multi(otp_list))
+        self.assertTrue(status)
+
+
+if __name__ == '__main__':
+    sys.exit(unittest.main())
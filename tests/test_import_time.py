@@ -0,0 +1,72 @@
+import sys
+import subprocess
+
+from yubico_client.py3 import unittest2_required
+
+if unittest2_required:
+    import unittest2 as unittest  # NOQA
+else:
+    import unittest
+
+# Prints the state of the lazily initialized module level structures after
+# importing the package and instantiating the client
+IMPORT_SCRIPT = """
+import sys
+
+import yubico_client
+from yubico_client import modhex
+from yubico_client.otp import OTP
+
+client = yubico_client.Yubico('1234', 'secret123456')
+OTP('cccccccbbbbbcbdefghijklnrtuv')
+
+print('requests' in sys.modules)
+print(modhex._index is None)
+print(len(modhex._tables))
+"""
+
+
+class TestImportTime(unittest.TestCase):
+    def _run(self, script):
+        output = subprocess.check_output([sys.executable, '-c', script])
+        return output.decode('utf-8').split()
+
+    def test_import_defers_expensive_initialization(self):
+        requests_imported, index_missing, tables_count = self._run(
+            IMPORT_SCRIPT)
+
+        self.assertEqual(requests_imported, 'False')
+        self.assertEqual(index_missing, 'True')
+        self.assertEqual(tables_count, '0')
+
+    def test_expensive_initialization_happens_on_first_use(self):
+        script = IMPORT_SCRIPT.replace(
+            "OTP('cccccccbbbbbcbdefghijklnrtuv')",
+            "OTP('jjjjjjjjnhe.ngcgjeiuujjjdtgihjuecyixinxunkhj')\n"
+            "client._get_transport()")
+        requests_imported, index_missing, tables_count = self._run(script)
+
+        self.assertEqual(requests_imported, 'True')
+        self.assertEqual(index_missing, 'False')
+        self.assertEqual(tables_count, '1')
+
+    def test_import_does_not_import_email_utils(self):
+        script = IMPORT_SCRIPT + "print('email.utils' in sys.modules)\n"
+        email_utils_imported = self._run(script)[-1]
+
+        self.assertEqual(email_utils_imported, 'False')
+
+    def test_http_client_transport_does_not_import_requests(self):
+        script = IMPORT_SCRIPT.replace(
+            "client = yubico_client.Yubico('1234', 'secret123456')",
+            "from yubico_client.transports import HTTPClientTransport\n"
+            "client = yubico_client.Yubico('1234', 'secret123456', "
+            "transport=HTTPClientTransport)\n"
+            "client._get_transport()")
+        requests_imported, _, _ = self._run(script)
+
+        self.assertEqual(requests_imported, 'False')
+
+
+if __name__ == '__main__':
+    sys.exit(unittest.main())
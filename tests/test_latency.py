@@ -0,0 +1,41 @@
+import sys
+
+from yubico_client.latency import LatencyWindow
+from yubico_client.py3 import unittest2_required
+
+if unittest2_required:
+    import unittest2 as unittest  # NOQA
+else:
+    import unittest
+
+
+class TestLatencyWindow(unittest.TestCase):
+    def test_percentile_no_samples(self):
+        window = LatencyWindow()
+        self.assertEqual(len(window), 0)
+        self.assertEqual(window.percentile(95), None)
+
+    def test_percentile(self):
+        window = LatencyWindow()
+
+        for latency in [0.5, 0.1, 0.4, 0.2, 0.3]:
+            window.add(latency)
+
+        self.assertEqual(len(window), 5)
+        self.assertEqual(window.percentile(0), 0.1)
+        self.assertEqual(window.percentile(50), 0.3)
+        self.assertEqual(window.percentile(95), 0.5)
+        self.assertEqual(window.percentile(100), 0.5)
+
+    def test_only_most_recent_samples_are_kept(self):
+        window = LatencyWindow(size=2)
+
+        for latency in [10, 1, 2]:
+            window.add(latency)
+
+        self.assertEqual(len(window), 2)
+        self.assertEqual(window.percentile(100), 2)
+
+
+if __name__ == '__main__':
+    sys.exit(unittest.main())
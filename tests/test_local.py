@@ -0,0 +1,219 @@
+import sys
+import time
+import random
+import struct
+import threading
+
+from binascii import hexlify
+
+try:
+    from cryptography.hazmat.backends import default_backend
+    from cryptography.hazmat.primitives.ciphers import Cipher
+    from cryptography.hazmat.primitives.ciphers import algorithms
+    from cryptography.hazmat.primitives.ciphers import modes
+except ImportError:
+    Cipher = None
+
+from yubico_client import yubico
+from yubico_client import local
+from yubico_client.modhex import HEX
+from yubico_client.modhex import MODHEX
+from yubico_client.py3 import unittest2_required
+from yubico_client.yubico_exceptions import StatusCodeError
+
+if sys.version_info >= (3, 5):
+    import asyncio
+    from yubico_client.async_yubico import AsyncYubico
+else:
+    AsyncYubico = None
+
+if unittest2_required:
+    import unittest2 as unittest  # NOQA
+else:
+    import unittest
+
+PUBLIC_ID = 'vvccccfiluij'
+AES_KEY = '0123456789abcdef0123456789abcdef'
+PRIVATE_ID = '8792ebfe26cc'
+
+# Not reachable, verifications which go to the network fail
+INVALID_SERVER = ('http://127.0.0.1:1/wsapi/2.0/verify',)
+
+
+def generate_otp(usage_counter, session_counter, timestamp=0x123456,
+                 public_id=PUBLIC_ID, aes_key=AES_KEY, private_id=PRIVATE_ID):
+    """
+    Generate an OTP the same way a Yubikey does.
+    """
+    data = struct.pack('<6sHHBBH', bytes(bytearray.fromhex(private_id)),
+                       usage_counter, timestamp & 0xffff, timestamp >> 16,
+                       session_counter, 0x1234)
+    data += struct.pack('<H', ~local.crc16(data) & 0xffff)
+
+    cipher = Cipher(algorithms.AES(bytes(bytearray.fromhex(aes_key))),
+                    modes.ECB(), backend=default_backend())
+    encryptor = cipher.encryptor()
+    ciphertext = encryptor.update(data) + encryptor.finalize()
+
+    translation = dict(zip((ord(c) for c in HEX), MODHEX))
+    return public_id + hexlify(ciphertext).decode('ascii').translate(
+        translation)
+
+
+class TestCRC16(unittest.TestCase):
+    def test_crc16(self):
+        # CRC-16/X-25 check value (CRC16 with final XOR)
+        self.assertEqual(local.crc16(b'123456789') ^ 0xffff, 0x906e)
+
+
+@unittest.skipIf(Cipher is None, 'cryptography package is not installed')
+class TestLocalValidator(unittest.TestCase):
+    def setUp(self):
+        self.validator = local.LocalValidator(
+            keys={PUBLIC_ID: (AES_KEY, PRIVATE_ID)},
+            counter_store=local.MemoryCounterStore())
+
+    def test_counter_store_is_required(self):
+        self.assertRaises(TypeError, local.LocalValidator,
+                          keys={PUBLIC_ID: (AES_KEY, PRIVATE_ID)})
+        self.assertRaises(ValueError, local.LocalValidator,
+                          keys={PUBLIC_ID: (AES_KEY, PRIVATE_ID)},
+                          counter_store=None)
+
+    def test_decrypt(self):
+        token = self.validator.decrypt(generate_otp(5, 3,
+                                                    timestamp=0xabcdef))
+        self.assertEqual(token.usage_counter, 5)
+        self.assertEqual(token.session_counter, 3)
+        self.assertEqual(token.timestamp, 0xabcdef)
+        self.assertEqual(token.rnd, 0x1234)
+        self.assertEqual(token.counter, (5, 3))
+
+    def test_decrypt_raw_key(self):
+        validator = local.LocalValidator(
+            keys={PUBLIC_ID: (bytes(bytearray.fromhex(AES_KEY)),
+                              bytes(bytearray.fromhex(PRIVATE_ID)))},
+            counter_store=local.MemoryCounterStore())
+        self.assertEqual(validator.decrypt(generate_otp(1, 0)).counter,
+                         (1, 0))
+
+    def test_usage_counter_flag_is_ignored(self):
+        token = self.validator.decrypt(generate_otp(0x8000 | 7, 0))
+        self.assertEqual(token.usage_counter, 7)
+
+    def test_verify(self):
+        self.assertTrue(self.validator.verify(generate_otp(1, 0)))
+        self.assertTrue(self.validator.verify(generate_otp(1, 1)))
+        self.assertTrue(self.validator.verify(generate_otp(2, 0)))
+
+        response = self.validator.verify(generate_otp(2, 1, timestamp=16),
+                                         return_response=True)
+        self.assertEqual(response['status'], 'OK')
+        self.assertEqual(response['timestamp'], 16)
+        self.assertEqual(response['sessioncounter'], 2)
+        self.assertEqual(response['sessionuse'], 1)
+
+    def test_verify_replayed_otp(self):
+        otp = generate_otp(3, 5)
+        self.assertTrue(self.validator.verify(otp))
+
+        for replayed in (otp, generate_otp(3, 4), generate_otp(2, 10)):
+            try:
+                self.validator.verify(replayed)
+            except StatusCodeError as e:
+                self.assertEqual(e.status_code, 'REPLAYED_OTP')
+            else:
+                self.fail('Exception was not thrown')
+
+    def test_verify_bad_otp(self):
+        otps = [
+            # Wrong AES key
+            generate_otp(1, 0, aes_key='ff' * 16),
+            # Wrong private ID
+            generate_otp(1, 0, private_id='ff' * 6),
+            # Unknown device
+            generate_otp(1, 0, public_id='cccccccccccc'),
+            # Not a valid OTP
+            'test',
+        ]
+
+        for otp in otps:
+            try:
+                self.validator.verify(otp)
+            except StatusCodeError as e:
+                self.assertEqual(e.status_code, 'BAD_OTP')
+            else:
+                self.fail('Exception was not thrown')
+
+        self.assertEqual(self.validator.counter_store.get(PUBLIC_ID), None)
+
+    def test_counter_store_concurrent_updates(self):
+        store = local.MemoryCounterStore()
+        results = []
+
+        def check_and_set():
+            results.append(store.check_and_set(PUBLIC_ID, (1, 0)))
+
+        threads = [threading.Thread(target=check_and_set) for _ in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # Only one of the concurrent uses of the same OTP is accepted
+        self.assertEqual(results.count(True), 1)
+
+    def test_verify_multi_with_slow_counter_store(self):
+        class SlowCounterStore(local.MemoryCounterStore):
+            # Simulates a database backed store
+            def check_and_set(self, public_id, counter):
+                time.sleep(random.random() * 0.01)
+                return super(SlowCounterStore, self).check_and_set(
+                    public_id, counter)
+
+        validator = local.LocalValidator(
+            keys={PUBLIC_ID: (AES_KEY, PRIVATE_ID)},
+            counter_store=SlowCounterStore())
+        client = yubico.Yubico('1234', 'secret123456',
+                               api_urls=INVALID_SERVER,
+                               local_validator=validator)
+
+        for index in range(10):
+            otp_list = [generate_otp(index + 1, session_counter, 8 * index)
+                        for session_counter in range(3)]
+            self.assertTrue(client.verify_multi(otp_list))
+
+        client.close()
+
+        if AsyncYubico is None:
+            return
+
+        loop = asyncio.new_event_loop()
+        client = AsyncYubico('1234', 'secret123456', api_urls=INVALID_SERVER,
+                             local_validator=validator)
+
+        for index in range(10, 20):
+            otp_list = [generate_otp(index + 1, session_counter, 8 * index)
+                        for session_counter in range(3)]
+            self.assertTrue(loop.run_until_complete(
+                client.verify_multi(otp_list)))
+
+        loop.run_until_complete(client.close())
+        loop.close()
+
+    def test_yubico_client_local_verification(self):
+        client = yubico.Yubico('1234', 'secret123456',
+                               api_urls=INVALID_SERVER,
+                               local_validator=self.validator)
+
+        self.assertTrue(client.verify(generate_otp(1, 0)))
+        self.assertTrue(client.verify_multi([generate_otp(1, 1, 8),
+                                             generate_otp(1, 2, 16)]))
+
+        # Devices without a known key are verified using the API servers
+        self.assertRaises(Exception, client.verify,
+                          generate_otp(1, 0, public_id='cccccccccccc'))
+
+
+if __name__ == '__main__':
+    sys.exit(unittest.main())
@@ -0,0 +1,198 @@
+import sys
+
+from yubico_client import yubico
+from yubico_client.metrics import InMemoryMetrics
+from yubico_client.metrics import NULL_METRICS
+from yubico_client.metrics import get_outcome
+from yubico_client.replay import MemoryReplayCache
+from yubico_client.py3 import unittest2_required
+from yubico_client.yubico_exceptions import StatusCodeError
+from yubico_client.yubico_exceptions import InvalidClientIdError
+
+from tests import MockServerTestMixin
+
+if unittest2_required:
+    import unittest2 as unittest  # NOQA
+else:
+    import unittest
+
+if sys.version_info >= (3, 5):
+    import asyncio
+    from yubico_client.async_yubico import AsyncYubico
+else:
+    AsyncYubico = None
+
+LOCAL_SERVER = ('http://127.0.0.1:8881/wsapi/2.0/verify',)
+LOCAL_SERVER_2 = ('http://127.0.0.1:8883/wsapi/2.0/verify',)
+
+
+class TestInMemoryMetrics(unittest.TestCase):
+    def setUp(self):
+        self.metrics = InMemoryMetrics()
+
+    def test_counters(self):
+        self.metrics.increment('requests', tags={'url': 'a'})
+        self.metrics.increment('requests', tags={'url': 'a'})
+        self.metrics.increment('requests', 3, tags={'url': 'b'})
+        self.metrics.increment('retries')
+
+        self.assertEqual(self.metrics.get_counter('requests'), 5)
+        self.assertEqual(self.metrics.get_counter('requests', url='a'), 2)
+        self.assertEqual(self.metrics.get_counter('requests', url='c'), 0)
+        self.assertEqual(self.metrics.get_counter('retries'), 1)
+
+        self.assertEqual(self.metrics.get_counters(), [
+            {'name': 'requests', 'tags': {'url': 'a'}, 'value': 2},
+            {'name': 'requests', 'tags': {'url': 'b'}, 'value': 3},
+            {'name': 'retries', 'tags': {}, 'value': 1}
+        ])
+
+    def test_histograms(self):
+        for value in range(1, 101):
+            self.metrics.observe('latency', value / 100.0, tags={'url': 'a'})
+
+        histogram, = self.metrics.get_histograms()
+        self.assertEqual(histogram['name'], 'latency')
+        self.assertEqual(histogram['tags'], {'url': 'a'})
+        self.assertEqual(histogram['count'], 100)
+        self.assertAlmostEqual(histogram['sum'], 50.5)
+        self.assertEqual(histogram['min'], 0.01)
+        self.assertEqual(histogram['max'], 1.0)
+        self.assertEqual(histogram['p50'], 0.5)
+        self.assertEqual(histogram['p95'], 0.95)
+        self.assertEqual(histogram['p99'], 0.99)
+
+    def test_reset(self):
+        self.metrics.increment('requests')
+        self.metrics.observe('latency', 1)
+        self.metrics.reset()
+
+        self.assertEqual(self.metrics.get_counters(), [])
+        self.assertEqual(self.metrics.get_histograms(), [])
+
+    def test_get_outcome(self):
+        self.assertEqual(get_outcome(None), 'OK')
+        self.assertEqual(get_outcome(StatusCodeError('REPLAYED_OTP')),
+                         'REPLAYED_OTP')
+        self.assertEqual(get_outcome(Exception('NO_VALID_ANSWERS')),
+                         'NO_VALID_ANSWERS')
+        self.assertEqual(get_outcome(InvalidClientIdError('1234')),
+                         'InvalidClientIdError')
+
+
+class TestClientMetrics(MockServerTestMixin, unittest.TestCase):
+    def setUp(self):
+        yubico.DEFAULT_TIMEOUT = 2
+
+        self.metrics = InMemoryMetrics()
+        self.client = yubico.Yubico('1234', None, api_urls=LOCAL_SERVER,
+                                    metrics=self.metrics)
+
+    def tearDown(self):
+        self.client.close()
+
+    def test_metrics_are_disabled_by_default(self):
+        client = yubico.Yubico('1234', None, api_urls=LOCAL_SERVER)
+        self.assertTrue(client.metrics is NULL_METRICS)
+
+    def test_verify_ok(self):
+        self._set_mock_action('no_signature_ok')
+
+        for _ in range(3):
+            self.assertTrue(self.client.verify('test'))
+
+        self.assertEqual(self.metrics.get_counter('verifications',
+                                                  source='remote',
+                                                  outcome='OK'), 3)
+        self.assertEqual(self.metrics.get_counter('requests',
+                                                  url=LOCAL_SERVER[0]), 3)
+        self.assertEqual(self.metrics.get_counter('responses', status='OK'),
+                         3)
+        self.assertEqual(self.metrics.get_counter('request_errors'), 0)
+
+        histograms = dict((histogram['name'], histogram)
+                          for histogram in self.metrics.get_histograms())
+        self.assertEqual(histograms['verification_latency']['count'], 3)
+        self.assertEqual(histograms['request_latency']['count'], 3)
+        self.assertEqual(histograms['request_latency']['tags'],
+                         {'url': LOCAL_SERVER[0]})
+
+    def test_verify_bad_status_code(self):
+        self._set_mock_action('REPLAYED_OTP')
+
+        self.assertRaises(StatusCodeError, self.client.verify, 'test')
+        self.assertEqual(self.metrics.get_counter('verifications',
+                                                  outcome='REPLAYED_OTP'), 1)
+        self.assertEqual(self.metrics.get_counter('responses',
+                                                  status='REPLAYED_OTP'), 1)
+
+    def test_verify_retries(self):
+        self._set_mock_action('one_gateway_error')
+
+        self.assertTrue(self.client.verify('test'))
+        self.assertEqual(self.metrics.get_counter('requests'), 2)
+        self.assertEqual(self.metrics.get_counter('request_retries'), 1)
+
+    def test_verify_no_valid_answers(self):
+        client = yubico.Yubico('1234', None,
+                               api_urls=('http://127.0.0.1:1/verify',),
+                               metrics=self.metrics)
+
+        self.assertRaises(Exception, client.verify, 'test')
+        self.assertEqual(self.metrics.get_counter('request_errors'), 1)
+        self.assertEqual(self.metrics.get_counter(
+            'verifications', outcome='NO_VALID_ANSWERS'), 1)
+        client.close()
+
+    def test_abandoned_requests(self):
+        self._set_mock_action('no_signature_ok')
+        self._set_mock_action('timeout', port=8883)
+
+        client = yubico.Yubico('1234', None,
+                               api_urls=(LOCAL_SERVER + LOCAL_SERVER_2),
+                               metrics=self.metrics)
+
+        self.assertTrue(client.verify('test'))
+        self.assertEqual(self.metrics.get_counter('requests_abandoned'), 1)
+        self.assertEqual(self.metrics.get_counter('requests_abandoned',
+                                                  url=LOCAL_SERVER_2[0]), 1)
+        client.close()
+
+    def test_replay_cache_rejections(self):
+        self._set_mock_action('no_signature_ok')
+
+        client = yubico.Yubico('1234', None, api_urls=LOCAL_SERVER,
+                               replay_cache=MemoryReplayCache(),
+                               metrics=self.metrics)
+
+        self.assertTrue(client.verify('test'))
+        self.assertRaises(StatusCodeError, client.verify, 'test')
+
+        self.assertEqual(self.metrics.get_counter('replay_cache_rejections'),
+                         1)
+        self.assertEqual(self.metrics.get_counter('requests'), 1)
+        client.close()
+
+    @unittest.skipIf(AsyncYubico is None,
+                     'asyncio client requires Python 3.5+')
+    def test_async_verify_ok(self):
+        self._set_mock_action('no_signature_ok')
+
+        loop = asyncio.new_event_loop()
+        client = AsyncYubico('1234', None, api_urls=LOCAL_SERVER,
+                             metrics=self.metrics)
+
+        self.assertTrue(loop.run_until_complete(client.verify('test')))
+        loop.run_until_complete(client.close())
+        loop.close()
+
+        self.assertEqual(self.metrics.get_counter('verifications',
+                                                  outcome='OK'), 1)
+        self.assertEqual(self.metrics.get_counter('requests',
+                                                  url=LOCAL_SERVER[0]), 1)
+        self.assertEqual(self.metrics.get_counter('responses', status='OK'),
+                         1)
+
+
+if __name__ == '__main__':
+    sys.exit(unittest.main())
@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import sys
+import random
+
+from yubico_client import modhex
+from yubico_client.py3 import unittest2_required
+
+if unittest2_required:
+    import unittest2 as unittest  # NOQA
+else:
+    import unittest
+
+
+def reference_translate(otp, to=modhex.MODHEX):
+    """
+    Original (uncompiled) translation implementation which is used to verify
+    the compiled one returns exactly the same results.
+    """
+    possible = None
+    for c in set(otp):
+        alphabets = set(i for i, alphabet in enumerate(modhex.alphabets)
+                        if c in alphabet)
+        possible = alphabets if possible is None else possible & alphabets
+
+    translated = set()
+    for i in possible:
+        a = modhex.alphabets[i]
+        translation = dict(zip((ord(c) for c in a), to))
+        translated.add(otp.translate(translation))
+
+    return translated
+
+
+class TestModhexTranslate(unittest.TestCase):
+    def test_translate_matches_reference_implementation(self):
+        rand = random.Random(42)
+
+        for alphabet in modhex.alphabets:
+            for length in (1, 5, 12, 44):
+                otp = ''.join(rand.choice(alphabet) for _ in range(length))
+
+                for to in (modhex.MODHEX, modhex.HEX):
+                    self.assertEqual(modhex.translate(otp, to=to),
+                                     reference_translate(otp, to=to))
+
+    def test_translate_multiple_interpretations(self):
+        otp = 'vvbtbtndhtlfguefgluvbdcetnitidgkvfkbicevgcin'
+        translated = modhex.translate(otp)
+        self.assertTrue(len(translated) > 1)
+        self.assertTrue(otp in translated)
+
+    def test_translate_to_hex(self):
+        self.assertEqual(modhex.translate('cbdefghijklnrtuv', to=modhex.HEX),
+                         set([modhex.HEX]))
+
+    def test_translate_invalid_input(self):
+        self.assertRaises(KeyError, modhex.translate, 'cccc!')
+        self.assertRaises(ValueError, modhex.translate, '')
+        self.assertRaises(ValueError, modhex.translate, b'cccc')
+
+    def test_is_modhex(self):
+        self.assertTrue(modhex.is_modhex('cbdefghijklnrtuv'))
+        self.assertFalse(modhex.is_modhex('cbdefghijklnrtuva'))
+        self.assertFalse(modhex.is_modhex('jjjjjjjjnhe.ngcg'))
+
+
+class TestModhexTranslateMany(unittest.TestCase):
+    def setUp(self):
+        rand = random.Random(42)
+
+        self.otps = []
+        for alphabet in modhex.alphabets:
+            for length in (1, 12, 44):
+                self.otps.append(''.join(rand.choice(alphabet)
+                                         for _ in range(length)))
+
+        self.otps.append('vvbtbtndhtlfguefgluvbdcetnitidgkvfkbicevgcin')
+        rand.shuffle(self.otps)
+
+    def test_translate_many_matches_translate(self):
+        for chunk_size in (1, 7, len(self.otps), 4096):
+            for to in (modhex.MODHEX, modhex.HEX):
+                translated = list(modhex.translate_many(
+                    self.otps, to=to, chunk_size=chunk_size))
+                expected = [modhex.translate(otp, to=to)
+                            for otp in self.otps]
+                self.assertEqual(translated, expected)
+
+    def test_translate_many_is_lazy(self):
+        consumed = []
+
+        def otps():
+            for otp in self.otps:
+                consumed.append(otp)
+                yield otp
+
+        results = modhex.translate_many(otps(), chunk_size=10)
+        self.assertEqual(next(results), modhex.translate(self.otps[0]))
+        self.assertEqual(len(consumed), 10)
+
+    def test_translate_many_duplicate_otps(self):
+        otp = 'jjjjjjjjnhe.ngcgjeiuujjjdtgihjuecyixinxunkhj'
+        self.assertEqual(list(modhex.translate_many([otp] * 3)),
+                         [modhex.translate(otp)] * 3)
+
+    def test_translate_many_invalid_input(self):
+        self.assertEqual(list(modhex.translate_many([])), [])
+        self.assertRaises(KeyError, list,
+                          modhex.translate_many(['cbdef', 'cccc!']))
+        self.assertRaises(ValueError, list,
+                          modhex.translate_many(['cbdef', '']))
+        self.assertRaises(ValueError, list,
+                          modhex.translate_many(['cbdef', b'cccc']))
+        self.assertRaises(ValueError, list,
+                          modhex.translate_many(['cbdef'], to=b'0123'))
+
+
+class TestLayoutCache(unittest.TestCase):
+    def test_translate_remembers_device_alphabet(self):
+        cache = modhex.LayoutCache()
+
+        # Public ID alone is ambiguous, the rest of the otp isn't
+        otp1 = 'cccccccbbbbbcbdefghijklnrtuv'
+        self.assertTrue(len(modhex.translate(otp1[:12])) > 1)
+        self.assertEqual(cache.translate(otp1), set([otp1]))
+        self.assertEqual(len(cache), 1)
+
+        # Ambiguous otp from the same device is translated using the
+        # remembered alphabet
+        otp2 = 'cccccccbbbbbbbbbbbbbbbbbbbbb'
+        self.assertTrue(len(modhex.translate(otp2)) > 1)
+        self.assertEqual(cache.translate(otp2), set([otp2]))
+
+    def test_translate_ambiguous_otp_is_not_cached(self):
+        cache = modhex.LayoutCache()
+        otp = 'cccccccbbbbbbbbbbbbbbbbbbbbb'
+        self.assertEqual(cache.translate(otp), modhex.translate(otp))
+        self.assertEqual(len(cache), 0)
+
+    def test_translate_falls_back_to_full_detection(self):
+        cache = modhex.LayoutCache()
+        cache.translate('cccccccbbbbbcbdefghijklnrtuv')
+
+        # "\u1e63" is not part of the remembered alphabet
+        otp = 'cccccccbbbbbcbdef\u1e63'
+        self.assertEqual(cache.translate(otp), modhex.translate(otp))
+        self.assertEqual(cache.translate(otp), set(['cccccccbbbbbcbdefv']))
+
+    def test_translate_to_hex(self):
+        cache = modhex.LayoutCache()
+        otp = 'jjjjjjjjnhe.ngcgjeiuujjjdtgihjuecyixinxunkhj'
+
+        for _ in range(2):
+            self.assertEqual(cache.translate(otp, to=modhex.HEX),
+                             modhex.translate(otp, to=modhex.HEX))
+
+    def test_lru_eviction(self):
+        cache = modhex.LayoutCache(maxsize=2)
+        otps = ['cccccccccccb' + 'cbdefghijklnrtuv',
+                'cccccccccccd' + 'cbdefghijklnrtuv',
+                'ccccccccccce' + 'cbdefghijklnrtuv']
+
+        cache.translate(otps[0])
+        cache.translate(otps[1])
+        # Mark the first device as recently used
+        cache.translate(otps[0])
+        cache.translate(otps[2])
+
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(set(cache._alphabets.keys()),
+                         set([otps[0][:12], otps[2][:12]]))
+
+
+if __name__ == '__main__':
+    sys.exit(unittest.main())
@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+import sys
+import hmac
+import base64
+import hashlib
+
+from yubico_client import yubico
+from yubico_client.protocol import Signer
+from yubico_client.protocol import ValidationProtocol
+from yubico_client.protocol import parse_response
+from yubico_client.protocol import encode_parameters
+from yubico_client.protocol import encode_http_request
+from yubico_client.py3 import urlencode
+from yubico_client.py3 import unittest2_required
+from yubico_client.yubico_exceptions import StatusCodeError
+from yubico_client.yubico_exceptions import InvalidClientIdError
+from yubico_client.yubico_exceptions import InvalidValidationResponse
+from yubico_client.yubico_exceptions import SignatureVerificationError
+
+if unittest2_required:
+    import unittest2 as unittest  # NOQA
+else:
+    import unittest
+
+RESPONSE = (b'h=rq9IrK1sBjoXu9ph9s0Dzrwn4Dg%3D\r\n'
+            b't=2019-05-29T11:40:12Z0123\r\n'
+            b'otp=ccccccccljdeluiucdgffccchkugjcfditgbglbflvjc\r\n'
+            b'nonce=aef3a7835277a28da831005c2ae3b919e2076a62\r\n'
+            b'sl=100\r\n'
+            b'status=OK\r\n'
+            b'\r\n')
+
+
+class TestParseResponse(unittest.TestCase):
+    def test_parse_response(self):
+        parsed = parse_response(RESPONSE)
+
+        self.assertEqual(parsed.status, 'OK')
+        self.assertEqual(parsed.signature, 'rq9IrK1sBjoXu9ph9s0Dzrwn4Dg=')
+        self.assertEqual(parsed.signing_string,
+                         b'nonce=aef3a7835277a28da831005c2ae3b919e2076a62&'
+                         b'otp=ccccccccljdeluiucdgffccchkugjcfditgbglbflvjc&'
+                         b'sl=100&status=OK&t=2019-05-29T11:40:12Z0123')
+        self.assertEqual(parsed.parameters, {
+            'nonce': 'aef3a7835277a28da831005c2ae3b919e2076a62',
+            'otp': 'ccccccccljdeluiucdgffccchkugjcfditgbglbflvjc',
+            'sl': '100',
+            'status': 'OK',
+            't': '2019-05-29T11:40:12Z0123'
+        })
+
+    def test_parse_response_matches_legacy_parser(self):
+        client = yubico.Yubico('1234', 'c2VjcmV0')
+        text = RESPONSE.decode('utf-8')
+        parsed = parse_response(text)
+
+        signature, query_string = \
+            client.parse_parameters_from_response(text)
+        self.assertEqual(parsed.signature, signature)
+        self.assertEqual(parsed.signing_string.decode('utf-8'), query_string)
+        self.assertEqual(parsed.parameters,
+                         client.get_parameters_as_dictionary(query_string))
+
+    def test_parse_response_ampersand_separator(self):
+        parsed = parse_response(b'status=OK&otp=different')
+        self.assertEqual(parsed.status, 'OK')
+        self.assertEqual(parsed.parameters['otp'], 'different')
+
+    def test_parse_response_invalid_status(self):
+        self.assertEqual(parse_response(b'foo=bar').status, None)
+        self.assertEqual(parse_response(b'status=ok').status, None)
+        self.assertEqual(parse_response(b'').status, None)
+
+    def test_parse_response_multiple_statuses(self):
+        for response in (b'status=OK\nstatus=REPLAYED_OTP',
+                         b'status=BAD_OTP&status=OK'):
+            try:
+                parse_response(response)
+            except InvalidValidationResponse:
+                e = sys.exc_info()[1]
+                self.assertTrue('More than one status' in e.message)
+            else:
+                self.fail('Exception was not thrown')
+
+
+class TestSigner(unittest.TestCase):
+    def setUp(self):
+        self.key = base64.b64decode(b'c2VjcmV0MTIzNDU2')
+        self.signer = Signer(self.key)
+
+    def test_sign(self):
+        data = b'nonce=abc&otp=def&status=OK'
+        expected = base64.b64encode(
+            hmac.new(self.key, data, hashlib.sha1).digest()).decode('utf-8')
+
+        # Keyed state is reused between the messages
+        for _ in range(2):
+            self.assertEqual(self.signer.sign(data), expected)
+
+        self.assertNotEqual(self.signer.sign(b'status=OK'), expected)
+
+    def test_verify(self):
+        data = b'nonce=abc&otp=def&status=OK'
+        signature = self.signer.sign(data)
+
+        self.assertTrue(self.signer.verify(data, signature))
+        self.assertFalse(self.signer.verify(data + b'&t=1', signature))
+        self.assertFalse(self.signer.verify(data, None))
+
+    def test_sign_parameters_matches_legacy_signature(self):
+        client = yubico.Yubico('1234', 'c2VjcmV0MTIzNDU2')
+        parameters = [('id', '1234'), ('otp', 'cccc+/'), ('nonce', 'abc'),
+                      ('timestamp', '1'), ('sl', 50)]
+
+        query_string = self.signer.sign_parameters(parameters)
+        expected = client.generate_message_signature(urlencode(parameters))
+
+        signature = expected.replace('+', '%2B')
+        self.assertEqual(query_string,
+                         '%s&h=%s' % (encode_parameters(parameters),
+                                      signature))
+
+    def test_encode_parameters(self):
+        self.assertEqual(encode_parameters([('otp', 'a b'), ('id', 1)]),
+                         'id=1&otp=a+b')
+
+
+class TestValidationProtocol(unittest.TestCase):
+    def setUp(self):
+        self.key = base64.b64decode(b'c2VjcmV0MTIzNDU2')
+        self.protocol = ValidationProtocol('1234', self.key)
+        self.otp = 'ccccccccljdeluiucdgffccchkugjcfditgbglbflvjc'
+
+    def _response(self, request, status='OK', **parameters):
+        parameters.update({'otp': request.otp, 'nonce': request.nonce,
+                           'status': status})
+        signing_string = '&'.join('%s=%s' % item
+                                  for item in sorted(parameters.items()))
+        signature = self.protocol.signer.sign(signing_string.encode('utf-8'))
+        return ('h=%s\r\n%s\r\n' % (signature, signing_string.replace(
+            '&', '\r\n'))).encode('utf-8')
+
+    def test_create_request(self):
+        protocol = ValidationProtocol('1234')
+        request = protocol.create_request(self.otp, timestamp=True, sl=50,
+                                          timeout=5)
+
+        self.assertEqual(len(request.nonce), 25)
+        self.assertEqual(request.query_string,
+                         'id=1234&nonce=%s&otp=%s&sl=50&timeout=5'
+                         '&timestamp=1' % (request.nonce, self.otp))
+        self.assertEqual(request.get_url('https://api/verify'),
+                         'https://api/verify?' + request.query_string)
+
+        # Each request uses a new nonce
+        self.assertNotEqual(protocol.create_request(self.otp).nonce,
+                            request.nonce)
+
+    def test_create_request_invalid_sl(self):
+        for sl in (-1, 101, 'invalid'):
+            self.assertRaises(Exception, self.protocol.create_request,
+                              self.otp, sl=sl)
+
+    def test_create_request_is_signed(self):
+        request = self.protocol.create_request(self.otp)
+        query_string, signature = request.query_string.split('&h=')
+
+        self.assertEqual(signature.replace('%2B', '+'),
+                         self.protocol.signer.sign(query_string.encode()))
+
+    def test_request_to_bytes(self):
+        request = self.protocol.create_request(self.otp)
+
+        self.assertEqual(
+            request.to_bytes('https://api.yubico.com/wsapi/2.0/verify',
+                             {'User-Agent': 'test'}),
+            ('GET /wsapi/2.0/verify?%s HTTP/1.1\r\n'
+             'Host: api.yubico.com\r\n'
+             'User-Agent: test\r\n\r\n' %
+             (request.query_string)).encode('latin-1'))
+        self.assertEqual(encode_http_request('http://localhost:8080'),
+                         b'GET / HTTP/1.1\r\nHost: localhost:8080\r\n\r\n')
+
+    def test_verify_response(self):
+        request = self.protocol.create_request(self.otp)
+        response = self._response(request, sl='100')
+
+        self.assertTrue(self.protocol.verify_response(response, request.otp,
+                                                      request.nonce))
+        self.assertEqual(
+            self.protocol.verify_response(response, request.otp,
+                                          request.nonce,
+                                          return_response=True),
+            {'otp': request.otp, 'nonce': request.nonce, 'sl': '100',
+             'status': 'OK'})
+
+    def test_verify_response_no_definitive_answer(self):
+        request = self.protocol.create_request(self.otp)
+
+        for status in ('BAD_OTP', 'BACKEND_ERROR'):
+            response = self._response(request, status=status)
+            self.assertFalse(self.protocol.verify_response(
+                response, request.otp, request.nonce))
+
+        self.assertFalse(self.protocol.verify_response(
+            b'', request.otp, request.nonce))
+
+    def test_verify_response_errors(self):
+        request = self.protocol.create_request(self.otp)
+        other_request = self.protocol.create_request(self.otp[:-1] + 'b')
+
+        cases = [
+            (self._response(request, status='REPLAYED_OTP'),
+             StatusCodeError),
+            (self._response(request, status='NO_SUCH_CLIENT'),
+             InvalidClientIdError),
+            (self._response(other_request), InvalidValidationResponse),
+            (self._response(request).replace(b'status=OK', b'status=OK\n'
+                                             b't=1'),
+             SignatureVerificationError)
+        ]
+
+        for response, exception_class in cases:
+            self.assertRaises(exception_class, self.protocol.verify_response,
+                              response, request.otp, request.nonce)
+
+
+if __name__ == '__main__':
+    sys.exit(unittest.main())
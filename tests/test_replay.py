@@ -0,0 +1,159 @@
+import os
+import sys
+import time
+import shutil
+import sqlite3
+import tempfile
+import threading
+
+from yubico_client import replay
+from yubico_client.py3 import unittest2_required
+
+if unittest2_required:
+    import unittest2 as unittest  # NOQA
+else:
+    import unittest
+
+OTP_1 = 'tlerefhcvijlngibueiiuhkeibbcbecehvjiklltnbbl'
+OTP_2 = 'ccccccccljdeluiucdgffccchkugjcfditgbglbflvjc'
+
+
+class ReplayCacheTestMixin(object):
+    def _get_cache(self, ttl=replay.DEFAULT_TTL):
+        raise NotImplementedError()
+
+    def test_add(self):
+        cache = self._get_cache()
+
+        self.assertTrue(cache.add(OTP_1))
+        self.assertFalse(cache.add(OTP_1))
+        self.assertTrue(cache.add(OTP_2))
+
+        self.assertTrue(OTP_1 in cache)
+        self.assertEqual(len(cache), 2)
+
+    def test_discard(self):
+        cache = self._get_cache()
+
+        self.assertTrue(cache.add(OTP_1))
+        cache.discard(OTP_1)
+        cache.discard(OTP_2)
+
+        self.assertFalse(OTP_1 in cache)
+        self.assertTrue(cache.add(OTP_1))
+
+    def test_ttl(self):
+        cache = self._get_cache(ttl=0.1)
+
+        self.assertTrue(cache.add(OTP_1))
+        self.assertFalse(cache.add(OTP_1))
+
+        time.sleep(0.15)
+        self.assertFalse(OTP_1 in cache)
+        self.assertTrue(cache.add(OTP_1))
+
+    def test_concurrent_add(self):
+        cache = self._get_cache()
+        results = []
+
+        def add():
+            results.append(cache.add(OTP_1))
+
+        threads = [threading.Thread(target=add) for _ in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results.count(True), 1)
+
+
+class TestMemoryReplayCache(ReplayCacheTestMixin, unittest.TestCase):
+    def _get_cache(self, ttl=replay.DEFAULT_TTL):
+        return replay.MemoryReplayCache(ttl=ttl)
+
+    def test_maxsize(self):
+        cache = replay.MemoryReplayCache(maxsize=2)
+
+        for otp in ('a', 'b', 'c'):
+            self.assertTrue(cache.add(otp))
+
+        self.assertEqual(len(cache), 2)
+        self.assertFalse('a' in cache)
+        self.assertTrue('c' in cache)
+
+
+class TestSQLiteReplayCache(ReplayCacheTestMixin, unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'replay.db')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _get_cache(self, ttl=replay.DEFAULT_TTL):
+        return replay.SQLiteReplayCache(self.path, ttl=ttl)
+
+    def test_wal_mode(self):
+        cache = self._get_cache()
+        cursor = cache._get_connection().execute('PRAGMA journal_mode')
+        self.assertEqual(cursor.fetchone()[0], 'wal')
+
+    def test_cache_is_shared(self):
+        # Different instances (e.g. in different worker processes) which use
+        # the same file see each others OTPs
+        cache1 = self._get_cache()
+        cache2 = self._get_cache()
+
+        self.assertTrue(cache1.add(OTP_1))
+        self.assertFalse(cache2.add(OTP_1))
+        self.assertTrue(cache2.add(OTP_2))
+        self.assertFalse(cache1.add(OTP_2))
+
+        cache1.close()
+        cache2.close()
+
+    def test_expired_otps_are_purged(self):
+        cache = self._get_cache(ttl=0)
+
+        for index in range(replay.SQLITE_PURGE_INTERVAL):
+            cache.add('otp%s' % (index))
+
+        cursor = cache._get_connection().execute(
+            'SELECT COUNT(*) FROM replay_cache')
+        self.assertEqual(cursor.fetchone()[0], 1)
+
+    def test_close_closes_connections_of_all_threads(self):
+        cache = self._get_cache()
+        connections = []
+
+        def add(index):
+            for otp_index in range(5):
+                cache.add('otp%s-%s' % (index, otp_index))
+
+            connections.append(cache._get_connection())
+
+        threads = [threading.Thread(target=add, args=(index,))
+                   for index in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(cache._add_count, 50)
+        self.assertEqual(len(cache), 50)
+
+        cache.close()
+        self.assertEqual(cache._connections, [])
+
+        for connection in connections:
+            self.assertRaises(sqlite3.ProgrammingError, connection.execute,
+                              'SELECT 1')
+
+        # New connection is opened on demand
+        self.assertFalse(cache.add('otp0-0'))
+        cache.close()
+
+
+if __name__ == '__main__':
+    sys.exit(unittest.main())
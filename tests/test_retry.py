@@ -0,0 +1,88 @@
+import sys
+import time
+
+from email.utils import formatdate
+
+from yubico_client.retry import ConstantBackoff
+from yubico_client.retry import ExponentialBackoff
+from yubico_client.retry import RetryBudget
+from yubico_client.retry import parse_retry_after
+from yubico_client.retry import get_retry_delay
+from yubico_client.py3 import unittest2_required
+
+if unittest2_required:
+    import unittest2 as unittest  # NOQA
+else:
+    import unittest
+
+
+class TestBackoff(unittest.TestCase):
+    def test_constant_backoff(self):
+        backoff = ConstantBackoff(delay=0.5)
+        self.assertEqual([backoff.get_delay(i) for i in range(1, 4)],
+                         [0.5, 0.5, 0.5])
+
+    def test_exponential_backoff_without_jitter(self):
+        backoff = ExponentialBackoff(base_delay=0.1, max_delay=0.5,
+                                     jitter=False)
+        self.assertEqual([backoff.get_delay(i) for i in range(1, 5)],
+                         [0.1, 0.2, 0.4, 0.5])
+
+    def test_exponential_backoff_with_jitter(self):
+        backoff = ExponentialBackoff(base_delay=0.1, max_delay=0.5)
+
+        for attempt in range(1, 10):
+            delay = backoff.get_delay(attempt)
+            self.assertTrue(0 <= delay <= min(0.5, 0.1 * 2 ** (attempt - 1)))
+
+    def test_get_retry_delay_retry_after(self):
+        backoff = ConstantBackoff(delay=0.5)
+        self.assertEqual(get_retry_delay(backoff, 1), 0.5)
+        self.assertEqual(get_retry_delay(backoff, 1, '2'), 2)
+        self.assertEqual(get_retry_delay(backoff, 1, '0'), 0.5)
+        self.assertEqual(get_retry_delay(backoff, 1, 'invalid'), 0.5)
+
+
+class TestParseRetryAfter(unittest.TestCase):
+    def test_seconds(self):
+        self.assertEqual(parse_retry_after('120'), 120)
+        self.assertEqual(parse_retry_after(' 5 '), 5)
+
+    def test_http_date(self):
+        value = formatdate(time.time() + 60, usegmt=True)
+        delay = parse_retry_after(value)
+        self.assertTrue(55 <= delay <= 60)
+
+        value = formatdate(time.time() - 60, usegmt=True)
+        self.assertEqual(parse_retry_after(value), 0)
+
+    def test_invalid_value(self):
+        for value in [None, '', 'foo', '-1']:
+            self.assertEqual(parse_retry_after(value), None)
+
+
+class TestRetryBudget(unittest.TestCase):
+    def test_retries_limited_to_ratio_of_requests(self):
+        budget = RetryBudget(retry_ratio=0.5, min_retries_per_second=0)
+        self.assertFalse(budget.can_retry())
+
+        budget.record_request()
+        self.assertFalse(budget.can_retry())
+
+        budget.record_request()
+        self.assertTrue(budget.can_retry())
+        self.assertFalse(budget.can_retry())
+
+    def test_min_retries_per_second(self):
+        budget = RetryBudget(retry_ratio=0, min_retries_per_second=2)
+        self.assertTrue(budget.can_retry())
+        self.assertTrue(budget.can_retry())
+        self.assertFalse(budget.can_retry())
+
+        time.sleep(0.5)
+        self.assertTrue(budget.can_retry())
+        self.assertFalse(budget.can_retry())
+
+
+if __name__ == '__main__':
+    sys.exit(unittest.main())
@@ -0,0 +1,120 @@
+import sys
+import time
+
+from yubico_client.servers import ServerRanking
+from yubico_client.servers import CircuitBreaker
+from yubico_client.py3 import unittest2_required
+
+if unittest2_required:
+    import unittest2 as unittest  # NOQA
+else:
+    import unittest
+
+URLS = ['http://a.example.com', 'http://b.example.com',
+        'http://c.example.com']
+
+
+class TestServerRanking(unittest.TestCase):
+    def test_preferred_order_is_used_without_samples(self):
+        ranking = ServerRanking(urls=URLS)
+        self.assertEqual(ranking.get_ranked_urls(), URLS)
+
+    def test_urls_are_ordered_by_latency(self):
+        ranking = ServerRanking(urls=URLS)
+        ranking.record_success(URLS[0], 0.3)
+        ranking.record_success(URLS[1], 0.2)
+        ranking.record_success(URLS[2], 0.1)
+
+        self.assertEqual(ranking.get_ranked_urls(), list(reversed(URLS)))
+
+    def test_urls_are_ordered_by_error_rate(self):
+        ranking = ServerRanking(urls=URLS, alpha=0.5)
+
+        for url in URLS:
+            ranking.record_success(url, 0.1)
+
+        ranking.record_failure(URLS[0])
+
+        self.assertEqual(ranking.get_ranked_urls(),
+                         [URLS[1], URLS[2], URLS[0]])
+
+        stats = ranking.get_stats()[0]
+        self.assertEqual(stats['error_rate'], 0.5)
+        self.assertEqual(stats['request_count'], 2)
+        self.assertEqual(stats['error_count'], 1)
+
+    def test_failing_server_without_latency_samples_is_ranked_last(self):
+        ranking = ServerRanking(urls=URLS)
+        ranking.record_failure(URLS[0])
+        ranking.record_success(URLS[1], 1.0)
+
+        self.assertEqual(ranking.get_ranked_urls(),
+                         [URLS[2], URLS[1], URLS[0]])
+
+    def test_latency_moving_average(self):
+        ranking = ServerRanking(urls=URLS, alpha=0.5)
+        ranking.record_success(URLS[0], 1.0)
+        ranking.record_success(URLS[0], 0.5)
+
+        self.assertEqual(ranking.get_stats()[0]['latency'], 0.75)
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def setUp(self):
+        self.circuit_breaker = CircuitBreaker(url=URLS[0],
+                                              failure_threshold=2,
+                                              recovery_timeout=0.1)
+
+    def test_opens_after_consecutive_failures(self):
+        self.circuit_breaker.record_failure()
+        self.circuit_breaker.record_success()
+        self.circuit_breaker.record_failure()
+        self.assertEqual(self.circuit_breaker.state,
+                         CircuitBreaker.STATE_CLOSED)
+        self.assertTrue(self.circuit_breaker.allow_request())
+
+        self.circuit_breaker.record_failure()
+        self.assertEqual(self.circuit_breaker.state, CircuitBreaker.STATE_OPEN)
+        self.assertFalse(self.circuit_breaker.allow_request())
+
+    def test_half_open_trial_request_succeeds(self):
+        self._open()
+        time.sleep(0.1)
+
+        self.assertEqual(self.circuit_breaker.state,
+                         CircuitBreaker.STATE_HALF_OPEN)
+
+        # Only a single trial request is allowed
+        self.assertTrue(self.circuit_breaker.allow_request())
+        self.assertFalse(self.circuit_breaker.allow_request())
+
+        self.circuit_breaker.record_success()
+        self.assertEqual(self.circuit_breaker.state,
+                         CircuitBreaker.STATE_CLOSED)
+        self.assertEqual(self.circuit_breaker.failure_count, 0)
+
+    def test_half_open_trial_request_fails(self):
+        self._open()
+        time.sleep(0.1)
+
+        self.assertTrue(self.circuit_breaker.allow_request())
+        self.circuit_breaker.record_failure()
+        self.assertEqual(self.circuit_breaker.state, CircuitBreaker.STATE_OPEN)
+
+    def test_half_open_trial_request_cancelled(self):
+        self._open()
+        time.sleep(0.1)
+
+        self.assertTrue(self.circuit_breaker.allow_request())
+        self.circuit_breaker.record_cancelled()
+        self.assertTrue(self.circuit_breaker.allow_request())
+
+    def _open(self):
+        for _ in range(2):
+            self.circuit_breaker.record_failure()
+
+        self.assertEqual(self.circuit_breaker.state, CircuitBreaker.STATE_OPEN)
+
+
+if __name__ == '__main__':
+    sys.exit(unittest.main())
@@ -0,0 +1,205 @@
+import os
+import sys
+import ssl
+import threading
+
+from yubico_client import yubico
+from yubico_client import tls
+from yubico_client.transports import HTTPClientTransport
+from yubico_client.py3 import PY3
+from yubico_client.py3 import unittest2_required
+
+if unittest2_required:
+    import unittest2 as unittest  # NOQA
+else:
+    import unittest
+
+if PY3:
+    from http.server import BaseHTTPRequestHandler
+    from http.server import HTTPServer
+    from socketserver import ThreadingMixIn
+    from urllib.parse import urlparse, parse_qs
+else:
+    from BaseHTTPServer import BaseHTTPRequestHandler  # NOQA
+    from BaseHTTPServer import HTTPServer  # NOQA
+    from SocketServer import ThreadingMixIn  # NOQA
+    from urlparse import urlparse, parse_qs  # NOQA
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            'fixtures')
+CERT_PATH = os.path.join(FIXTURES_DIR, 'localhost.crt')
+KEY_PATH = os.path.join(FIXTURES_DIR, 'localhost.key')
+
+OTP = 'tlksvebfurcvrtfvgvhhkrtlfnkddlhldfrllcrgtfvk'
+
+
+class ValidationRequestHandler(BaseHTTPRequestHandler):
+    """
+    Minimal stand-in for the validation server which closes the connection
+    after each response so each request needs a new TLS handshake.
+    """
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        params = parse_qs(urlparse(self.path).query)
+        body = ('otp=%s\nnonce=%s\nstatus=OK\n' %
+                (params['otp'][0], params['nonce'][0])).encode('utf-8')
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+@unittest.skipIf(not tls.TLS_SESSION_RESUMPTION_SUPPORTED,
+                 'TLS session resumption is not supported')
+class TestTLSSessionResumption(unittest.TestCase):
+    def setUp(self):
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(CERT_PATH, KEY_PATH)
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0),
+                                          ValidationRequestHandler)
+        self.server.socket = context.wrap_socket(self.server.socket,
+                                                 server_side=True)
+
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+
+        self.api_url = ('https://127.0.0.1:%s/wsapi/2.0/verify' %
+                        (self.server.server_address[1]))
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _get_client(self, **kwargs):
+        return yubico.Yubico('1234', api_urls=(self.api_url,),
+                             ca_certs_bundle_path=CERT_PATH, **kwargs)
+
+    def test_new_connections_resume_session(self):
+        client = self._get_client()
+
+        for _ in range(5):
+            self.assertTrue(client.verify(OTP))
+
+        stats = client.get_tls_stats()
+        self.assertEqual(stats['handshakes'], 5)
+        self.assertEqual(stats['resumed'], 4)
+        self.assertEqual(stats['full_handshakes'], 1)
+        self.assertEqual(stats['hit_rate'], 0.8)
+
+        client.close()
+
+    def test_http_client_transport_resumes_session(self):
+        client = self._get_client(transport=HTTPClientTransport)
+
+        for _ in range(3):
+            self.assertTrue(client.verify(OTP))
+
+        stats = client.get_tls_stats()
+        self.assertEqual(stats['handshakes'], 3)
+        self.assertEqual(stats['resumed'], 2)
+
+        client.close()
+
+    def test_tls_1_2_session_resumption(self):
+        client = self._get_client()
+        client._get_transport()
+        client._ssl_context.maximum_version = ssl.TLSVersion.TLSv1_2
+
+        for _ in range(3):
+            self.assertTrue(client.verify(OTP))
+
+        stats = client.get_tls_stats()
+        self.assertEqual(stats['handshakes'], 3)
+        self.assertEqual(stats['resumed'], 2)
+
+        client.close()
+
+    def test_refresh_ca_bundle_clears_sessions(self):
+        client = self._get_client()
+
+        self.assertTrue(client.verify(OTP))
+        self.assertEqual(len(client._tls_session_cache), 1)
+
+        client.refresh_ca_bundle()
+        self.assertEqual(len(client._tls_session_cache), 0)
+
+        # Sessions from the old context can't be resumed, counters are kept
+        self.assertTrue(client.verify(OTP))
+        self.assertTrue(client.verify(OTP))
+
+        stats = client.get_tls_stats()
+        self.assertEqual(stats['handshakes'], 3)
+        self.assertEqual(stats['resumed'], 1)
+
+        client.close()
+
+    def test_verify_cert_disabled_ca_bundle_found(self):
+        # CA bundle which has been found takes precedence over verify_cert
+        for transport in (None, HTTPClientTransport):
+            client = self._get_client(verify_cert=False, transport=transport)
+            self.assertTrue(client.verify(OTP))
+            self.assertEqual(client._ssl_context.verify_mode,
+                             ssl.CERT_REQUIRED)
+
+            client.close()
+
+    def test_certificate_is_verified(self):
+        client = yubico.Yubico('1234', api_urls=(self.api_url,))
+        self.assertRaises(Exception, client.verify, OTP)
+        self.assertEqual(client.get_tls_stats()['handshakes'], 0)
+
+        client.close()
+
+
+@unittest.skipIf(not tls.TLS_SESSION_RESUMPTION_SUPPORTED,
+                 'TLS session resumption is not supported')
+class TestCreateSSLContext(unittest.TestCase):
+    def test_same_settings_as_default_context(self):
+        default_context = ssl.create_default_context(cafile=CERT_PATH)
+        context = tls.create_ssl_context(cafile=CERT_PATH,
+                                         session_cache=tls.TLSSessionCache())
+
+        self.assertTrue(isinstance(context, tls.SessionCachingSSLContext))
+        self.assertEqual(context.options, default_context.options)
+        self.assertEqual(context.verify_flags, default_context.verify_flags)
+        self.assertEqual(context.verify_mode, default_context.verify_mode)
+        self.assertEqual(context.check_hostname,
+                         default_context.check_hostname)
+
+
+class TestTLSSessionCache(unittest.TestCase):
+    def test_get_stats_no_handshakes(self):
+        cache = tls.TLSSessionCache()
+        self.assertEqual(cache.get_stats(), {'handshakes': 0, 'resumed': 0,
+                                             'full_handshakes': 0,
+                                             'hit_rate': 0.0})
+
+    def test_maxsize(self):
+        cache = tls.TLSSessionCache(maxsize=2)
+        cache.set(('a', 443), 1)
+        cache.set(('b', 443), 2)
+        cache.set(('a', 443), 3)
+        self.assertEqual(len(cache), 2)
+
+        cache.set(('c', 443), 4)
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.get(('a', 443)), None)
+        self.assertEqual(cache.get(('c', 443)), 4)
+
+
+if __name__ == '__main__':
+    sys.exit(unittest.main())
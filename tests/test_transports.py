@@ -0,0 +1,112 @@
+import sys
+import ssl
+import time
+
+from yubico_client import yubico
+from yubico_client.transports import HTTPClientTransport
+from yubico_client.transports import RequestsTransport
+from yubico_client.py3 import unittest2_required
+from yubico_client.yubico_exceptions import StatusCodeError
+
+from tests import MockServerTestMixin
+
+if unittest2_required:
+    import unittest2 as unittest  # NOQA
+else:
+    import unittest
+
+LOCAL_SERVER = ('http://127.0.0.1:8881/wsapi/2.0/verify',)
+LOCAL_SERVER_HTTPS = ('https://127.0.0.1:8882/wsapi/2.0/verify',)
+
+
+class TestHTTPClientTransport(MockServerTestMixin, unittest.TestCase):
+    def setUp(self):
+        yubico.DEFAULT_TIMEOUT = 2
+
+        self.client = yubico.Yubico('1234', None, api_urls=LOCAL_SERVER,
+                                    transport=HTTPClientTransport)
+
+    def tearDown(self):
+        self.client.close()
+
+    def test_default_transport(self):
+        client = yubico.Yubico('1234', None, api_urls=LOCAL_SERVER)
+        self.assertTrue(isinstance(client._get_transport(),
+                                   RequestsTransport))
+
+    def test_verify_ok(self):
+        self._set_mock_action('no_signature_ok')
+
+        for _ in range(3):
+            self.assertTrue(self.client.verify('test'))
+
+        self.assertEqual(self.client.verify('test', return_response=True),
+                         {'status': 'OK'})
+
+    def test_verify_bad_status_code(self):
+        self._set_mock_action('REPLAYED_OTP')
+
+        try:
+            self.client.verify('test')
+        except StatusCodeError as e:
+            self.assertEqual(e.status_code, 'REPLAYED_OTP')
+        else:
+            self.fail('Exception was not thrown')
+
+    def test_connections_are_reused_between_verifications(self):
+        self._set_mock_action('no_signature_ok')
+
+        transport = self.client._get_transport()
+
+        self.assertTrue(self.client.verify('test'))
+        idle = list(transport._idle.values())
+        self.assertEqual(len(idle), 1)
+        self.assertEqual(len(idle[0]), 1)
+        connection = idle[0][0]
+
+        for _ in range(3):
+            self.assertTrue(self.client.verify('test'))
+
+        idle = list(transport._idle.values())
+        self.assertEqual(idle, [[connection]])
+
+        self.client.close()
+        self.assertEqual(transport._idle, {})
+
+    def test_verify_retries_500_responses(self):
+        self._set_mock_action('one_gateway_error')
+
+        self.assertTrue(self.client.verify('test'))
+        self.assertEqual(self._get_request_count(), 2)
+
+    def test_verify_retry_after_header_is_respected(self):
+        self._set_mock_action('one_service_unavailable_retry_after')
+
+        client = yubico.Yubico('1234', None, api_urls=LOCAL_SERVER,
+                               retry_delay=0, transport=HTTPClientTransport)
+
+        start_time = time.time()
+        self.assertTrue(client.verify('test'))
+        self.assertTrue((time.time() - start_time) >= 1)
+        self.assertEqual(self._get_request_count(), 2)
+        client.close()
+
+    def test_verify_timeout(self):
+        self._set_mock_action('timeout')
+
+        start_time = time.time()
+        self.assertRaisesRegexp(Exception, 'NO_VALID_ANSWERS',
+                                self.client.verify, 'test', timeout=0.5)
+        self.assertTrue((time.time() - start_time) < 1)
+
+    def test_ssl_error_is_raised(self):
+        # Server doesn't speak TLS
+        client = yubico.Yubico('1234', None, api_urls=LOCAL_SERVER_HTTPS,
+                               transport=HTTPClientTransport)
+
+        self.assertRaises(ssl.SSLError, client.verify, 'test')
+        client.close()
+
+
+if __name__ == '__main__':
+    sys.exit(unittest.main())
@@ -1,17 +1,27 @@
 import os
 import sys
+import ssl
+import time
+import threading
 import unittest
+import warnings
 
 import requests
 
+from yubico_client import modhex
 from yubico_client import yubico
 from yubico_client.otp import OTP
+from yubico_client.adapters import SSLContextAdapter
+from yubico_client.replay import MemoryReplayCache
+from yubico_client.retry import RetryBudget
 from yubico_client.py3 import unittest2_required
 from yubico_client.yubico_exceptions import StatusCodeError
 from yubico_client.yubico_exceptions import InvalidClientIdError
 from yubico_client.yubico_exceptions import SignatureVerificationError
 from yubico_client.yubico_exceptions import InvalidValidationResponse
 
+from tests import MockServerTestMixin
+
 if unittest2_required:
     import unittest2 as unittest  # NOQA
 else:
@@ -19,6 +29,10 @@ else:
 
 LOCAL_SERVER = ('http://127.0.0.1:8881/wsapi/2.0/verify',)
 LOCAL_SERVER_HTTPS = ('https://127.0.0.1:8882/wsapi/2.0/verify',)
+LOCAL_SERVER_2 = ('http://127.0.0.1:8883/wsapi/2.0/verify',)
+
+CA_BUNDLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                              'fixtures/localhost.crt')
 
 
 class TestOTPClass(unittest.TestCase):
@@ -31,6 +45,39 @@ class TestOTPClass(unittest.TestCase):
         self.assertEqual(otp2.otp,
                          'ccccccccljdeluiucdgffccchkugjcfditgbglbflvjc')
 
+    def test_otp_class_has_no_instance_dict(self):
+        otp = OTP('tlerefhcvijlngibueiiuhkeibbcbecehvjiklltnbbl')
+        self.assertFalse(hasattr(otp, '__dict__'))
+        self.assertRaises(AttributeError, setattr, otp, 'foo', 'bar')
+
+    def test_otp_decoded_fields(self):
+        otp = OTP('jjjjjjjjnhe.ngcgjeiuujjjdtgihjuecyixinxunkhj')
+
+        self.assertEqual(otp.public_id, 'ccccccccljde')
+        self.assertEqual(otp.hex,
+                         '00000000a823ae7e0254400069e580427d515a14af80')
+        self.assertEqual(otp.ciphertext,
+                         b'\xae~\x02T@\x00i\xe5\x80B}QZ\x14\xaf\x80')
+        self.assertEqual(len(otp.ciphertext), 16)
+
+        # Decoded values are cached
+        self.assertTrue(otp.hex is otp.hex)
+        self.assertTrue(otp.ciphertext is otp.ciphertext)
+
+    def test_otp_decoded_fields_short_public_id(self):
+        otp = OTP('cccc' + 'cbdefghijklnrtuv' * 2)
+        self.assertEqual(otp.public_id, 'cccc')
+        self.assertEqual(otp.ciphertext,
+                         b'\x01\x23\x45\x67\x89\xab\xcd\xef' * 2)
+
+    def test_otp_decoded_fields_invalid_otp(self):
+        otp = OTP('test', translate_otp=False)
+        self.assertRaises(ValueError, getattr, otp, 'ciphertext')
+
+        otp = OTP('cccccccccccc' + 'x' * 32, translate_otp=False)
+        self.assertRaises(ValueError, getattr, otp, 'hex')
+        self.assertRaises(ValueError, getattr, otp, 'ciphertext')
+
     def test_translation_multiple_interpretations(self):
         otp_str1 = 'vvbtbtndhtlfguefgluvbdcetnitidgkvfkbicevgcin'
         otp1 = OTP(otp_str1)
@@ -44,8 +91,25 @@ class TestOTPClass(unittest.TestCase):
         self.assertEqual(otp1.otp, otp_str1)
         self.assertEqual(otp2.otp, otp_str2)
 
+    def test_translation_with_layout_cache(self):
+        layout_cache = modhex.LayoutCache()
+        otp_str1 = 'jjjjjjjjnhe.ngcgjeiuujjjdtgihjuecyixinxunkhj'
+        # Ambiguous on its own, but typed on the same device (Dvorak layout)
+        otp_str2 = 'jjjjjjjjnhe.jjjjjjjjjjjjjjjjjjjjjjjjjjjjjjjj'
+
+        otp1 = OTP(otp_str1, layout_cache=layout_cache)
+        otp2 = OTP(otp_str2)
+        otp3 = OTP(otp_str2, layout_cache=layout_cache)
 
-class TestYubicoVerifySingle(unittest.TestCase):
+        self.assertEqual(otp1.otp,
+                         'ccccccccljdeluiucdgffccchkugjcfditgbglbflvjc')
+        self.assertEqual(len(modhex.translate(otp_str2)), 2)
+        self.assertTrue(otp2.otp in modhex.translate(otp_str2))
+        self.assertEqual(otp3.otp,
+                         'ccccccccljdecccccccccccccccccccccccccccccccc')
+
+
+class TestYubicoVerifySingle(MockServerTestMixin, unittest.TestCase):
     def setUp(self):
         yubico.DEFAULT_TIMEOUT = 2
 
@@ -91,6 +155,331 @@ class TestYubicoVerifySingle(unittest.TestCase):
                                ca_certs_bundle_path=file_path)
         self.assertEqual(client._get_ca_bundle_path(), file_path)
 
+    def test_ca_bundle_is_resolved_once(self):
+        self._set_mock_action('no_signature_ok')
+
+        client = yubico.Yubico('1234', None, api_urls=LOCAL_SERVER)
+        calls = []
+        original = client._is_valid_ca_bundle_file
+
+        def is_valid_ca_bundle_file(file_path):
+            calls.append(file_path)
+            return original(file_path)
+
+        client._is_valid_ca_bundle_file = is_valid_ca_bundle_file
+
+        for _ in range(3):
+            self.assertTrue(client.verify('test'))
+
+        self.assertEqual(calls, [])
+
+        # Bundle is resolved again on refresh
+        client.refresh_ca_bundle()
+        if client._get_ca_bundle_path() is not None:
+            self.assertTrue(len(calls) > 0)
+
+    def test_ssl_context_is_shared_by_all_requests(self):
+        self._set_mock_action('no_signature_ok')
+
+        client = yubico.Yubico('1234', None, api_urls=LOCAL_SERVER)
+        self.assertEqual(client._ssl_context, None)
+
+        self.assertTrue(client.verify('test'))
+        ssl_context = client._ssl_context
+        self.assertTrue(isinstance(ssl_context, ssl.SSLContext))
+        self.assertEqual(ssl_context.verify_mode, ssl.CERT_REQUIRED)
+
+        session = client._get_transport().session
+        adapter = session.get_adapter(LOCAL_SERVER_HTTPS[0])
+        self.assertTrue(isinstance(adapter, SSLContextAdapter))
+        self.assertTrue(adapter.ssl_context is ssl_context)
+
+        self.assertTrue(client.verify('test'))
+        self.assertTrue(client._ssl_context is ssl_context)
+
+        # Refresh creates a new context and transport
+        transport = client._get_transport()
+        client.refresh_ca_bundle()
+        self.assertTrue(client.verify('test'))
+        self.assertFalse(client._ssl_context is ssl_context)
+        self.assertFalse(client._get_transport() is transport)
+
+    def test_ssl_context_verify_cert_disabled(self):
+        client = yubico.Yubico('1234', None, api_urls=LOCAL_SERVER,
+                               verify_cert=False)
+        # No CA bundle has been found on the system
+        client._ca_bundle_path = None
+        client._get_transport()
+
+        self.assertEqual(client._ssl_context.verify_mode, ssl.CERT_NONE)
+        self.assertFalse(client._ssl_context.check_hostname)
+
+    def test_ssl_context_verify_cert_disabled_ca_bundle_found(self):
+        # CA bundle which has been found takes precedence over verify_cert
+        client = yubico.Yubico('1234', None, api_urls=LOCAL_SERVER,
+                               verify_cert=False,
+                               ca_certs_bundle_path=CA_BUNDLE_PATH)
+        client._get_transport()
+
+        self.assertEqual(client._ssl_context.verify_mode, ssl.CERT_REQUIRED)
+        self.assertTrue(client._ssl_context.check_hostname)
+
+    def test_invalid_ca_bundle_falls_back_to_requests(self):
+        client = yubico.Yubico('1234', None, api_urls=LOCAL_SERVER,
+                               ca_certs_bundle_path=os.path.abspath(__file__))
+        session = client._get_transport().session
+        adapter = session.get_adapter(LOCAL_SERVER_HTTPS[0])
+
+        self.assertEqual(client._ssl_context, None)
+        self.assertFalse(isinstance(adapter, SSLContextAdapter))
+
+    def test_connections_are_reused_between_verifications(self):
+        self._set_mock_action('no_signature_ok')
+
+        client = yubico.Yubico('1234', None, api_urls=LOCAL_SERVER,
+                               pool_maxsize=2)
+        adapter = client._get_transport().session.get_adapter(LOCAL_SERVER[0])
+        self.assertEqual(adapter._pool_maxsize, 2)
+
+        for _ in range(3):
+            self.assertTrue(client.verify('test'))
+
+        pools = adapter.poolmanager.pools
+        self.assertEqual(len(pools), 1)
+
+        pool = pools[list(pools.keys())[0]]
+        self.assertEqual(pool.num_connections, 1)
+        self.assertEqual(pool.num_requests, 3)
+
+        client.close()
+
+    def test_verify_returns_as_soon_as_response_is_received(self):
+        self._set_mock_action('no_signature_ok')
+        self.client_no_verify_sig.verify('test')
+
+        # Previously, each verification took at least 100 ms because of the
+        # polling interval
+        start_time = time.time()
+        for _ in range(5):
+            self.assertTrue(self.client_no_verify_sig.verify('test'))
+
+        self.assertTrue((time.time() - start_time) < 0.4)
+
+    def test_worker_threads_are_reused_between_verifications(self):
+        self._set_mock_action('no_signature_ok')
+
+        thread_count = threading.active_count()
+
+        with yubico.Yubico('1234', None, api_urls=LOCAL_SERVER,
+                           max_workers=2) as client:
+            for _ in range(10):
+                self.assertTrue(client.verify('test'))
+
+            self.assertTrue(threading.active_count() <= thread_count + 2)
+
+        self.assertRaises(RuntimeError, client.verify, 'test')
+
+    def test_default_max_workers(self):
+        client = yubico.Yubico('1234', None,
+                               api_urls=(LOCAL_SERVER + LOCAL_SERVER_HTTPS),
+                               pool_maxsize=3)
+        self.assertEqual(client.max_workers, 6)
+        client.close()
+
+    def test_outstanding_requests_are_cancelled(self):
+        self._set_mock_action('no_signature_ok')
+        # Unknown action, server always returns 500
+        self._set_mock_action('server_error', port=8883)
+
+        client = yubico.Yubico('1234', None,
+                               api_urls=(LOCAL_SERVER + LOCAL_SERVER_2),
+                               max_retries=3, retry_delay=1)
+
+        start_time = time.time()
+        self.assertTrue(client.verify('test'))
+
+        # Request which is being retried should be aborted instead of
+        # sleeping between the retries
+        client._executor.shutdown(wait=True)
+        self.assertTrue((time.time() - start_time) < 0.5)
+        client.close()
+
+    def test_hedged_requests_first_server_answers(self):
+        self._set_mock_action('no_signature_ok')
+        self._set_mock_action('no_signature_ok', port=8883)
+
+        client = yubico.Yubico('1234', None,
+                               api_urls=(LOCAL_SERVER + LOCAL_SERVER_2),
+                               hedge_delay=1)
+        self.assertTrue(client.verify('test'))
+        client.close()
+
+        # Request should only be sent to the first server
+        self.assertEqual(self._get_request_count(), 1)
+        self.assertEqual(self._get_request_count(port=8883), 0)
+
+    def test_hedged_requests_first_server_is_slow(self):
+        # First server takes 1 second to respond
+        self._set_mock_action('timeout')
+        self._set_mock_action('no_signature_ok', port=8883)
+
+        client = yubico.Yubico('1234', None,
+                               api_urls=(LOCAL_SERVER + LOCAL_SERVER_2),
+                               hedge_delay=0.2)
+
+        start_time = time.time()
+        self.assertTrue(client.verify('test'))
+        self.assertTrue((time.time() - start_time) < 0.8)
+        client.close()
+
+        self.assertEqual(self._get_request_count(port=8883), 1)
+
+    def test_hedged_requests_first_server_fails(self):
+        # Unknown action, server always returns 500
+        self._set_mock_action('server_error')
+        self._set_mock_action('no_signature_ok', port=8883)
+
+        client = yubico.Yubico('1234', None,
+                               api_urls=(LOCAL_SERVER + LOCAL_SERVER_2),
+                               hedge_delay=5, max_retries=1)
+
+        start_time = time.time()
+        self.assertTrue(client.verify('test'))
+        self.assertTrue((time.time() - start_time) < 1)
+        client.close()
+
+    def test_hedged_requests_auto_delay(self):
+        client = yubico.Yubico('1234', None, hedge_delay='auto',
+                               hedge_percentile=50)
+        self.assertEqual(client._get_hedge_delay(),
+                         yubico.DEFAULT_HEDGE_DELAY)
+
+        for latency in range(1, 11):
+            client._latency.add(latency / 10.0)
+
+        self.assertEqual(client._get_hedge_delay(), 0.5)
+        client.close()
+
+    def test_invalid_hedge_delay(self):
+        expected_msg = 'hedge_delay needs to be a positive number'
+        for value in ['foo', -1]:
+            self.assertRaisesRegexp(ValueError, expected_msg,
+                                    yubico.Yubico, '1234', None,
+                                    hedge_delay=value)
+
+    def test_api_urls_are_ranked_by_latency_and_error_rate(self):
+        # First server takes 1 second to respond
+        self._set_mock_action('timeout')
+        self._set_mock_action('no_signature_ok', port=8883)
+
+        api_urls = LOCAL_SERVER + LOCAL_SERVER_2
+        client = yubico.Yubico('1234', None, api_urls=api_urls,
+                               hedge_delay=0.2, rank_api_urls=True)
+
+        self.assertTrue(client.verify('test'))
+        self.assertEqual(client._ranking.get_ranked_urls(),
+                         [LOCAL_SERVER_2[0], LOCAL_SERVER[0]])
+
+        # Faster server should receive the first request now
+        start_time = time.time()
+        self.assertTrue(client.verify('test'))
+        self.assertTrue((time.time() - start_time) < 0.2)
+        client.close()
+
+        stats = client.get_server_stats()
+        self.assertEqual([item['url'] for item in stats], list(api_urls))
+        self.assertEqual(stats[1]['request_count'], 2)
+        self.assertEqual(stats[1]['error_rate'], 0)
+
+    def test_api_urls_ranking_server_fails_fast(self):
+        self._set_mock_action('no_signature_ok', port=8883)
+
+        # Connection to the first server is refused
+        api_urls = ('http://127.0.0.1:1/wsapi/2.0/verify',) + LOCAL_SERVER_2
+        client = yubico.Yubico('1234', None, api_urls=api_urls,
+                               rank_api_urls=True, hedge_delay=0.2)
+
+        for _ in range(3):
+            self.assertTrue(client.verify('test'))
+
+        # Failing server is ranked last after the first verification
+        self.assertEqual(client._ranking.get_ranked_urls(),
+                         [LOCAL_SERVER_2[0], api_urls[0]])
+        self.assertEqual(client.get_server_stats()[0]['error_count'], 1)
+        client.close()
+
+    def test_circuit_breaker_skips_failing_server(self):
+        # Unknown action, server always returns 500
+        self._set_mock_action('server_error')
+        self._set_mock_action('no_signature_ok', port=8883)
+
+        client = yubico.Yubico('1234', None,
+                               api_urls=(LOCAL_SERVER + LOCAL_SERVER_2),
+                               hedge_delay=5, max_retries=1,
+                               circuit_breaker_threshold=2)
+
+        for _ in range(2):
+            self.assertTrue(client.verify('test'))
+
+        circuit_breakers = client.get_circuit_breakers()
+        self.assertEqual(circuit_breakers[LOCAL_SERVER[0]].state, 'open')
+        self.assertEqual(circuit_breakers[LOCAL_SERVER_2[0]].state, 'closed')
+
+        # Failing server should be skipped now
+        self._set_mock_action('server_error')
+        self.assertTrue(client.verify('test'))
+        self.assertEqual(self._get_request_count(), 0)
+        client.close()
+
+    def test_circuit_breaker_all_servers_open(self):
+        self._set_mock_action('server_error')
+
+        client = yubico.Yubico('1234', None, api_urls=LOCAL_SERVER,
+                               max_retries=1, circuit_breaker_threshold=1)
+
+        for _ in range(2):
+            self.assertRaisesRegexp(Exception, 'NO_VALID_ANSWERS',
+                                    client.verify, 'test')
+
+        self.assertEqual(self._get_request_count(), 1)
+        client.close()
+
+    def test_circuit_breaker_trial_request_in_same_batch_as_answer(self):
+        self._set_mock_action('server_error')
+        self._set_mock_action('no_signature_ok', port=8883)
+
+        client = yubico.Yubico('1234', None,
+                               api_urls=(LOCAL_SERVER + LOCAL_SERVER_2),
+                               max_retries=1, circuit_breaker_threshold=1,
+                               circuit_breaker_timeout=0)
+
+        # Circuit breaker becomes half-open right away
+        circuit_breaker = client.get_circuit_breakers()[LOCAL_SERVER[0]]
+        circuit_breaker.record_failure()
+        self.assertEqual(circuit_breaker.state, 'half-open')
+
+        original_wait = yubico.wait
+
+        def wait(futures, timeout=None, return_when=None):
+            # Both requests complete in the same batch and the answer is
+            # processed before the failed trial request
+            done, pending = original_wait(futures, timeout=timeout)
+            done = sorted(done, key=lambda future: (
+                future.result().api_url != LOCAL_SERVER_2[0]))
+            return done, pending
+
+        yubico.wait = wait
+        try:
+            self.assertTrue(client.verify('test'))
+        finally:
+            yubico.wait = original_wait
+
+        # Failed trial request has been recorded so a new trial request is
+        # allowed once the circuit breaker becomes half-open again
+        self.assertEqual(circuit_breaker.failure_count, 2)
+        self.assertTrue(circuit_breaker.allow_request())
+        client.close()
+
     def test_replayed_otp(self):
         self._set_mock_action('REPLAYED_OTP')
 
@@ -182,6 +571,65 @@ class TestYubicoVerifySingle(unittest.TestCase):
         status = self.client_no_verify_sig.verify('test')
         self.assertTrue(status)
 
+    def test_verify_many(self):
+        self._set_mock_action('no_signature_ok')
+
+        results = self.client_no_verify_sig.verify_many(['a', 'b', 'c'])
+        self.assertEqual(results, [True, True, True])
+
+        results = self.client_no_verify_sig.verify_many(
+            ['a', 'b'], return_response=True)
+        self.assertEqual(results, [{'status': 'OK'}, {'status': 'OK'}])
+
+    def test_verify_many_returns_exceptions(self):
+        self._set_mock_action('REPLAYED_OTP')
+
+        results = self.client_no_verify_sig.verify_many(['a', 'b'])
+        self.assertEqual(len(results), 2)
+
+        for result in results:
+            self.assertTrue(isinstance(result, StatusCodeError))
+            self.assertEqual(result.status_code, 'REPLAYED_OTP')
+
+    def test_verify_many_otps_are_verified_concurrently(self):
+        # Each response takes 1 second
+        self._set_mock_action('timeout')
+
+        start_time = time.time()
+        results = self.client_no_verify_sig.verify_many(['a', 'b', 'c', 'd'],
+                                                        concurrency=4,
+                                                        ordered=False)
+        results = list(results)
+        self.assertTrue((time.time() - start_time) < 2)
+
+        self.assertEqual(sorted(index for index, _ in results), [0, 1, 2, 3])
+        self.assertEqual([result for _, result in results], [True] * 4)
+
+    def test_verify_retry_after_header_is_respected(self):
+        self._set_mock_action('one_service_unavailable_retry_after')
+
+        client = yubico.Yubico('1234', None, api_urls=LOCAL_SERVER,
+                               retry_delay=0)
+
+        start_time = time.time()
+        self.assertTrue(client.verify('test'))
+        self.assertTrue((time.time() - start_time) >= 1)
+        self.assertEqual(self._get_request_count(), 2)
+        client.close()
+
+    def test_verify_retry_budget_exhausted(self):
+        # Unknown action, server always returns 500
+        self._set_mock_action('server_error')
+
+        retry_budget = RetryBudget(retry_ratio=0, min_retries_per_second=0)
+        client = yubico.Yubico('1234', None, api_urls=LOCAL_SERVER,
+                               max_retries=5, retry_budget=retry_budget)
+
+        self.assertRaisesRegexp(Exception, 'NO_VALID_ANSWERS',
+                                client.verify, 'test')
+        self.assertEqual(self._get_request_count(), 1)
+        client.close()
+
     def test_verify_multi_different_device_ids(self):
         otp_list = [
             'tlerefhcvijlngibueiiuhkeibbcbecehvjiklltnbbl',
@@ -297,13 +745,107 @@ class TestYubicoVerifySingle(unittest.TestCase):
         status = self.client_no_verify_sig.verify_multi(otp_list=otp_list)
         self.assertTrue(status)
 
-    def _set_mock_action(self, action, port=8881, signature=None):
-        path = '/set_mock_action?action=%s' % (action)
+    def test_verify_multi_otps_are_verified_in_order(self):
+        otp_list = [
+            'tlerefhcvijlngibueiiuhkeibbcbecehvjiklltnbbl',
+            'tlerefhcvijlngibueiiuhkeibbcbecehvjiklltnbbc',
+            'tlerefhcvijlngibueiiuhkeibbcbecehvjiklltnbbd'
+        ]
+        verified = []
+
+        def mock_verify(*args, **kwargs):
+            verified.append(args[0])
+            return {'timestamp': 1383997754 * 8}
+
+        self.client_no_verify_sig.verify = mock_verify
+
+        status = self.client_no_verify_sig.verify_multi(otp_list=otp_list)
+        self.assertTrue(status)
+        self.assertEqual(verified, otp_list)
+
+    def test_verify_multi_fails_fast(self):
+        otp_list = [
+            'tlerefhcvijlngibueiiuhkeibbcbecehvjiklltnbbl',
+            'tlerefhcvijlngibueiiuhkeibbcbecehvjiklltnbbc',
+        ]
+
+        def mock_verify(*args, **kwargs):
+            otp = args[0]
+
+            if otp == 'tlerefhcvijlngibueiiuhkeibbcbecehvjiklltnbbl':
+                raise StatusCodeError('REPLAYED_OTP')
+
+            time.sleep(2)
+            return {'timestamp': 1383997754 * 8}
+
+        self.client_no_verify_sig.verify = mock_verify
+
+        start_time = time.time()
+        self.assertRaises(StatusCodeError,
+                          self.client_no_verify_sig.verify_multi,
+                          otp_list=otp_list)
+        self.assertTrue((time.time() - start_time) < 1)
+
+    def test_replay_cache(self):
+        self._set_mock_action('no_signature_ok')
+        otp = 'tlerefhcvijlngibueiiuhkeibbcbecehvjiklltnbbl'
+
+        client = yubico.Yubico('1234', None, api_urls=LOCAL_SERVER,
+                               replay_cache=MemoryReplayCache())
+        self.assertTrue(client.verify(otp))
+
+        try:
+            client.verify(otp)
+        except StatusCodeError:
+            e = sys.exc_info()[1]
+            self.assertEqual(e.status_code, 'REPLAYED_OTP')
+        else:
+            self.fail('Exception was not thrown')
+
+        # Replayed OTP has been rejected without contacting the server
+        self.assertEqual(self._get_request_count(), 1)
+
+    def test_replay_cache_otp_is_discarded_on_failure(self):
+        self._set_mock_action('timeout')
+        otp = 'tlerefhcvijlngibueiiuhkeibbcbecehvjiklltnbbl'
+
+        replay_cache = MemoryReplayCache()
+        client = yubico.Yubico('1234', None, api_urls=LOCAL_SERVER,
+                               replay_cache=replay_cache)
+        self.assertRaises(Exception, client.verify, otp, timeout=0.5)
+
+        # No answer has been received so the OTP can be used again
+        self.assertFalse(otp in replay_cache)
+
+    def test_replay_cache_server_replayed_otp(self):
+        self._set_mock_action('REPLAYED_OTP')
+        otp = 'tlerefhcvijlngibueiiuhkeibbcbecehvjiklltnbbl'
+
+        replay_cache = MemoryReplayCache()
+        client = yubico.Yubico('1234', None, api_urls=LOCAL_SERVER,
+                               replay_cache=replay_cache)
+        self.assertRaises(StatusCodeError, client.verify, otp)
+        self.assertTrue(otp in replay_cache)
+
+
+class TestURLThread(MockServerTestMixin, unittest.TestCase):
+    def test_url_thread_is_deprecated(self):
+        self._set_mock_action('no_signature_ok')
+
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            thread = yubico.URLThread(url=LOCAL_SERVER[0] + '?otp=test',
+                                      timeout=2, verify_cert=True)
+
+        self.assertEqual(len(caught), 1)
+        self.assertTrue(issubclass(caught[0].category, DeprecationWarning))
 
-        if signature:
-            path += '&signature=%s' % (signature)
+        thread.start()
+        thread.join()
 
-        requests.get(url='http://127.0.0.1:%s%s' % (port, path))
+        self.assertEqual(thread.exception, None)
+        self.assertEqual(thread.request.status_code, 200)
+        self.assertTrue('status=OK' in thread.response)
 
 
 class TestAPIUrls(unittest.TestCase):
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+#
+# Name: Yubico Python Client
+# Description: Python class for verifying Yubico One Time Passwords (OTPs).
+#
+# Author: Tomaz Muraus (http://www.tomaz.me)
+# License: BSD
+#
+# Copyright (c) 2010-2019, Tomaž Muraus
+# Copyright (c) 2012, Yubico AB
+# All rights reserved.
+
+"""
+requests transport adapters.
+
+Note: This module imports requests so it should only be imported when the
+first request is sent.
+"""
+
+import ssl
+
+from requests.adapters import HTTPAdapter
+
+__all__ = [
+    'SSLContextAdapter'
+]
+
+
+class SSLContextAdapter(HTTPAdapter):
+    """
+    Adapter which uses a pre-built SSL context for all the HTTPS connections.
+
+    By default, requests passes a path to the CA bundle to urllib3 which
+    loads and parses the bundle for each new connection. This adapter uses a
+    context which already has the trust store loaded so new connections
+    don't touch the filesystem.
+    """
+
+    def __init__(self, ssl_context, **kwargs):
+        """
+        :param ssl_context: SSL context which is used for HTTPS connections.
+        :type ssl_context: :class:`ssl.SSLContext`
+        """
+        self.ssl_context = ssl_context
+        super(SSLContextAdapter, self).__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs['ssl_context'] = self.ssl_context
+        return super(SSLContextAdapter, self).init_poolmanager(*args,
+                                                               **kwargs)
+
+    def proxy_manager_for(self, *args, **kwargs):
+        kwargs['ssl_context'] = self.ssl_context
+        return super(SSLContextAdapter, self).proxy_manager_for(*args,
+                                                                **kwargs)
+
+    def cert_verify(self, conn, url, verify, cert):
+        # Trust store is already loaded in the context and the context also
+        # decides whether the certificate is verified. urllib3 refuses to
+        # disable verification for a context which checks the host name.
+        verify_mode = self.ssl_context.verify_mode
+
+        if url.lower().startswith('https') and verify_mode != ssl.CERT_NONE:
+            conn.cert_reqs = 'CERT_REQUIRED'
+        else:
+            conn.cert_reqs = 'CERT_NONE'
+
+        conn.ca_certs = None
+        conn.ca_cert_dir = None
@@ -0,0 +1,547 @@
+# -*- coding: utf-8 -*-
+#
+# Name: Yubico Python Client
+# Description: Python class for verifying Yubico One Time Passwords (OTPs).
+#
+# Author: Tomaz Muraus (http://www.tomaz.me)
+# License: BSD
+#
+# Copyright (c) 2010-2019, Tomaž Muraus
+# Copyright (c) 2012, Yubico AB
+# All rights reserved.
+
+"""
+asyncio based client which verifies OTPs without blocking the event loop.
+
+Note: This module requires Python 3.5 or higher.
+"""
+
+import ssl
+import time
+import asyncio
+import logging
+
+from urllib.parse import urlsplit
+
+from yubico_client.otp import OTP
+from yubico_client.yubico import Yubico
+from yubico_client.yubico import DEFAULT_TIMEOUT
+from yubico_client.yubico import DEFAULT_MAX_TIME_WINDOW
+from yubico_client.yubico import DEFAULT_POOL_MAXSIZE
+from yubico_client.url_request import RETRY_STATUS_CODES
+from yubico_client.url_request import USER_AGENT
+from yubico_client.retry import get_retry_delay
+from yubico_client.protocol import encode_http_request
+from yubico_client.yubico_exceptions import StatusCodeError
+
+__all__ = [
+    'AsyncYubico',
+    'AsyncConnectionPool'
+]
+
+logger = logging.getLogger('yubico.client')
+
+DEFAULT_PORTS = {
+    'http': 80,
+    'https': 443
+}
+
+
+class AsyncConnectionPool(object):
+    """
+    Minimal HTTP/1.1 client with a pool of persistent (keep-alive)
+    connections which is built on top of asyncio streams.
+    """
+
+    def __init__(self, maxsize=DEFAULT_POOL_MAXSIZE, ssl_context=None):
+        """
+        :param maxsize: Maximum number of idle connections which are kept
+                        open per host.
+        :type maxsize: ``int``
+
+        :param ssl_context: SSL context which is used for HTTPS connections.
+        :type ssl_context: :class:`ssl.SSLContext`
+        """
+        self.maxsize = maxsize
+        self.ssl_context = ssl_context
+
+        # Maps (scheme, host, port) tuple to a list of idle (reader, writer)
+        # tuples
+        self._idle = {}
+
+    async def get(self, url, headers=None):
+        """
+        Send a GET request to the provided URL.
+
+        :return: (status code, response headers, response body) tuple.
+                 Header names are lower case.
+        :rtype: ``tuple`` of (``int``, ``dict``, ``bytes``)
+        """
+        parsed = urlsplit(url)
+        key = (parsed.scheme, parsed.hostname,
+               parsed.port or DEFAULT_PORTS[parsed.scheme])
+        data = encode_http_request(url, headers)
+
+        reused, (reader, writer) = await self._acquire(key)
+
+        try:
+            response = await self._send(reader, writer, data)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            writer.close()
+
+            if not reused:
+                raise
+
+            # Server has closed an idle keep-alive connection, retry the
+            # request once using a new connection
+            reader, writer = await self._connect(key)
+
+            try:
+                response = await self._send(reader, writer, data)
+            except BaseException:
+                writer.close()
+                raise
+        except BaseException:
+            # Also covers cancellation - connection is in an unknown state so
+            # it can't be reused
+            writer.close()
+            raise
+
+        status_code, headers, body, keep_alive = response
+
+        if keep_alive:
+            self._release(key, reader, writer)
+        else:
+            writer.close()
+
+        return status_code, headers, body
+
+    def close(self):
+        """
+        Close all the idle connections.
+        """
+        for connections in self._idle.values():
+            for _, writer in connections:
+                writer.close()
+
+        self._idle = {}
+
+    async def _acquire(self, key):
+        connections = self._idle.get(key, [])
+
+        while connections:
+            reader, writer = connections.pop()
+
+            if not reader.at_eof() and not writer.is_closing():
+                return True, (reader, writer)
+
+            writer.close()
+
+        return False, await self._connect(key)
+
+    def _release(self, key, reader, writer):
+        connections = self._idle.setdefault(key, [])
+
+        if len(connections) >= self.maxsize:
+            writer.close()
+            return
+
+        connections.append((reader, writer))
+
+    async def _connect(self, key):
+        scheme, host, port = key
+        ssl_context = self.ssl_context if scheme == 'https' else None
+
+        if scheme == 'https' and ssl_context is None:
+            ssl_context = ssl.create_default_context()
+
+        return await asyncio.open_connection(host=host, port=port,
+                                             ssl=ssl_context)
+
+    async def _send(self, reader, writer, data):
+        writer.write(data)
+        await writer.drain()
+
+        status_line = await reader.readline()
+
+        if not status_line:
+            raise ConnectionError('Connection closed by the server')
+
+        version, status_code = status_line.decode('latin-1').split(' ', 2)[:2]
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+
+            if line in (b'\r\n', b'\n', b''):
+                break
+
+            name, value = line.decode('latin-1').split(':', 1)
+            headers[name.strip().lower()] = value.strip()
+
+        connection = headers.get('connection', '').lower()
+        keep_alive = version == 'HTTP/1.1' and connection != 'close'
+
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            body = await self._read_chunked(reader)
+        elif 'content-length' in headers:
+            body = await reader.readexactly(int(headers['content-length']))
+        else:
+            # Body is delimited by the server closing the connection
+            body = await reader.read()
+            keep_alive = False
+
+        return int(status_code), headers, body, keep_alive
+
+    async def _read_chunked(self, reader):
+        chunks = []
+
+        while True:
+            size_line = await reader.readline()
+            size = int(size_line.split(b';', 1)[0].strip(), 16)
+
+            if size == 0:
+                # Skip optional trailers
+                while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                    pass
+                break
+
+            chunks.append(await reader.readexactly(size))
+            await reader.readexactly(2)
+
+        return b''.join(chunks)
+
+
+class AsyncYubico(Yubico):
+    """
+    Yubico client with coroutine based verify() and verify_multi() methods.
+
+    Requests to the API URLs are sent as tasks which share a single
+    keep-alive connection pool. Hedged requests, API URL ranking and circuit
+    breakers work the same way as with :class:`yubico_client.Yubico`. As soon
+    as a definitive answer is received, the remaining tasks are cancelled.
+
+    Requests are always sent using :class:`AsyncConnectionPool`, transport
+    argument is ignored.
+    """
+
+    async def verify(self, otp, timestamp=False, sl=None, timeout=None,
+                     return_response=False):
+        """
+        Verify a provided OTP.
+
+        Arguments, return value and exceptions are the same as for
+        :meth:`yubico_client.Yubico.verify`.
+        """
+        start_time = time.time()
+        otp = OTP(otp, self.translate_otp, self.layout_cache)
+        source = 'local' if self._is_local_otp(otp) else 'remote'
+
+        try:
+            if source == 'local':
+                result = self.local_validator.verify(otp, return_response)
+            else:
+                result = await self._verify_with_replay_cache(
+                    otp, timestamp, sl, timeout, return_response)
+        except Exception as e:
+            self._record_verification(source, start_time, e)
+            raise
+
+        self._record_verification(source, start_time)
+        return result
+
+    # pylint: disable=invalid-overridden-method
+    async def _verify_with_replay_cache(self, otp, timestamp, sl, timeout,
+                                        return_response):
+        if self.replay_cache is None:
+            return await self._verify_remote(otp, timestamp, sl, timeout,
+                                             return_response)
+
+        if not self.replay_cache.add(otp.otp):
+            logger.debug('OTP %s has already been used' % (otp.otp))
+            self.metrics.increment('replay_cache_rejections')
+            raise StatusCodeError('REPLAYED_OTP')
+
+        try:
+            return await self._verify_remote(otp, timestamp, sl, timeout,
+                                             return_response)
+        except StatusCodeError:
+            raise
+        except Exception:
+            self.replay_cache.discard(otp.otp)
+            raise
+
+    # pylint: disable=invalid-overridden-method
+    async def _verify_remote(self, otp, timestamp, sl, timeout,
+                             return_response):
+        request = self._protocol.create_request(otp.otp, timestamp, sl,
+                                                timeout)
+
+        timeout = timeout or DEFAULT_TIMEOUT
+        hedge_delay = self._get_hedge_delay()
+
+        if self.rank_api_urls:
+            urls = self._ranking.get_ranked_urls()
+        else:
+            urls = list(self.api_urls)
+
+        loop = asyncio.get_event_loop()
+        pending = set()
+        api_urls = {}
+        start_times = {}
+
+        # If there's only one server to talk to, raise request exceptions.
+        # Otherwise we end up ignoring a good answer from a different
+        # server later.
+        raise_exceptions = (len(urls) == 1)
+
+        deadline = loop.time() + timeout
+        next_request_time = 0
+        timed_out = False
+
+        try:
+            while urls or pending:
+                now = loop.time()
+
+                if now >= deadline:
+                    timed_out = True
+                    break
+
+                # Send a request to the next server once the hedging delay has
+                # passed or when all the previous requests have completed
+                # without a definitive answer
+                while urls and (next_request_time <= now or not pending):
+                    url = urls.pop(0)
+
+                    if not self._allow_request(url):
+                        logger.debug('Circuit breaker for %s is open, '
+                                     'skipping it' % (url))
+                        continue
+
+                    task = asyncio.ensure_future(
+                        self._fetch(request.get_url(url), timeout,
+                                    api_url=url))
+                    api_urls[task] = url
+                    start_times[task] = time.time()
+                    pending.add(task)
+                    next_request_time = now + hedge_delay
+
+                if not pending:
+                    break
+
+                wait_time = deadline - now
+                if urls:
+                    wait_time = min(wait_time, next_request_time - now)
+
+                done, pending = await asyncio.wait(
+                    pending, timeout=wait_time,
+                    return_when=asyncio.FIRST_COMPLETED)
+
+                # Stats for all the completed requests need to be recorded
+                # before we return or raise
+                results = [(api_urls[task],) + task.result() for task in done]
+
+                for url, _, response, latency in results:
+                    self._record_request_stats(url, response, latency)
+
+                for url, exception, response, _ in results:
+                    if exception and raise_exceptions:
+                        raise exception
+
+                    if not response:
+                        continue
+
+                    status = self._protocol.verify_response(
+                        response, otp.otp, request.nonce, return_response)
+
+                    if status:
+                        if return_response:
+                            return status
+                        else:
+                            return True
+        finally:
+            for task in pending:
+                task.cancel()
+                self._record_abandoned_request(api_urls[task],
+                                               start_times[task], timed_out)
+
+            if pending:
+                await asyncio.wait(pending)
+
+        # Timeout or no valid response received
+        raise Exception('NO_VALID_ANSWERS')
+
+    async def verify_many(self, otps, concurrency=None, timestamp=False,
+                          sl=None, timeout=None, return_response=False,
+                          ordered=True):
+        """
+        Verify many independent OTPs concurrently.
+
+        Arguments are the same as for
+        :meth:`yubico_client.Yubico.verify_many`, but if ordered is False, a
+        list of (index, result) tuples in the order the verifications
+        completed is returned.
+        """
+        otps = list(otps)
+        semaphore = asyncio.Semaphore(concurrency or self.pool_maxsize)
+        results = []
+
+        async def verify(index, otp):
+            async with semaphore:
+                try:
+                    result = await self.verify(otp, timestamp, sl, timeout,
+                                               return_response)
+                except Exception as e:  # pylint: disable=broad-except
+                    result = e
+
+            results.append((index, result))
+
+        await asyncio.gather(*[verify(index, otp)
+                               for index, otp in enumerate(otps)])
+
+        if not ordered:
+            return results
+
+        return [result for _, result in sorted(results,
+                                               key=lambda item: item[0])]
+
+    async def verify_multi(self, otp_list,
+                           max_time_window=DEFAULT_MAX_TIME_WINDOW, sl=None,
+                           timeout=None):
+        """
+        Verify a provided list of OTPs.
+
+        OTPs need to be provided in the order they have been generated and
+        they are verified one after another.
+
+        :param max_time_window: Maximum number of seconds which can pass
+                                between the first and last OTP generation for
+                                the OTP to still be considered valid.
+        :type max_time_window: ``int``
+        """
+        otps = self._init_otp_list(otp_list)
+
+        # OTPs belong to the same device so a newer OTP can't be verified
+        # before the older one, see Yubico.verify_multi()
+        for otp in otps:
+            response = await self.verify(otp.otp, True, sl, timeout,
+                                         return_response=True)
+
+            if not response:
+                return False
+
+            otp.timestamp = int(response['timestamp'])
+
+        self._verify_otp_time_window(otps, max_time_window)
+        return True
+
+    # pylint: disable=invalid-overridden-method
+    async def close(self):
+        """
+        Close all the persistent connections which are held by this client.
+        """
+        if self._transport is not None:
+            self._transport.close()
+
+    def __enter__(self):
+        raise TypeError('AsyncYubico needs to be used with "async with" '
+                        'instead of "with"')
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        raise TypeError('AsyncYubico needs to be used with "async with" '
+                        'instead of "with"')
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def _fetch(self, url, timeout, api_url=None):
+        """
+        Send a request to the provided URL and retry it if the server returns
+        5xx status code.
+
+        :return: (exception, response body, latency) tuple.
+        :rtype: ``tuple``
+        """
+        logger.debug('Sending HTTP request to %s' % (url))
+        headers = {
+            'User-Agent': USER_AGENT
+        }
+
+        if self.retry_budget:
+            self.retry_budget.record_request()
+
+        metrics = self.metrics
+        tags = {'url': api_url or url}
+
+        response = None
+        latency = None
+        try:
+            for retry in range(1, self.max_retries + 1):
+                start_time = time.time()
+                metrics.increment('requests', tags=tags)
+                status_code, response_headers, body = await asyncio.wait_for(
+                    self._get_transport().get(url=url, headers=headers),
+                    timeout=timeout)
+                logger.debug('HTTP %d from %s' % (status_code, url))
+
+                if status_code in RETRY_STATUS_CODES:
+                    if not self._should_retry(retry):
+                        break
+
+                    delay = get_retry_delay(
+                        self.retry_backoff, retry,
+                        response_headers.get('retry-after'))
+
+                    if delay > timeout:
+                        break
+
+                    logger.debug('Retrying HTTP request in %.2f seconds '
+                                 '(attempt_count=%s, max_retries=%s)' %
+                                 (delay, retry, self.max_retries))
+                    metrics.increment('request_retries', tags=tags)
+                    await asyncio.sleep(delay)
+                else:
+                    # Response is parsed from the raw bytes
+                    response = body
+                    latency = time.time() - start_time
+                    metrics.observe('request_latency', latency, tags=tags)
+                    break
+        except (ssl.SSLError, ssl.CertificateError) as e:
+            logger.error('SSL error talking to %s: %s' % (url, str(e)))
+            metrics.increment('request_errors', tags=tags)
+            return e, None, None
+        except Exception as e:  # pylint: disable=broad-except
+            logger.error('Failed to retrieve response: %s' % (str(e)))
+            metrics.increment('request_errors', tags=tags)
+            return None, None, None
+
+        logger.debug('Received response from %s: %s' % (url, response))
+        return None, response, latency
+
+    def _create_executors(self):
+        # Requests are sent as tasks on the event loop so no worker threads
+        # are needed
+        return None, None
+
+    def _should_retry(self, attempt):
+        if attempt >= self.max_retries:
+            return False
+
+        if self.retry_budget and not self.retry_budget.can_retry():
+            logger.warning('Retry budget has been exhausted, not retrying '
+                           'the request')
+            return False
+
+        return True
+
+    def _init_transport(self):
+        """
+        Return an asyncio connection pool which is shared by all the requests
+        sent by this client.
+        """
+        self._ssl_context = self._create_ssl_context()
+        return AsyncConnectionPool(maxsize=self.pool_maxsize,
+                                   ssl_context=self._ssl_context)
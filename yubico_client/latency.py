@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+#
+# Name: Yubico Python Client
+# Description: Python class for verifying Yubico One Time Passwords (OTPs).
+#
+# Author: Tomaz Muraus (http://www.tomaz.me)
+# License: BSD
+#
+# Copyright (c) 2010-2019, Tomaž Muraus
+# Copyright (c) 2012, Yubico AB
+# All rights reserved.
+
+import math
+import threading
+
+from collections import deque
+
+__all__ = [
+    'LatencyWindow'
+]
+
+# Number of most recent latency samples which are kept
+DEFAULT_WINDOW_SIZE = 100
+
+
+class LatencyWindow(object):
+    """
+    Class which keeps track of the most recent request latency samples.
+    """
+
+    def __init__(self, size=DEFAULT_WINDOW_SIZE):
+        """
+        :param size: Maximum number of samples which are kept.
+        :type size: ``int``
+        """
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, latency):
+        """
+        Record a new latency sample.
+
+        :param latency: Request latency in seconds.
+        :type latency: ``float``
+        """
+        with self._lock:
+            self._samples.append(latency)
+
+    def percentile(self, percentile):
+        """
+        Return the latency at the provided percentile (nearest-rank method)
+        or None if there are no samples yet.
+
+        :param percentile: Percentile (0 - 100).
+        :type percentile: ``int`` or ``float``
+
+        :rtype: ``float``
+        """
+        with self._lock:
+            samples = sorted(self._samples)
+
+        if not samples:
+            return None
+
+        rank = int(math.ceil((percentile / 100.0) * len(samples)))
+        return samples[max(rank, 1) - 1]
+
+    def __len__(self):
+        return len(self._samples)
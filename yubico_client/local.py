@@ -0,0 +1,347 @@
+# -*- coding: utf-8 -*-
+#
+# Name: Yubico Python Client
+# Description: Python class for verifying Yubico One Time Passwords (OTPs).
+#
+# Author: Tomaz Muraus (http://www.tomaz.me)
+# License: BSD
+#
+# Copyright (c) 2010-2019, Tomaž Muraus
+# Copyright (c) 2012, Yubico AB
+# All rights reserved.
+
+"""
+Local (offline) validation of OTPs generated by Yubikeys for which the AES
+key is known.
+
+Note: This module requires the cryptography package.
+"""
+
+import hmac
+import struct
+import threading
+
+from binascii import unhexlify
+
+try:
+    from cryptography.hazmat.backends import default_backend
+    from cryptography.hazmat.primitives.ciphers import Cipher
+    from cryptography.hazmat.primitives.ciphers import algorithms
+    from cryptography.hazmat.primitives.ciphers import modes
+except ImportError:
+    Cipher = None
+
+from yubico_client.otp import OTP
+from yubico_client.py3 import b
+from yubico_client.yubico_exceptions import StatusCodeError
+
+__all__ = [
+    'LocalValidator',
+    'MemoryCounterStore',
+    'DecryptedToken',
+    'crc16'
+]
+
+# CRC16 of the decrypted token (including the CRC field) is always equal to
+# this value
+CRC_OK_RESIDUAL = 0xf0b8
+
+# Decrypted token layout: private ID, usage counter, timestamp (low 16 bits),
+# timestamp (high 8 bits), session counter, random, CRC
+TOKEN_FORMAT = '<6sHHBBHH'
+
+# Length of the AES key and private ID in bytes
+AES_KEY_LENGTH = 16
+PRIVATE_ID_LENGTH = 6
+
+# Most significant bit of the usage counter is used as a flag
+USAGE_COUNTER_MASK = 0x7fff
+
+
+def _build_crc_table():
+    table = []
+    for byte in range(256):
+        crc = byte
+        for _ in range(8):
+            if crc & 1:
+                crc = (crc >> 1) ^ 0x8408
+            else:
+                crc >>= 1
+        table.append(crc)
+
+    return table
+
+
+CRC_TABLE = _build_crc_table()
+
+
+def crc16(data):
+    """
+    Return ISO 13239 CRC16 checksum of the provided data.
+
+    :type data: ``bytes``
+    :rtype: ``int``
+    """
+    crc = 0xffff
+    for byte in bytearray(data):
+        crc = (crc >> 8) ^ CRC_TABLE[(crc ^ byte) & 0xff]
+
+    return crc
+
+
+class DecryptedToken(object):
+    """
+    Fields of a decrypted OTP.
+    """
+
+    __slots__ = ('private_id', 'usage_counter', 'timestamp',
+                 'session_counter', 'rnd')
+
+    def __init__(self, private_id, usage_counter, timestamp, session_counter,
+                 rnd):
+        self.private_id = private_id
+        self.usage_counter = usage_counter
+        self.timestamp = timestamp
+        self.session_counter = session_counter
+        self.rnd = rnd
+
+    @classmethod
+    def from_bytes(cls, data):
+        """
+        Parse a decrypted token.
+
+        :param data: Decrypted 16 bytes long token.
+        :type data: ``bytes``
+
+        :raises ValueError: If the CRC check fails.
+        """
+        if crc16(data) != CRC_OK_RESIDUAL:
+            raise ValueError('Invalid token CRC')
+
+        (private_id, usage_counter, timestamp_low, timestamp_high,
+         session_counter, rnd, _) = struct.unpack(TOKEN_FORMAT, data)
+
+        return cls(private_id=private_id,
+                   usage_counter=usage_counter & USAGE_COUNTER_MASK,
+                   timestamp=(timestamp_high << 16) | timestamp_low,
+                   session_counter=session_counter, rnd=rnd)
+
+    @property
+    def counter(self):
+        """
+        (usage counter, session counter) tuple which increases with each OTP
+        generated by the device.
+        """
+        return (self.usage_counter, self.session_counter)
+
+    def __repr__(self):
+        return ('<DecryptedToken usage_counter=%s, session_counter=%s, '
+                'timestamp=%s>' % (self.usage_counter, self.session_counter,
+                                   self.timestamp))
+
+
+class MemoryCounterStore(object):
+    """
+    Thread safe in-memory store of the last seen counter values for each
+    device.
+
+    Counters are lost when the process exits so all the OTPs which have been
+    accepted before a restart are accepted again until the device generates
+    a newer one. The API servers would reject those OTPs, but they never
+    reach them. This store should only be used in tests or when a replay
+    after a restart is acceptable.
+
+    Custom stores (e.g. backed by a database) need to implement the same
+    check_and_set() method and guarantee the check and the update are
+    performed atomically.
+    """
+
+    def __init__(self):
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def check_and_set(self, public_id, counter):
+        """
+        Store the counter for the provided device if it's greater than the
+        stored one.
+
+        :param public_id: Public ID of the device.
+        :type public_id: ``str``
+
+        :param counter: (usage counter, session counter) tuple.
+        :type counter: ``tuple``
+
+        :return: True if the counter has been stored, False if it's not
+                 greater than the stored one (OTP has been replayed).
+        :rtype: ``bool``
+        """
+        with self._lock:
+            stored = self._counters.get(public_id)
+
+            if stored is not None and counter <= stored:
+                return False
+
+            self._counters[public_id] = counter
+            return True
+
+    def get(self, public_id):
+        """
+        Return the last seen counter for the provided device or None.
+        """
+        with self._lock:
+            return self._counters.get(public_id)
+
+
+class LocalValidator(object):
+    """
+    Validates OTPs locally by decrypting them with the AES key of the device.
+
+    The OTP is valid if it decrypts to a token with a valid CRC and the
+    expected private ID, and its counter is greater than the last seen counter
+    for the device.
+    """
+
+    def __init__(self, keys, counter_store, translate_otp=True):
+        """
+        :param keys: Mapping of the device public ID (modhex) to an
+                     (AES key, private ID) tuple. Both values can either be
+                     hex encoded strings or raw bytes. Any object with a get()
+                     method can be used (e.g. a database backed mapping).
+                     Keys are cached after the first use.
+        :type keys: ``dict``
+
+        :param counter_store: Store of the last seen counter values. It needs
+                              to outlive the process, otherwise OTPs which
+                              have already been accepted are accepted again
+                              after a restart (see
+                              :class:`MemoryCounterStore`).
+        :type counter_store: :class:`MemoryCounterStore`
+
+        :param translate_otp: True if the OTP should be translated.
+        :type translate_otp: ``bool``
+        """
+        if Cipher is None:
+            raise ImportError('cryptography package is required for local '
+                              'OTP validation')
+
+        if counter_store is None:
+            raise ValueError('counter_store argument is required')
+
+        self.keys = keys
+        self.counter_store = counter_store
+        self.translate_otp = translate_otp
+
+        # Maps public ID to a (cipher, private ID) tuple
+        self._ciphers = {}
+        self._lock = threading.Lock()
+
+    def has_key(self, public_id):
+        """
+        Return True if the AES key for the provided device is known.
+        """
+        return self.keys.get(public_id) is not None
+
+    def decrypt(self, otp):
+        """
+        Decrypt the provided OTP and validate its CRC and private ID.
+
+        :param otp: OTP to decrypt.
+        :type otp: ``str`` or :class:`yubico_client.otp.OTP`
+
+        :raises StatusCodeError: With BAD_OTP status code if the OTP is not
+                                 valid.
+        :rtype: :class:`DecryptedToken`
+        """
+        if not isinstance(otp, OTP):
+            otp = OTP(otp, self.translate_otp)
+
+        try:
+            ciphertext = otp.ciphertext
+        except ValueError:
+            raise StatusCodeError('BAD_OTP')
+
+        key = self._get_cipher(otp.public_id)
+
+        if key is None:
+            raise StatusCodeError('BAD_OTP')
+
+        cipher, private_id = key
+        decryptor = cipher.decryptor()
+        data = decryptor.update(ciphertext) + decryptor.finalize()
+
+        try:
+            token = DecryptedToken.from_bytes(data)
+        except ValueError:
+            raise StatusCodeError('BAD_OTP')
+
+        if not hmac.compare_digest(token.private_id, private_id):
+            raise StatusCodeError('BAD_OTP')
+
+        return token
+
+    def verify(self, otp, return_response=False):
+        """
+        Verify the provided OTP.
+
+        :param otp: OTP to verify.
+        :type otp: ``str`` or :class:`yubico_client.otp.OTP`
+
+        :param return_response: True to return a response dictionary with the
+                                same keys as the validation server response
+                                (otp, status, timestamp, sessioncounter and
+                                sessionuse) instead of True.
+        :type return_response: ``bool``
+
+        :raises StatusCodeError: With BAD_OTP status code if the OTP is not
+                                 valid and with REPLAYED_OTP status code if
+                                 it has already been used.
+        """
+        if not isinstance(otp, OTP):
+            otp = OTP(otp, self.translate_otp)
+
+        token = self.decrypt(otp)
+
+        if not self.counter_store.check_and_set(otp.public_id,
+                                                token.counter):
+            raise StatusCodeError('REPLAYED_OTP')
+
+        if not return_response:
+            return True
+
+        return {
+            'otp': otp.otp,
+            'status': 'OK',
+            'timestamp': token.timestamp,
+            'sessioncounter': token.usage_counter,
+            'sessionuse': token.session_counter
+        }
+
+    def _get_cipher(self, public_id):
+        key = self._ciphers.get(public_id)
+
+        if key is not None:
+            return key
+
+        value = self.keys.get(public_id)
+
+        if value is None:
+            return None
+
+        aes_key = self._to_bytes(value[0], AES_KEY_LENGTH)
+        private_id = self._to_bytes(value[1], PRIVATE_ID_LENGTH)
+        cipher = Cipher(algorithms.AES(aes_key), modes.ECB(),
+                        backend=default_backend())
+        key = (cipher, private_id)
+
+        with self._lock:
+            self._ciphers[public_id] = key
+
+        return key
+
+    @staticmethod
+    def _to_bytes(value, length):
+        # Hex encoded values are twice as long as the raw ones
+        if len(value) == length * 2:
+            return unhexlify(b(value))
+
+        return value
@@ -0,0 +1,237 @@
+# -*- coding: utf-8 -*-
+#
+# Name: Yubico Python Client
+# Description: Python class for verifying Yubico One Time Passwords (OTPs).
+#
+# Author: Tomaz Muraus (http://www.tomaz.me)
+# License: BSD
+#
+# Copyright (c) 2010-2019, Tomaž Muraus
+# Copyright (c) 2012, Yubico AB
+# All rights reserved.
+
+"""
+Metrics which are reported by the client.
+
+Counters:
+
+* ``verifications`` - completed verify() calls, tagged with ``source``
+  (``local`` or ``remote``) and ``outcome`` (``OK``, status code such as
+  ``REPLAYED_OTP``, ``NO_VALID_ANSWERS`` or the exception class name).
+* ``replay_cache_rejections`` - OTPs rejected by the replay cache.
+* ``requests`` - HTTP requests sent to the API servers (including retries),
+  tagged with ``url``.
+* ``request_retries`` - retried HTTP requests, tagged with ``url``.
+* ``request_errors`` - HTTP requests which failed without a response, tagged
+  with ``url``.
+* ``requests_abandoned`` - requests which were still queued or in progress
+  when the verification completed, tagged with ``url``.
+* ``responses`` - validation server responses, tagged with ``status``
+  (``INVALID`` if the response doesn't contain a valid status).
+
+Histograms (values are in seconds):
+
+* ``verification_latency`` - verify() latency, tagged with ``source``.
+* ``request_latency`` - latency of the successful HTTP requests, tagged with
+  ``url``.
+"""
+
+import threading
+
+from yubico_client.latency import LatencyWindow
+from yubico_client.yubico_exceptions import StatusCodeError
+
+__all__ = [
+    'Metrics',
+    'InMemoryMetrics',
+    'NULL_METRICS',
+    'get_outcome'
+]
+
+# Number of most recent samples which are used to calculate the percentiles
+DEFAULT_HISTOGRAM_SIZE = 1000
+
+
+class Metrics(object):
+    """
+    Metrics collector which discards all the metrics. This is the default.
+
+    Custom collectors (e.g. forwarding the metrics to statsd or Prometheus)
+    need to override increment() and observe() methods which are called from
+    the client worker threads and need to be thread safe.
+    """
+
+    def increment(self, name, value=1, tags=None):
+        """
+        Increment a counter.
+
+        :param name: Metric name.
+        :type name: ``str``
+
+        :param value: Value to add to the counter.
+        :type value: ``int``
+
+        :param tags: Metric tags (e.g. {'url': ...}).
+        :type tags: ``dict``
+        """
+
+    def observe(self, name, value, tags=None):
+        """
+        Record a histogram sample.
+
+        :param name: Metric name.
+        :type name: ``str``
+
+        :param value: Sample value (latency in seconds).
+        :type value: ``float``
+
+        :param tags: Metric tags (e.g. {'url': ...}).
+        :type tags: ``dict``
+        """
+
+
+NULL_METRICS = Metrics()
+
+
+class InMemoryMetrics(Metrics):
+    """
+    Thread safe collector which keeps the metrics in memory.
+    """
+
+    def __init__(self, histogram_size=DEFAULT_HISTOGRAM_SIZE):
+        """
+        :param histogram_size: Number of most recent samples which are used
+                               to calculate the histogram percentiles.
+        :type histogram_size: ``int``
+        """
+        self.histogram_size = histogram_size
+
+        # Maps (name, tags) tuple to a value
+        self._counters = {}
+
+        # Maps (name, tags) tuple to a [count, sum, min, max, samples] list
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def increment(self, name, value=1, tags=None):
+        key = (name, _get_tags_key(tags))
+
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, tags=None):
+        key = (name, _get_tags_key(tags))
+
+        with self._lock:
+            histogram = self._histograms.get(key)
+
+            if histogram is None:
+                histogram = [0, 0.0, value, value,
+                             LatencyWindow(size=self.histogram_size)]
+                self._histograms[key] = histogram
+
+            histogram[0] += 1
+            histogram[1] += value
+            histogram[2] = min(histogram[2], value)
+            histogram[3] = max(histogram[3], value)
+
+        histogram[4].add(value)
+
+    def get_counter(self, name, **tags):
+        """
+        Return the sum of all the counters with the provided name which have
+        the provided tags.
+
+        :rtype: ``int``
+        """
+        total = 0
+
+        with self._lock:
+            for (counter_name, counter_tags), value in self._counters.items():
+                if counter_name == name and _matches(counter_tags, tags):
+                    total += value
+
+        return total
+
+    def get_counters(self):
+        """
+        Return all the counters.
+
+        :return: List of dictionaries with name, tags and value keys.
+        :rtype: ``list`` of ``dict``
+        """
+        with self._lock:
+            items = sorted(self._counters.items())
+
+        return [{'name': name, 'tags': dict(tags), 'value': value}
+                for (name, tags), value in items]
+
+    def get_histograms(self):
+        """
+        Return a summary of all the histograms.
+
+        :return: List of dictionaries with name, tags, count, sum, min, max,
+                 p50, p95 and p99 keys. Percentiles are based on the most
+                 recent samples.
+        :rtype: ``list`` of ``dict``
+        """
+        with self._lock:
+            items = sorted((key, list(value))
+                           for key, value in self._histograms.items())
+
+        result = []
+        for (name, tags), (count, total, minimum, maximum, window) in items:
+            result.append({
+                'name': name,
+                'tags': dict(tags),
+                'count': count,
+                'sum': total,
+                'min': minimum,
+                'max': maximum,
+                'p50': window.percentile(50),
+                'p95': window.percentile(95),
+                'p99': window.percentile(99)
+            })
+
+        return result
+
+    def reset(self):
+        """
+        Remove all the metrics.
+        """
+        with self._lock:
+            self._counters = {}
+            self._histograms = {}
+
+
+def get_outcome(exception):
+    """
+    Return the outcome tag of a verification which raised the provided
+    exception (or None if it succeeded).
+
+    :rtype: ``str``
+    """
+    if exception is None:
+        return 'OK'
+
+    if isinstance(exception, StatusCodeError):
+        return exception.status_code
+
+    if str(exception) == 'NO_VALID_ANSWERS':
+        return 'NO_VALID_ANSWERS'
+
+    return exception.__class__.__name__
+
+
+def _get_tags_key(tags):
+    if not tags:
+        return ()
+
+    return tuple(sorted(tags.items()))
+
+
+def _matches(tags_key, tags):
+    if not tags:
+        return True
+
+    return set(tags.items()).issubset(tags_key)
@@ -21,12 +21,16 @@
 # OTHER DEALINGS IN THE SOFTWARE.
 
 from __future__ import unicode_literals
-from functools import reduce  # pylint: disable=redefined-builtin
+
+import threading
+
+from collections import OrderedDict
 
 from yubico_client.py3 import PY3
 from yubico_client.py3 import u
 
-__all__ = ["HEX", "MODHEX", "translate"]
+__all__ = ["HEX", "MODHEX", "translate", "translate_many", "is_modhex",
+           "LayoutCache"]
 
 # Possible Yubikey alphabets. Generated by code at
 # http://bitbucket.org/dholth/yubikey/
@@ -122,14 +126,68 @@ xkipe,cdtsr'oèv.
 ⵛⴱⴷⴻⴼⴳⵀⵉⵊⴽⵍⵏⵔⵜⵓⵖ
 ソコシイハキクニマノリミスカナヒ""".split("\n")
 
-index = {}
-for i_, alphabet in enumerate(alphabets):
-    for letter in alphabet:
-        index.setdefault(letter, set()).update([i_])
-
 HEX = "0123456789abcdef"
 MODHEX = "cbdefghijklnrtuv"
 
+MODHEX_CHARS = frozenset(MODHEX)
+
+# Number of otps which translate_many() processes at once
+DEFAULT_CHUNK_SIZE = 4096
+
+# Maximum number of character sets for which translate_many() remembers the
+# possible alphabets
+MAX_CACHED_MASKS = 65536
+
+# Separator used to join the otps which are translated at once
+SEPARATOR = "\n"
+
+# Bitmask with the bits for all the alphabets set
+ALL_ALPHABETS = (1 << len(alphabets)) - 1
+
+# Maps each character to a bitmask of the alphabets which contain it (bit i is
+# set if alphabets[i] contains the character). Built on first use so importing
+# the module stays cheap.
+_index = None
+
+# Compiled translation tables for each of the alphabets, keyed by the target
+# alphabet
+_tables = {}
+
+
+def _get_index():
+    """Return the character index, building it on first call."""
+    global _index  # pylint: disable=global-statement
+
+    if _index is None:
+        index = {}
+        for i, alphabet in enumerate(alphabets):
+            for letter in alphabet:
+                index[letter] = index.get(letter, 0) | (1 << i)
+
+        # Only publish the fully built index, concurrent callers may build it
+        # twice but never see a partial one
+        _index = index
+
+    return _index
+
+
+def _get_tables(to):
+    """Return translation tables from each of the alphabets to the target
+    alphabet. Tables are only compiled once per target alphabet.
+    """
+    tables = _tables.get(to)
+
+    if tables is None:
+        tables = [dict(zip((ord(c) for c in a), to)) for a in alphabets]
+        _tables[to] = tables
+
+    return tables
+
+
+def is_modhex(otp):
+    """Return True if otp only contains MODHEX characters."""
+    return MODHEX_CHARS.issuperset(otp)
+
 
 def translate(otp, to=MODHEX):
     """Return set() of possible modhex interpretations of a Yubikey otp.
@@ -141,6 +199,47 @@ def translate(otp, to=MODHEX):
     otp: Yubikey output.
     to: 16-character target alphabet, default MODHEX.
     """
+    _check_input(otp, to)
+    return _translate(otp, _get_possible_alphabets(otp), to)
+
+
+def translate_many(otps, to=MODHEX, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield set() of possible modhex interpretations for each Yubikey otp
+    in otps, in the same order.
+
+    Same as calling translate() for each otp, but much faster for large
+    inputs. otps are processed in chunks of chunk_size. Within a chunk, otps
+    are grouped by the possible alphabets and each group is translated with
+    a single str.translate() call per alphabet.
+
+    otps: Iterable of Yubikey outputs.
+    to: 16-character target alphabet, default MODHEX.
+    chunk_size: Number of otps which are processed at once.
+    """
+    _check_input(MODHEX, to)
+
+    # Maps set of the characters used in an otp to the bitmask of the
+    # possible alphabets. Otps from the same device usually share it.
+    masks = {}
+
+    chunk = []
+    for otp in otps:
+        chunk.append(otp)
+
+        if len(chunk) >= chunk_size:
+            for translated in _translate_chunk(chunk, to, masks):
+                yield translated
+            chunk = []
+
+            if len(masks) > MAX_CACHED_MASKS:
+                masks.clear()
+
+    if chunk:
+        for translated in _translate_chunk(chunk, to, masks):
+            yield translated
+
+
+def _check_input(otp, to):
     if PY3:
         if isinstance(otp, bytes):
             raise ValueError("otp must be unicode")
@@ -152,12 +251,134 @@ def translate(otp, to=MODHEX):
         if not isinstance(to, u):
             raise ValueError("to must be unicode")
 
-    possible = (set(index[c]) for c in set(otp))
-    possible = reduce(lambda a, b: a.intersection(b), possible)
+    if not otp:
+        raise ValueError("otp must not be empty")
+
+
+def _translate_chunk(otps, to, masks):
+    """Return list with set() of possible interpretations for each otp."""
+    index = _get_index()
+    tables = _get_tables(to)
+
+    # Maps bitmask of the possible alphabets to the positions of the otps
+    groups = {}
+    for position, otp in enumerate(otps):
+        if not otp or not isinstance(otp, u):
+            # Raises an exception with a descriptive message
+            _check_input(otp, to)
+
+        chars = frozenset(otp)
+        possible = masks.get(chars)
+
+        if possible is None:
+            possible = ALL_ALPHABETS
+            for c in chars:
+                possible &= index[c]
+
+            masks[chars] = possible
+
+        groups.setdefault(possible, []).append(position)
+
+    results = [None] * len(otps)
+    for possible, positions in groups.items():
+        # Separator is not part of any alphabet so it's left untouched
+        joined = SEPARATOR.join([otps[position] for position in positions])
+        i = 0
+        while possible:
+            if possible & 1:
+                translated = joined.translate(tables[i]).split(SEPARATOR)
+                for position, otp in zip(positions, translated):
+                    if results[position] is None:
+                        results[position] = set([otp])
+                    else:
+                        results[position].add(otp)
+
+            possible >>= 1
+            i += 1
+
+    # Otps which don't fit any alphabet
+    return [set() if result is None else result for result in results]
+
+
+def _get_possible_alphabets(otp):
+    """Return bitmask of the alphabets which contain all the characters of
+    the otp.
+    """
+    index = _get_index()
+    possible = ALL_ALPHABETS
+    for c in set(otp):
+        possible &= index[c]
+
+    return possible
+
+
+def _translate(otp, possible, to):
+    tables = _get_tables(to)
     translated = set()
-    for i in possible:
-        a = alphabets[i]
-        translation = dict(zip((ord(c) for c in a), to))
-        translated.add(otp.translate(translation))
+    i = 0
+    while possible:
+        if possible & 1:
+            translated.add(otp.translate(tables[i]))
+
+        possible >>= 1
+        i += 1
 
     return translated
+
+
+class LayoutCache(object):
+    """Bounded LRU cache which remembers the alphabet (keyboard layout) used
+    by each Yubikey device.
+
+    Devices are identified by the public ID as typed (first 12 characters of
+    the otp, before translation). Once an alphabet has been unambiguously
+    detected for a device, subsequent otps from that device are translated
+    with a single table lookup. If an otp contains characters which are not
+    part of the remembered alphabet, full detection is used again.
+
+    maxsize: Maximum number of devices to remember.
+    """
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._alphabets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def translate(self, otp, to=MODHEX):
+        """Return set() of possible modhex interpretations of a Yubikey otp.
+
+        Same as translate(), but uses and updates the cached alphabet for the
+        device.
+        """
+        key = otp[:12]
+
+        with self._lock:
+            i = self._alphabets.pop(key, None)
+
+            if i is not None:
+                # Move to the end (most recently used)
+                self._alphabets[key] = i
+
+        if i is not None and _get_possible_alphabets(otp) & (1 << i):
+            return set([otp.translate(_get_tables(to)[i])])
+
+        translated = translate(otp, to=to)
+
+        if len(translated) == 1:
+            possible = _get_possible_alphabets(otp)
+            # Index of the lowest bit which is set
+            i = (possible & -possible).bit_length() - 1
+            self._set(key, i)
+
+        return translated
+
+    def _set(self, key, i):
+        with self._lock:
+            self._alphabets.pop(key, None)
+            self._alphabets[key] = i
+
+            while len(self._alphabets) > self.maxsize:
+                self._alphabets.popitem(last=False)
+
+    def __len__(self):
+        return len(self._alphabets)
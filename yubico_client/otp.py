@@ -10,16 +10,34 @@
 # Copyright (c) 2012, Yubico AB
 # All rights reserved.
 
+from binascii import unhexlify
+
 from yubico_client.modhex import translate
+from yubico_client.modhex import is_modhex
+from yubico_client.modhex import HEX
+from yubico_client.modhex import MODHEX
 from yubico_client.py3 import u
 
+# Length of the encrypted part of the OTP in modhex characters (16 bytes)
+CIPHERTEXT_LENGTH = 32
+
+# Translation table from MODHEX to HEX characters
+MODHEX_TO_HEX = dict(zip((ord(c) for c in MODHEX), HEX))
+
 
 class OTP(object):
     """
     Class which holds data about an OTP.
+
+    Instances use __slots__ to keep the memory usage low when holding many
+    OTPs. Decoded fields (hex and ciphertext) are computed on first access and
+    cached.
     """
 
-    def __init__(self, otp, translate_otp=True):
+    __slots__ = ('otp', 'session_counter', 'timestamp', 'session_user',
+                 '_hex', '_ciphertext')
+
+    def __init__(self, otp, translate_otp=True, layout_cache=None):
         """
         Represents an OTP token.
 
@@ -28,18 +46,78 @@ class OTP(object):
 
         :param translate_otp: True if the OTP should be translated.
         :type translate_otp: ``bool``
+
+        :param layout_cache: Optional cache of the keyboard layout used by
+                             each device which speeds up the translation.
+        :type layout_cache: :class:`yubico_client.modhex.LayoutCache`
         """
         if translate_otp:
-            self.otp = self.get_otp_modehex_interpretation(otp)
+            self.otp = self.get_otp_modehex_interpretation(
+                otp, layout_cache=layout_cache)
         else:
             self.otp = otp
 
-        self.device_id = self.otp[:12]
         self.session_counter = None
         self.timestamp = None
         self.session_user = None
 
-    def get_otp_modehex_interpretation(self, otp):
+        self._hex = None
+        self._ciphertext = None
+
+    @property
+    def device_id(self):
+        """
+        First 12 characters of the OTP which identify the device (public ID
+        of the default length).
+
+        :rtype: ``str``
+        """
+        return self.otp[:12]
+
+    @property
+    def public_id(self):
+        """
+        Public ID of the device - everything before the encrypted part of the
+        OTP. Public ID can be 0 to 16 characters long.
+
+        :rtype: ``str``
+        """
+        return self.otp[:-CIPHERTEXT_LENGTH]
+
+    @property
+    def hex(self):
+        """
+        OTP converted from modhex to hex.
+
+        :raises ValueError: If the OTP is not a valid modhex string.
+        :rtype: ``str``
+        """
+        if self._hex is None:
+            if not is_modhex(self.otp):
+                raise ValueError('OTP is not a valid modhex string')
+
+            self._hex = u(self.otp).translate(MODHEX_TO_HEX)
+
+        return self._hex
+
+    @property
+    def ciphertext(self):
+        """
+        Raw 16 bytes long encrypted part of the OTP.
+
+        :raises ValueError: If the OTP is not a valid modhex string or if it's
+                            too short.
+        :rtype: ``bytes``
+        """
+        if self._ciphertext is None:
+            if len(self.otp) < CIPHERTEXT_LENGTH:
+                raise ValueError('OTP is too short')
+
+            self._ciphertext = unhexlify(self.hex[-CIPHERTEXT_LENGTH:])
+
+        return self._ciphertext
+
+    def get_otp_modehex_interpretation(self, otp, layout_cache=None):
         """
         Return modhex interpretation of the provided OTP.
 
@@ -47,11 +125,23 @@ class OTP(object):
         because if the OTP uses all 16 characters in its alphabet there is only
         one possible interpretation of that OTP.
 
+        :param layout_cache: Optional cache of the keyboard layout used by
+                             each device.
+        :type layout_cache: :class:`yubico_client.modhex.LayoutCache`
+
         :return: Modhex interpretation of the OTP.
         :rtype: ``str``
         """
+        # MODHEX is one of the possible alphabets, so an OTP which only
+        # contains MODHEX characters always translates to itself
+        if is_modhex(otp):
+            return otp
+
         try:
-            interpretations = translate(u(otp))
+            if layout_cache is not None:
+                interpretations = layout_cache.translate(u(otp))
+            else:
+                interpretations = translate(u(otp))
         except Exception:  # pylint: disable=broad-except
             return otp
 
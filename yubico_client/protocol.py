@@ -0,0 +1,430 @@
+# -*- coding: utf-8 -*-
+#
+# Name: Yubico Python Client
+# Description: Python class for verifying Yubico One Time Passwords (OTPs).
+#
+# Author: Tomaz Muraus (http://www.tomaz.me)
+# License: BSD
+#
+# Copyright (c) 2010-2019, Tomaž Muraus
+# Copyright (c) 2012, Yubico AB
+# All rights reserved.
+
+"""
+Sans-IO implementation of the validation protocol (version 2.0).
+
+Functions and classes in this module build the requests and verify the
+responses, but they don't perform any I/O so they can be shared by the
+synchronous, threaded and asyncio clients.
+"""
+
+import os
+import re
+import hmac
+import base64
+import hashlib
+import logging
+
+from yubico_client.metrics import NULL_METRICS
+from yubico_client.py3 import b
+from yubico_client.py3 import urlencode
+from yubico_client.py3 import unquote
+from yubico_client.py3 import urlsplit
+from yubico_client.yubico_exceptions import (StatusCodeError,
+                                             InvalidClientIdError,
+                                             InvalidValidationResponse,
+                                             SignatureVerificationError)
+
+__all__ = [
+    'ValidationProtocol',
+    'ValidationRequest',
+    'Signer',
+    'ValidationResponse',
+    'parse_response',
+    'encode_parameters',
+    'encode_http_request'
+]
+
+logger = logging.getLogger('yubico.client')
+
+STATUS_RE = re.compile(r'[A-Z0-9_]+')
+
+# Valid values of the sl (sync level) parameter
+SL_VALUES = frozenset(list(range(0, 101)) + ['fast', 'secure'])
+
+
+class ValidationProtocol(object):
+    """
+    Builds verification requests and verifies the server responses for a
+    single client.
+
+    Protocol object holds no per-request state and is thread safe.
+    """
+
+    def __init__(self, client_id, key=None, metrics=None):
+        """
+        :param client_id: Client ID.
+        :type client_id: ``str``
+
+        :param key: Raw (base64 decoded) API key. If not provided, requests
+                    are not signed and response signatures are not verified.
+        :type key: ``bytes``
+
+        :param metrics: Collector which counts the response statuses.
+        :type metrics: :class:`yubico_client.metrics.Metrics`
+        """
+        self.client_id = client_id
+        self.signer = Signer(key) if key else None
+        self.metrics = metrics or NULL_METRICS
+
+    def generate_nonce(self):
+        """
+        Return a random nonce which is sent with the verification request.
+
+        :rtype: ``str``
+        """
+        return base64.b64encode(os.urandom(30), b'xz')[:25].decode('utf-8')
+
+    def encode_query_string(self, otp, nonce, timestamp=False, sl=None,
+                            timeout=None):
+        """
+        Return a (signed) query string which is sent to the validation
+        servers.
+
+        :rtype: ``str``
+        """
+        data = [('id', self.client_id),
+                ('otp', otp),
+                ('nonce', nonce)]
+
+        if timestamp:
+            data.append(('timestamp', '1'))
+
+        if sl is not None:
+            if sl not in SL_VALUES:
+                raise Exception('sl parameter value must be between 0 and '
+                                '100 or string "fast" or "secure"')
+
+            data.append(('sl', sl))
+
+        if timeout:
+            data.append(('timeout', timeout))
+
+        if self.signer:
+            return self.signer.sign_parameters(data)
+
+        return encode_parameters(data)
+
+    def create_request(self, otp, timestamp=False, sl=None, timeout=None):
+        """
+        Return a verification request for the provided OTP with a new nonce.
+
+        :param otp: OTP to verify.
+        :type otp: ``str``
+
+        :rtype: :class:`ValidationRequest`
+        """
+        nonce = self.generate_nonce()
+        query_string = self.encode_query_string(otp, nonce, timestamp, sl,
+                                                timeout)
+        return ValidationRequest(otp=otp, nonce=nonce,
+                                 query_string=query_string)
+
+    def verify_response(self, response, otp, nonce, return_response=False):
+        """
+        Verify the server response to a request with the provided OTP and
+        nonce.
+
+        :param response: Response body.
+        :type response: ``bytes`` or ``str``
+
+        :return: True (or the response parameters if return_response is True)
+                 if the OTP is valid, False if the response doesn't contain a
+                 definitive answer.
+
+        :raises SignatureVerificationError: If the response signature doesn't
+                                            match.
+        :raises InvalidValidationResponse: If the response is for a different
+                                           OTP or nonce.
+        :raises InvalidClientIdError: If the client ID doesn't exist.
+        :raises StatusCodeError: If the OTP has been replayed.
+        """
+        parsed = parse_response(response)
+        status = parsed.status
+
+        self.metrics.increment('responses',
+                               tags={'status': status or 'INVALID'})
+
+        if status is None:
+            return False
+
+        # Secret key is specified, so we verify the response message
+        # signature
+        if self.signer and not self.signer.verify(parsed.signing_string,
+                                                  parsed.signature):
+            # Signature located in the response does not match the one we
+            # have generated
+            generated_signature = self.signer.sign(parsed.signing_string)
+            logger.warning("signature mismatch for response=%r", parsed)
+            raise SignatureVerificationError(generated_signature,
+                                             parsed.signature)
+
+        param_dict = parsed.parameters
+
+        if 'otp' in param_dict and param_dict['otp'] != otp:
+            message = 'Unexpected OTP in response. Possible attack!'
+            raise InvalidValidationResponse(message, _to_text(response),
+                                            param_dict)
+
+        if 'nonce' in param_dict and param_dict['nonce'] != nonce:
+            message = 'Unexpected nonce in response. Possible attack!'
+            raise InvalidValidationResponse(message, _to_text(response),
+                                            param_dict)
+
+        if status == 'OK':
+            if return_response:  # pylint: disable=no-else-return
+                return param_dict
+            else:
+                return True
+        elif status == 'NO_SUCH_CLIENT':
+            raise InvalidClientIdError(self.client_id)
+        elif status == 'REPLAYED_OTP':
+            raise StatusCodeError(status)
+
+        return False
+
+
+class ValidationRequest(object):
+    """
+    Verification request which can be sent to any of the API URLs.
+    """
+
+    __slots__ = ('otp', 'nonce', 'query_string')
+
+    def __init__(self, otp, nonce, query_string):
+        self.otp = otp
+        self.nonce = nonce
+        self.query_string = query_string
+
+    def get_url(self, api_url):
+        """
+        Return the request URL for the provided API URL.
+
+        :rtype: ``str``
+        """
+        return api_url + '?' + self.query_string
+
+    def to_bytes(self, api_url, headers=None):
+        """
+        Return the HTTP/1.1 request for the provided API URL.
+
+        :rtype: ``bytes``
+        """
+        return encode_http_request(self.get_url(api_url), headers)
+
+    def __repr__(self):
+        return '<ValidationRequest otp=%s, nonce=%s>' % (self.otp, self.nonce)
+
+
+class Signer(object):
+    """
+    HMAC-SHA-1 signer for the protocol messages.
+
+    Key is processed once when the signer is created and the keyed HMAC state
+    is copied for each message. Signer is thread safe.
+    """
+
+    def __init__(self, key):
+        """
+        :param key: Raw (base64 decoded) API key.
+        :type key: ``bytes``
+        """
+        self._hmac = hmac.new(key, digestmod=hashlib.sha1)
+
+    def sign(self, data):
+        """
+        Return base64 encoded signature of the provided canonical message.
+
+        :param data: Canonical message - parameters sorted by name and joined
+                     with &.
+        :type data: ``bytes``
+
+        :rtype: ``str``
+        """
+        mac = self._hmac.copy()
+        mac.update(data)
+        return base64.b64encode(mac.digest()).decode('utf-8')
+
+    def sign_parameters(self, parameters):
+        """
+        Return a query string with the provided parameters and a signature
+        (h parameter) appended.
+
+        :param parameters: (name, value) tuples (values are not quoted).
+        :type parameters: ``list`` of ``tuple``
+
+        :rtype: ``str``
+        """
+        query_string = encode_parameters(parameters)
+        signature = self.sign(b(query_string))
+        return query_string + '&h=' + signature.replace('+', '%2B')
+
+    def verify(self, data, signature):
+        """
+        Return True if the signature of the provided canonical message matches
+        the provided one. Signatures are compared in constant time.
+
+        :rtype: ``bool``
+        """
+        if signature is None:
+            return False
+
+        return hmac.compare_digest(b(self.sign(data)), b(signature))
+
+
+def encode_parameters(parameters):
+    """
+    Return a canonical query string - parameters sorted by name, URL encoded
+    and joined with &.
+
+    :param parameters: (name, value) tuples (values are not quoted).
+    :type parameters: ``list`` of ``tuple``
+
+    :rtype: ``str``
+    """
+    return urlencode(sorted(parameters, key=lambda item: item[0]))
+
+
+class ValidationResponse(object):
+    """
+    Parsed validation server response.
+    """
+
+    __slots__ = ('status', 'signature', 'signing_string', 'parameters')
+
+    def __init__(self, status, signature, signing_string, parameters):
+        """
+        :param status: Value of the status parameter or None if the response
+                       doesn't contain a valid status.
+        :type status: ``str``
+
+        :param signature: Value of the h (signature) parameter.
+        :type signature: ``str``
+
+        :param signing_string: Canonical string which is signed by the server
+                               - all the parameters except h sorted by name
+                               and joined with &.
+        :type signing_string: ``bytes``
+
+        :param parameters: All the parameters except h (values are unquoted).
+        :type parameters: ``dict``
+        """
+        self.status = status
+        self.signature = signature
+        self.signing_string = signing_string
+        self.parameters = parameters
+
+    def __repr__(self):
+        return ('<ValidationResponse status=%s, parameters=%s>' %
+                (self.status, self.parameters))
+
+
+def parse_response(response):
+    """
+    Parse the validation server response in a single pass.
+
+    :param response: Response body.
+    :type response: ``bytes`` or ``str``
+
+    :raises InvalidValidationResponse: If the response contains more than one
+                                       status parameter.
+    :rtype: :class:`ValidationResponse`
+    """
+    body = b(response)
+
+    signature = None
+    pairs = []
+
+    for line in body.splitlines():
+        key, separator, value = line.strip().partition(b'=')
+
+        if not separator:
+            continue
+
+        if key == b'h':
+            if signature is None:
+                signature = value
+            continue
+
+        pairs.append((key, value))
+
+    pairs.sort()
+
+    # Values are already quoted
+    signing_string = b'&'.join([key + b'=' + value for key, value in pairs])
+
+    # Parameters are separated by new lines, but & is also accepted as a
+    # separator
+    parameters = {}
+    statuses = []
+    for item in signing_string.split(b'&'):
+        key, separator, value = item.partition(b'=')
+
+        if not separator:
+            continue
+
+        key = key.decode('utf-8')
+        value = unquote(value.decode('utf-8'))
+
+        if key == 'status':
+            statuses.append(value)
+
+        parameters[key] = value
+
+    if len(statuses) > 1:
+        message = 'More than one status= returned. Possible attack!'
+        raise InvalidValidationResponse(message, body.decode('utf-8'))
+
+    status = None
+    if statuses:
+        match = STATUS_RE.match(statuses[0])
+        status = match.group(0) if match else None
+
+    if signature is not None:
+        signature = unquote(signature.decode('utf-8'))
+
+    return ValidationResponse(status=status, signature=signature,
+                              signing_string=signing_string,
+                              parameters=parameters)
+
+
+def encode_http_request(url, headers=None):
+    """
+    Return a HTTP/1.1 GET request for the provided URL.
+
+    :param headers: Additional request headers.
+    :type headers: ``dict``
+
+    :rtype: ``bytes``
+    """
+    parsed = urlsplit(url)
+    path = parsed.path or '/'
+
+    if parsed.query:
+        path += '?' + parsed.query
+
+    lines = ['GET %s HTTP/1.1' % (path), 'Host: %s' % (parsed.netloc)]
+    for name, value in (headers or {}).items():
+        lines.append('%s: %s' % (name, value))
+
+    return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1')
+
+
+def _to_text(response):
+    """
+    Return response body as a text string.
+    """
+    if isinstance(response, bytes):
+        return response.decode('utf-8')
+
+    return response
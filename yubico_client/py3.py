@@ -47,6 +47,7 @@ if sys.version_info >= (3, 2) and sys.version_info < (3, 3):
 if PY3:
     from urllib.parse import urlencode as urlencode
     from urllib.parse import unquote as unquote
+    from urllib.parse import urlsplit as urlsplit
 
     u = str
 
@@ -60,6 +61,7 @@ if PY3:
 else:
     from urllib import urlencode as urlencode  # NOQA
     from urllib import unquote as unquote  # NOQA
+    from urlparse import urlsplit as urlsplit  # NOQA
 
     u = unicode  # NOQA: F821
     b = bytes = str
@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+#
+# Name: Yubico Python Client
+# Description: Python class for verifying Yubico One Time Passwords (OTPs).
+#
+# Author: Tomaz Muraus (http://www.tomaz.me)
+# License: BSD
+#
+# Copyright (c) 2010-2019, Tomaž Muraus
+# Copyright (c) 2012, Yubico AB
+# All rights reserved.
+
+"""
+Caches of recently verified OTPs which allow the client to reject replayed
+OTPs without contacting the API servers.
+"""
+
+import os
+import time
+import sqlite3
+import threading
+
+from collections import OrderedDict
+
+__all__ = [
+    'MemoryReplayCache',
+    'SQLiteReplayCache'
+]
+
+# How long (in seconds) an OTP is remembered
+DEFAULT_TTL = 3600
+
+# Maximum number of OTPs which are remembered by the in-memory cache
+DEFAULT_MAXSIZE = 100000
+
+# Number of seconds to wait for a lock held by a different process
+DEFAULT_SQLITE_TIMEOUT = 5
+
+# Expired OTPs are purged from the SQLite database every this many add() calls
+SQLITE_PURGE_INTERVAL = 1000
+
+
+class MemoryReplayCache(object):
+    """
+    Thread safe in-memory cache of recently verified OTPs.
+
+    Cache is bounded - when it's full, the oldest OTPs are evicted.
+    """
+
+    def __init__(self, ttl=DEFAULT_TTL, maxsize=DEFAULT_MAXSIZE):
+        """
+        :param ttl: How long (in seconds) an OTP is remembered.
+        :type ttl: ``float``
+
+        :param maxsize: Maximum number of OTPs which are remembered.
+        :type maxsize: ``int``
+        """
+        self.ttl = ttl
+        self.maxsize = maxsize
+
+        # Maps OTP to the expiration time. All the entries have the same TTL
+        # so the insertion order is also the expiration order.
+        self._otps = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, otp):
+        """
+        Add the provided OTP to the cache.
+
+        :return: True if the OTP has been added, False if it's already in the
+                 cache (OTP has been replayed).
+        :rtype: ``bool``
+        """
+        now = time.time()
+
+        with self._lock:
+            self._purge(now)
+
+            if otp in self._otps:
+                return False
+
+            self._otps[otp] = now + self.ttl
+
+            while len(self._otps) > self.maxsize:
+                self._otps.popitem(last=False)
+
+            return True
+
+    def discard(self, otp):
+        """
+        Remove the provided OTP from the cache (e.g. if it couldn't be
+        verified).
+        """
+        with self._lock:
+            self._otps.pop(otp, None)
+
+    def _purge(self, now):
+        while self._otps:
+            otp, expires_at = next(iter(self._otps.items()))
+
+            if expires_at > now:
+                break
+
+            del self._otps[otp]
+
+    def __contains__(self, otp):
+        with self._lock:
+            expires_at = self._otps.get(otp)
+            return expires_at is not None and expires_at > time.time()
+
+    def __len__(self):
+        return len(self._otps)
+
+
+class SQLiteReplayCache(object):
+    """
+    Cache of recently verified OTPs which is stored in a SQLite database and
+    can be shared by multiple processes on the same host.
+
+    Database uses write-ahead logging (WAL) so readers don't block the writer.
+    """
+
+    def __init__(self, path, ttl=DEFAULT_TTL, timeout=DEFAULT_SQLITE_TIMEOUT):
+        """
+        :param path: Path to the database file. It's created if it doesn't
+                     exist.
+        :type path: ``str``
+
+        :param ttl: How long (in seconds) an OTP is remembered.
+        :type ttl: ``float``
+
+        :param timeout: Number of seconds to wait for a lock held by a
+                        different process.
+        :type timeout: ``float``
+        """
+        self.path = path
+        self.ttl = ttl
+        self.timeout = timeout
+
+        # SQLite connections can't be shared between threads and processes
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._add_count = 0
+
+        # (pid, connection) tuples for all the connections opened by
+        # _get_connection() so close() can close the connections which are
+        # used by the other threads. Connections opened before the last
+        # close() are from an older generation and are not used anymore.
+        self._connections = []
+        self._generation = 0
+
+        connection = self._get_connection()
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('CREATE TABLE IF NOT EXISTS replay_cache '
+                           '(otp TEXT PRIMARY KEY, expires_at REAL NOT NULL)')
+        connection.execute('CREATE INDEX IF NOT EXISTS '
+                           'replay_cache_expires_at '
+                           'ON replay_cache (expires_at)')
+
+    def add(self, otp):
+        """
+        Add the provided OTP to the cache.
+
+        :return: True if the OTP has been added, False if it's already in the
+                 cache (OTP has been replayed).
+        :rtype: ``bool``
+        """
+        connection = self._get_connection()
+        now = time.time()
+
+        with self._lock:
+            self._add_count += 1
+            purge = (self._add_count % SQLITE_PURGE_INTERVAL) == 0
+
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            if purge:
+                connection.execute('DELETE FROM replay_cache '
+                                   'WHERE expires_at <= ?', (now,))
+            else:
+                connection.execute('DELETE FROM replay_cache '
+                                   'WHERE otp = ? AND expires_at <= ?',
+                                   (otp, now))
+
+            cursor = connection.execute('INSERT OR IGNORE INTO replay_cache '
+                                        '(otp, expires_at) VALUES (?, ?)',
+                                        (otp, now + self.ttl))
+            added = cursor.rowcount == 1
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+
+        connection.execute('COMMIT')
+        return added
+
+    def discard(self, otp):
+        """
+        Remove the provided OTP from the cache (e.g. if it couldn't be
+        verified).
+        """
+        self._get_connection().execute(
+            'DELETE FROM replay_cache WHERE otp = ?', (otp,))
+
+    def close(self):
+        """
+        Close all the database connections which have been opened by the
+        threads of this process.
+
+        Cache can still be used afterwards, new connections are opened on
+        demand.
+        """
+        with self._lock:
+            connections = self._connections
+            self._connections = []
+            self._generation += 1
+
+        pid = os.getpid()
+
+        for connection_pid, connection in connections:
+            # Connections inherited from the parent process are left alone
+            if connection_pid == pid:
+                connection.close()
+
+    def _get_connection(self):
+        local = self._local
+        connection = getattr(local, 'connection', None)
+
+        # Connection inherited from the parent process after fork() can't be
+        # used
+        if connection is None or local.pid != os.getpid() or \
+           local.generation != self._generation:
+            # Transactions are managed explicitly (autocommit mode). Each
+            # connection is only used by the thread which opened it, but it
+            # can be closed by a different thread.
+            connection = sqlite3.connect(self.path, timeout=self.timeout,
+                                         isolation_level=None,
+                                         check_same_thread=False)
+            connection.execute('PRAGMA synchronous=NORMAL')
+            local.connection = connection
+            local.pid = os.getpid()
+
+            with self._lock:
+                self._connections.append((local.pid, connection))
+                local.generation = self._generation
+
+        return connection
+
+    def __contains__(self, otp):
+        cursor = self._get_connection().execute(
+            'SELECT 1 FROM replay_cache WHERE otp = ? AND expires_at > ?',
+            (otp, time.time()))
+        return cursor.fetchone() is not None
+
+    def __len__(self):
+        cursor = self._get_connection().execute(
+            'SELECT COUNT(*) FROM replay_cache WHERE expires_at > ?',
+            (time.time(),))
+        return cursor.fetchone()[0]
@@ -0,0 +1,223 @@
+# -*- coding: utf-8 -*-
+#
+# Name: Yubico Python Client
+# Description: Python class for verifying Yubico One Time Passwords (OTPs).
+#
+# Author: Tomaz Muraus (http://www.tomaz.me)
+# License: BSD
+#
+# Copyright (c) 2010-2019, Tomaž Muraus
+# Copyright (c) 2012, Yubico AB
+# All rights reserved.
+
+import time
+import random
+import threading
+
+__all__ = [
+    'ConstantBackoff',
+    'ExponentialBackoff',
+    'RetryBudget',
+    'parse_retry_after',
+    'get_retry_delay',
+    'DEFAULT_RETRY_BUDGET'
+]
+
+# Ratio of retries to requests which is allowed by the retry budget
+DEFAULT_RETRY_RATIO = 0.2
+
+# Number of retries per second which are always allowed by the retry budget,
+# regardless of the number of requests
+DEFAULT_MIN_RETRIES_PER_SECOND = 10
+
+
+class ConstantBackoff(object):
+    """
+    Wait the same amount of time before each retry attempt.
+    """
+
+    def __init__(self, delay):
+        """
+        :param delay: Delay in seconds.
+        :type delay: ``float``
+        """
+        self.delay = delay
+
+    def get_delay(self, attempt):
+        """
+        Return number of seconds to wait before the provided retry attempt.
+
+        :param attempt: Retry attempt number (starting with 1).
+        :type attempt: ``int``
+
+        :rtype: ``float``
+        """
+        return self.delay
+
+
+class ExponentialBackoff(object):
+    """
+    Exponential backoff with "full jitter".
+
+    Delay before the n-th retry attempt is a random value between 0 and
+    min(max_delay, base_delay * 2 ** (n - 1)). Randomization prevents
+    clients from retrying in lockstep when a server is overloaded.
+    """
+
+    def __init__(self, base_delay=0.1, max_delay=5, jitter=True):
+        """
+        :param base_delay: Delay before the first retry attempt in seconds.
+        :type base_delay: ``float``
+
+        :param max_delay: Maximum delay in seconds.
+        :type max_delay: ``float``
+
+        :param jitter: False to disable randomization of the delay.
+        :type jitter: ``bool``
+        """
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+
+    def get_delay(self, attempt):
+        delay = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+
+        if self.jitter:
+            delay = random.uniform(0, delay)
+
+        return delay
+
+
+class RetryBudget(object):
+    """
+    Limits the number of retries to a ratio of the total number of requests.
+
+    Each request deposits retry_ratio tokens in the budget and each retry
+    withdraws one token. Additionally, min_retries_per_second retries per
+    second are always allowed so retries still work when the request rate is
+    low.
+
+    Budget is thread safe and can be shared between multiple clients.
+    """
+
+    def __init__(self, retry_ratio=DEFAULT_RETRY_RATIO,
+                 min_retries_per_second=DEFAULT_MIN_RETRIES_PER_SECOND):
+        """
+        :param retry_ratio: Ratio of retries to requests (0 - 1).
+        :type retry_ratio: ``float``
+
+        :param min_retries_per_second: Number of retries per second which are
+                                       always allowed.
+        :type min_retries_per_second: ``int``
+        """
+        self.retry_ratio = retry_ratio
+        self.min_retries_per_second = min_retries_per_second
+
+        # Tokens deposited by the requests
+        self._balance = 0.0
+        # Tokens for the minimum retry rate which are refilled over time
+        self._reserve = float(min_retries_per_second)
+        self._reserve_updated_at = time.time()
+
+        # Maximum number of tokens which can be deposited by the requests so
+        # a long quiet period doesn't allow a large burst of retries
+        self._max_balance = max(min_retries_per_second, 1) * 10
+
+        self._lock = threading.Lock()
+
+    def record_request(self):
+        """
+        Record a new request (not a retry).
+        """
+        with self._lock:
+            self._balance = min(self._balance + self.retry_ratio,
+                                self._max_balance)
+
+    def can_retry(self):
+        """
+        Return True and withdraw a token if a retry is allowed by the budget.
+
+        :rtype: ``bool``
+        """
+        with self._lock:
+            self._refill_reserve()
+
+            if self._reserve >= 1:
+                self._reserve -= 1
+                return True
+
+            if self._balance >= 1:
+                self._balance -= 1
+                return True
+
+            return False
+
+    def _refill_reserve(self):
+        now = time.time()
+        elapsed = now - self._reserve_updated_at
+        self._reserve_updated_at = now
+        refill = elapsed * self.min_retries_per_second
+        self._reserve = min(self._reserve + refill,
+                            float(self.min_retries_per_second))
+
+
+def parse_retry_after(value):
+    """
+    Parse the value of a Retry-After header and return number of seconds to
+    wait or None if the value is not valid.
+
+    :param value: Header value - number of seconds or a HTTP date.
+    :type value: ``str``
+
+    :rtype: ``float``
+    """
+    if not value:
+        return None
+
+    value = value.strip()
+
+    if value.isdigit():
+        return float(value)
+
+    # Imported on first use since it noticeably slows down the package import
+    # pylint: disable=import-outside-toplevel
+    from email.utils import parsedate_tz
+    from email.utils import mktime_tz
+
+    parsed = parsedate_tz(value)
+
+    if not parsed:
+        return None
+
+    return max(mktime_tz(parsed) - time.time(), 0)
+
+
+def get_retry_delay(backoff, attempt, retry_after=None):
+    """
+    Return number of seconds to wait before the provided retry attempt.
+
+    If the server has sent a Retry-After header which asks for a longer
+    delay than the backoff, the server provided delay is used.
+
+    :param backoff: Backoff strategy.
+    :type backoff: :class:`ConstantBackoff` or :class:`ExponentialBackoff`
+
+    :param attempt: Retry attempt number (starting with 1).
+    :type attempt: ``int``
+
+    :param retry_after: Value of the Retry-After response header.
+    :type retry_after: ``str``
+
+    :rtype: ``float``
+    """
+    delay = backoff.get_delay(attempt)
+    server_delay = parse_retry_after(retry_after)
+
+    if server_delay is not None:
+        delay = max(delay, server_delay)
+
+    return delay
+
+
+# Budget which is shared by all the clients in the process by default
+DEFAULT_RETRY_BUDGET = RetryBudget()
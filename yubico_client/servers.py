@@ -0,0 +1,290 @@
+# -*- coding: utf-8 -*-
+#
+# Name: Yubico Python Client
+# Description: Python class for verifying Yubico One Time Passwords (OTPs).
+#
+# Author: Tomaz Muraus (http://www.tomaz.me)
+# License: BSD
+#
+# Copyright (c) 2010-2019, Tomaž Muraus
+# Copyright (c) 2012, Yubico AB
+# All rights reserved.
+
+import time
+import threading
+
+__all__ = [
+    'ServerStats',
+    'ServerRanking',
+    'CircuitBreaker'
+]
+
+# Weight of the most recent sample in the exponentially weighted moving
+# averages
+DEFAULT_EWMA_ALPHA = 0.2
+
+# Number of consecutive failures after which the circuit breaker opens
+DEFAULT_FAILURE_THRESHOLD = 5
+
+# How long (in seconds) the circuit breaker stays open before trial requests
+# are allowed
+DEFAULT_RECOVERY_TIMEOUT = 30
+
+# Maximum number of concurrent trial requests in the half-open state
+DEFAULT_HALF_OPEN_MAX_REQUESTS = 1
+
+# Latency (in seconds) which is assumed for a server which has failed all the
+# requests so far so it's ranked behind the servers which have answered
+FAILED_SERVER_LATENCY = 10
+
+# How much the error rate affects the server score. With the default value, a
+# server which fails half of the requests is ranked the same as a server which
+# is twice as slow.
+ERROR_RATE_WEIGHT = 2
+
+
+class ServerStats(object):
+    """
+    Moving averages of the request latency and error rate for a single API
+    URL.
+    """
+
+    def __init__(self, url, alpha=DEFAULT_EWMA_ALPHA):
+        """
+        :param url: API URL.
+        :type url: ``str``
+
+        :param alpha: Weight of the most recent sample (0 - 1).
+        :type alpha: ``float``
+        """
+        self.url = url
+        self.alpha = alpha
+
+        # Average latency of the successful requests in seconds
+        self.latency = None
+        # Average ratio of the failed requests (0 - 1)
+        self.error_rate = 0.0
+        self.request_count = 0
+        self.error_count = 0
+
+    @property
+    def score(self):
+        """
+        Server score - lower is better.
+
+        Servers which haven't received any requests yet have a score of 0 so
+        they are tried first. Servers which have failed all the requests so
+        far are scored using FAILED_SERVER_LATENCY.
+        """
+        latency = self.latency
+
+        if latency is None:
+            if self.request_count == 0:
+                return 0
+
+            latency = FAILED_SERVER_LATENCY
+
+        return latency * (1 + ERROR_RATE_WEIGHT * self.error_rate)
+
+    def record_success(self, latency):
+        self.request_count += 1
+        self.error_rate = self._average(self.error_rate, 0.0)
+        self.record_latency(latency)
+
+    def record_latency(self, latency):
+        """
+        Record a latency sample without counting a request (e.g. for a
+        request which was aborted after a different server has answered).
+        """
+        if self.latency is None:
+            self.latency = latency
+        else:
+            self.latency = self._average(self.latency, latency)
+
+    def record_failure(self):
+        self.request_count += 1
+        self.error_count += 1
+        self.error_rate = self._average(self.error_rate, 1.0)
+
+    def to_dict(self):
+        return {
+            'url': self.url,
+            'latency': self.latency,
+            'error_rate': self.error_rate,
+            'request_count': self.request_count,
+            'error_count': self.error_count
+        }
+
+    def _average(self, average, value):
+        return (self.alpha * value) + ((1 - self.alpha) * average)
+
+    def __repr__(self):
+        return ('<ServerStats url=%s, latency=%s, error_rate=%s>' %
+                (self.url, self.latency, self.error_rate))
+
+
+class ServerRanking(object):
+    """
+    Class which keeps track of the API URL stats and orders the URLs by their
+    score.
+    """
+
+    def __init__(self, urls, alpha=DEFAULT_EWMA_ALPHA):
+        """
+        :param urls: API URLs in the preferred order. This order is used for
+                     servers with the same score.
+        :type urls: ``list`` of ``str``
+        """
+        self.urls = list(urls)
+        self._stats = dict((url, ServerStats(url=url, alpha=alpha))
+                           for url in self.urls)
+        self._lock = threading.Lock()
+
+    def record_success(self, url, latency):
+        with self._lock:
+            self._stats[url].record_success(latency)
+
+    def record_failure(self, url):
+        with self._lock:
+            self._stats[url].record_failure()
+
+    def record_latency(self, url, latency):
+        with self._lock:
+            self._stats[url].record_latency(latency)
+
+    def get_ranked_urls(self):
+        """
+        Return API URLs ordered by their score (best first).
+
+        :rtype: ``list`` of ``str``
+        """
+        with self._lock:
+            scores = dict((url, stats.score)
+                          for url, stats in self._stats.items())
+
+        # sorted() is stable so the preferred order is retained for servers
+        # with the same score
+        return sorted(self.urls, key=lambda url: scores[url])
+
+    def get_stats(self):
+        """
+        Return stats for all the API URLs.
+
+        :rtype: ``list`` of ``dict``
+        """
+        with self._lock:
+            return [self._stats[url].to_dict() for url in self.urls]
+
+
+class CircuitBreaker(object):
+    """
+    Per API URL circuit breaker.
+
+    Circuit breaker starts in the closed state where all the requests are
+    allowed. After failure_threshold consecutive failures it opens and no
+    requests are allowed for recovery_timeout seconds. After that it becomes
+    half-open and up to half_open_max_requests trial requests are allowed.
+    If a trial request succeeds, the circuit breaker closes again, otherwise
+    it opens again.
+    """
+
+    STATE_CLOSED = 'closed'
+    STATE_OPEN = 'open'
+    STATE_HALF_OPEN = 'half-open'
+
+    def __init__(self, url, failure_threshold=DEFAULT_FAILURE_THRESHOLD,
+                 recovery_timeout=DEFAULT_RECOVERY_TIMEOUT,
+                 half_open_max_requests=DEFAULT_HALF_OPEN_MAX_REQUESTS):
+        """
+        :param url: API URL.
+        :type url: ``str``
+
+        :param failure_threshold: Number of consecutive failures after which
+                                  the circuit breaker opens.
+        :type failure_threshold: ``int``
+
+        :param recovery_timeout: Number of seconds the circuit breaker stays
+                                 open.
+        :type recovery_timeout: ``float``
+
+        :param half_open_max_requests: Maximum number of concurrent trial
+                                       requests in the half-open state.
+        :type half_open_max_requests: ``int``
+        """
+        self.url = url
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_requests = half_open_max_requests
+
+        self.failure_count = 0
+        self.opened_at = None
+
+        self._state = self.STATE_CLOSED
+        self._trial_requests = 0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._get_state()
+
+    def allow_request(self):
+        """
+        Return True if a request to this URL is allowed.
+
+        In the half-open state, each allowed request is counted as a trial
+        request and needs to be followed by a call to record_success(),
+        record_failure() or record_cancelled().
+
+        :rtype: ``bool``
+        """
+        with self._lock:
+            state = self._get_state()
+
+            if state == self.STATE_CLOSED:
+                return True
+            elif state == self.STATE_OPEN:
+                return False
+
+            if self._trial_requests >= self.half_open_max_requests:
+                return False
+
+            self._trial_requests += 1
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.STATE_CLOSED
+            self._trial_requests = 0
+            self.failure_count = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failure_count += 1
+
+            if self._get_state() == self.STATE_HALF_OPEN or \
+               self.failure_count >= self.failure_threshold:
+                self._state = self.STATE_OPEN
+                self._trial_requests = 0
+                self.opened_at = time.time()
+
+    def record_cancelled(self):
+        """
+        Record a request which has been aborted before it completed.
+        """
+        with self._lock:
+            if self._get_state() == self.STATE_HALF_OPEN and \
+               self._trial_requests > 0:
+                self._trial_requests -= 1
+
+    def _get_state(self):
+        if self._state == self.STATE_OPEN and \
+           (time.time() - self.opened_at) >= self.recovery_timeout:
+            self._state = self.STATE_HALF_OPEN
+
+        return self._state
+
+    def __repr__(self):
+        return ('<CircuitBreaker url=%s, state=%s, failure_count=%s>' %
+                (self.url, self.state, self.failure_count))
@@ -0,0 +1,254 @@
+# -*- coding: utf-8 -*-
+#
+# Name: Yubico Python Client
+# Description: Python class for verifying Yubico One Time Passwords (OTPs).
+#
+# Author: Tomaz Muraus (http://www.tomaz.me)
+# License: BSD
+#
+# Copyright (c) 2010-2019, Tomaž Muraus
+# Copyright (c) 2012, Yubico AB
+# All rights reserved.
+
+"""
+TLS session resumption.
+
+New connections to an API host resume the TLS session of a previous
+connection to the same host (using a session ticket or a session ID) which
+saves a full TLS handshake.
+"""
+
+import ssl
+import threading
+
+from collections import OrderedDict
+
+__all__ = [
+    'TLSSessionCache',
+    'SessionCachingSSLContext',
+    'create_ssl_context',
+    'TLS_SESSION_RESUMPTION_SUPPORTED'
+]
+
+# ssl.SSLSession is only available in Python 3.6 and higher
+TLS_SESSION_RESUMPTION_SUPPORTED = all([hasattr(ssl, 'SSLSession'),
+                                        hasattr(ssl, 'PROTOCOL_TLS_CLIENT')])
+
+# Maximum number of hosts for which a session is cached
+DEFAULT_MAXSIZE = 100
+
+
+class TLSSessionCache(object):
+    """
+    Thread safe cache of the most recent TLS session for each host which also
+    keeps track of how many handshakes resumed a cached session.
+    """
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE):
+        """
+        :param maxsize: Maximum number of hosts for which a session is cached.
+        :type maxsize: ``int``
+        """
+        self.maxsize = maxsize
+
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+        self._handshakes = 0
+        self._resumed = 0
+
+    def get(self, key):
+        """
+        Return a cached session for the provided (host, port) tuple or None.
+        """
+        with self._lock:
+            return self._sessions.get(key)
+
+    def set(self, key, session):
+        """
+        Cache the provided session for the provided (host, port) tuple.
+        """
+        with self._lock:
+            full = len(self._sessions) >= self.maxsize
+
+            if full and key not in self._sessions:
+                self._sessions.popitem(last=False)
+
+            self._sessions[key] = session
+
+    def clear(self):
+        """
+        Remove all the cached sessions. Counters are not reset.
+        """
+        with self._lock:
+            self._sessions.clear()
+
+    def record_handshake(self, resumed):
+        """
+        Record a completed handshake.
+
+        :param resumed: True if the handshake resumed a cached session.
+        :type resumed: ``bool``
+        """
+        with self._lock:
+            self._handshakes += 1
+
+            if resumed:
+                self._resumed += 1
+
+    def get_stats(self):
+        """
+        Return number of completed handshakes, number of handshakes which
+        resumed a cached session and the resumption hit rate.
+
+        :rtype: ``dict``
+        """
+        with self._lock:
+            handshakes = self._handshakes
+            resumed = self._resumed
+
+        return {
+            'handshakes': handshakes,
+            'resumed': resumed,
+            'full_handshakes': handshakes - resumed,
+            'hit_rate': (float(resumed) / handshakes) if handshakes else 0.0
+        }
+
+    def __len__(self):
+        return len(self._sessions)
+
+
+if TLS_SESSION_RESUMPTION_SUPPORTED:
+    class SessionCachingSSLSocket(ssl.SSLSocket):
+        """
+        SSL socket which stores its session in the cache before it's closed.
+
+        With TLS 1.3, session tickets are sent by the server after the
+        handshake so the session which is available right after the handshake
+        can't be resumed yet.
+        """
+
+        session_cache = None
+        session_key = None
+
+        def close(self):
+            self._store_session()
+            super(SessionCachingSSLSocket, self).close()
+
+        def _store_session(self):
+            if self.session_cache is None or self._closed:
+                return
+
+            try:
+                session = self.session
+            except ValueError:
+                return
+
+            if _is_resumable(session):
+                self.session_cache.set(self.session_key, session)
+
+    class SessionCachingSSLContext(ssl.SSLContext):
+        """
+        Client SSL context which resumes cached TLS sessions.
+
+        All the sockets wrapped by this context share the session cache.
+        """
+
+        session_cache = None
+
+        def wrap_socket(self, sock, server_side=False,
+                        do_handshake_on_connect=True,
+                        suppress_ragged_eofs=True, server_hostname=None,
+                        session=None):
+            # pylint: disable=arguments-differ
+            cache = self.session_cache
+            key = None
+
+            if cache is not None and not server_side:
+                key = _get_session_key(sock, server_hostname)
+
+                if session is None:
+                    session = cache.get(key)
+
+            try:
+                ssl_sock = super(SessionCachingSSLContext, self).wrap_socket(
+                    sock, server_side=server_side,
+                    do_handshake_on_connect=do_handshake_on_connect,
+                    suppress_ragged_eofs=suppress_ragged_eofs,
+                    server_hostname=server_hostname, session=session)
+            except ssl.SSLError:
+                if cache is not None and session is not None:
+                    # Don't try to resume the session again
+                    cache.set(key, None)
+                raise
+
+            if key is None:
+                return ssl_sock
+
+            ssl_sock.session_cache = cache
+            ssl_sock.session_key = key
+
+            if do_handshake_on_connect:
+                cache.record_handshake(resumed=ssl_sock.session_reused)
+
+                # Sessions which use session IDs (TLS 1.2) can be resumed
+                # right away
+                ssl_sock._store_session()  # pylint: disable=protected-access
+
+            return ssl_sock
+
+    SessionCachingSSLContext.sslsocket_class = SessionCachingSSLSocket
+else:
+    SessionCachingSSLContext = None
+
+
+def create_ssl_context(cafile=None, session_cache=None):
+    """
+    Return a client SSL context with secure default settings (same as
+    :func:`ssl.create_default_context`) which resumes TLS sessions from the
+    provided cache.
+
+    If the session cache is not provided or session resumption is not
+    supported by this version of Python, a default context is returned.
+
+    :param cafile: Path to the CA bundle file.
+    :type cafile: ``str``
+
+    :param session_cache: Cache of TLS sessions.
+    :type session_cache: :class:`TLSSessionCache`
+
+    :rtype: :class:`ssl.SSLContext`
+    """
+    if session_cache is None or not TLS_SESSION_RESUMPTION_SUPPORTED:
+        return ssl.create_default_context(cafile=cafile)
+
+    # PROTOCOL_TLS_CLIENT context verifies the certificate and the host name
+    # by default, options and verification flags (e.g. VERIFY_X509_STRICT)
+    # are copied from the default context
+    default_context = ssl.create_default_context()
+
+    context = SessionCachingSSLContext(ssl.PROTOCOL_TLS_CLIENT)
+    context.options = default_context.options
+    context.verify_flags = default_context.verify_flags
+    context.session_cache = session_cache
+
+    if cafile:
+        context.load_verify_locations(cafile=cafile)
+    else:
+        context.load_default_certs(ssl.Purpose.SERVER_AUTH)
+
+    return context
+
+
+def _get_session_key(sock, server_hostname):
+    try:
+        host, port = sock.getpeername()[:2]
+    except (OSError, IOError, ValueError):
+        return (server_hostname, None)
+
+    return (server_hostname or host, port)
+
+
+def _is_resumable(session):
+    # TLS 1.3 sessions without a ticket can't be resumed
+    return session is not None and (session.has_ticket or bool(session.id))
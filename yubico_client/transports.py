@@ -0,0 +1,317 @@
+# -*- coding: utf-8 -*-
+#
+# Name: Yubico Python Client
+# Description: Python class for verifying Yubico One Time Passwords (OTPs).
+#
+# Author: Tomaz Muraus (http://www.tomaz.me)
+# License: BSD
+#
+# Copyright (c) 2010-2019, Tomaž Muraus
+# Copyright (c) 2012, Yubico AB
+# All rights reserved.
+
+"""
+HTTP transports which are used to send requests to the API servers.
+
+Transports are created by the client on first use and they import the
+underlying HTTP library at that point so importing this module is cheap.
+"""
+
+import ssl
+import socket
+import threading
+
+from yubico_client.py3 import PY3
+from yubico_client.py3 import urlsplit
+
+__all__ = [
+    'Transport',
+    'TransportResponse',
+    'RequestsTransport',
+    'HTTPClientTransport'
+]
+
+# Maximum number of persistent connections which are kept open per API host
+DEFAULT_POOL_MAXSIZE = 10
+
+DEFAULT_PORTS = {
+    'http': 80,
+    'https': 443
+}
+
+
+class TransportResponse(object):
+    """
+    HTTP response returned by a transport.
+    """
+
+    __slots__ = ('status_code', 'headers', 'content')
+
+    def __init__(self, status_code, headers, content):
+        """
+        :param status_code: HTTP status code.
+        :type status_code: ``int``
+
+        :param headers: Response headers. Lower case header names can be used
+                        for lookups.
+        :type headers: ``dict``
+
+        :param content: Raw response body.
+        :type content: ``bytes``
+        """
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+
+    def __repr__(self):
+        return '<TransportResponse status_code=%s>' % (self.status_code)
+
+
+class Transport(object):
+    """
+    Base class for the HTTP transports.
+
+    Transport is shared by all the request threads of a client so it needs to
+    be thread safe. Retries and the overall verification timeout are handled
+    by the client, transport only sends a single request.
+    """
+
+    # Exceptions which are reported as SSL errors
+    ssl_errors = (ssl.SSLError,)
+
+    def __init__(self, ssl_context=None, verify_cert=True,
+                 ca_bundle_path=None, pool_connections=1,
+                 pool_maxsize=DEFAULT_POOL_MAXSIZE):
+        """
+        :param ssl_context: SSL context which is used for HTTPS connections.
+                            If not provided (e.g. the CA bundle couldn't be
+                            loaded), the transport uses verify_cert and
+                            ca_bundle_path instead.
+        :type ssl_context: :class:`ssl.SSLContext`
+
+        :param verify_cert: True to verify the server certificate.
+        :type verify_cert: ``bool``
+
+        :param ca_bundle_path: Path to the CA bundle.
+        :type ca_bundle_path: ``str``
+
+        :param pool_connections: Number of API hosts.
+        :type pool_connections: ``int``
+
+        :param pool_maxsize: Maximum number of persistent (keep-alive)
+                             connections which are kept open to each API
+                             host.
+        :type pool_maxsize: ``int``
+        """
+        self.ssl_context = ssl_context
+        self.verify_cert = verify_cert
+        self.ca_bundle_path = ca_bundle_path
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+
+    def get(self, url, headers, timeout):
+        """
+        Send a GET request to the provided URL.
+
+        :param headers: Request headers.
+        :type headers: ``dict``
+
+        :param timeout: Connect and read timeout in seconds.
+        :type timeout: ``float``
+
+        :rtype: :class:`TransportResponse`
+        """
+        raise NotImplementedError('get() method not implemented')
+
+    def close(self):
+        """
+        Close all the persistent connections.
+        """
+        raise NotImplementedError('close() method not implemented')
+
+
+class RequestsTransport(Transport):
+    """
+    Transport which uses a requests session with a pool of persistent
+    connections.
+    """
+
+    def __init__(self, *args, **kwargs):
+        # pylint: disable=import-outside-toplevel
+        import requests
+        from requests.adapters import HTTPAdapter
+        from requests.adapters import DEFAULT_POOLSIZE
+        from yubico_client.adapters import SSLContextAdapter
+
+        super(RequestsTransport, self).__init__(*args, **kwargs)
+
+        self.ssl_errors = (requests.exceptions.SSLError,)
+
+        pool_connections = max(self.pool_connections, DEFAULT_POOLSIZE)
+
+        if self.ssl_context is None:
+            adapter = HTTPAdapter(pool_connections=pool_connections,
+                                  pool_maxsize=self.pool_maxsize)
+        else:
+            adapter = SSLContextAdapter(ssl_context=self.ssl_context,
+                                        pool_connections=pool_connections,
+                                        pool_maxsize=self.pool_maxsize)
+
+        self.session = requests.Session()
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        # If the SSL context is not available, requests loads the CA bundle
+        # itself
+        if self.ssl_context is None and self.ca_bundle_path is not None:
+            self._verify = self.ca_bundle_path
+        else:
+            self._verify = self.verify_cert
+
+    def get(self, url, headers, timeout):
+        response = self.session.get(url=url, headers=headers,
+                                    timeout=timeout, verify=self._verify)
+        return TransportResponse(status_code=response.status_code,
+                                 headers=response.headers,
+                                 content=response.content)
+
+    def close(self):
+        self.session.close()
+
+
+class HTTPClientTransport(Transport):
+    """
+    Transport without external dependencies which uses the standard library
+    http.client module with a pool of persistent (keep-alive) connections.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(HTTPClientTransport, self).__init__(*args, **kwargs)
+
+        if PY3:
+            import http.client as httplib  # pylint: disable=import-error
+        else:
+            import httplib  # pylint: disable=import-error
+
+        self._httplib = httplib
+
+        # Maps (scheme, host, port) tuple to a list of idle connections
+        self._idle = {}
+        self._lock = threading.Lock()
+
+    def get(self, url, headers, timeout):
+        parsed = urlsplit(url)
+        key = (parsed.scheme, parsed.hostname,
+               parsed.port or DEFAULT_PORTS[parsed.scheme])
+        path = parsed.path or '/'
+
+        if parsed.query:
+            path += '?' + parsed.query
+
+        connection = self._acquire(key)
+        reused = connection is not None
+
+        if connection is None:
+            connection = self._connect(key, timeout)
+
+        try:
+            response, keep_alive = self._send(connection, path, headers,
+                                              timeout)
+        except socket.timeout:
+            connection.close()
+            raise
+        except (socket.error, self._httplib.HTTPException):
+            connection.close()
+
+            if not reused:
+                raise
+
+            # Server has closed an idle keep-alive connection, retry the
+            # request once using a new connection
+            connection = self._connect(key, timeout)
+
+            try:
+                response, keep_alive = self._send(connection, path, headers,
+                                                  timeout)
+            except BaseException:
+                connection.close()
+                raise
+        except BaseException:
+            connection.close()
+            raise
+
+        if keep_alive:
+            self._release(key, connection)
+        else:
+            connection.close()
+
+        return response
+
+    def close(self):
+        with self._lock:
+            idle = self._idle
+            self._idle = {}
+
+        for connections in idle.values():
+            for connection in connections:
+                connection.close()
+
+    def _acquire(self, key):
+        with self._lock:
+            connections = self._idle.get(key)
+
+            if connections:
+                return connections.pop()
+
+        return None
+
+    def _release(self, key, connection):
+        with self._lock:
+            connections = self._idle.setdefault(key, [])
+
+            if len(connections) < self.pool_maxsize:
+                connections.append(connection)
+                return
+
+        connection.close()
+
+    def _connect(self, key, timeout):
+        scheme, host, port = key
+
+        if scheme == 'http':
+            return self._httplib.HTTPConnection(host, port, timeout=timeout)
+
+        return self._httplib.HTTPSConnection(host, port, timeout=timeout,
+                                             context=self._get_ssl_context())
+
+    def _get_ssl_context(self):
+        if self.ssl_context is not None:
+            return self.ssl_context
+
+        # Raises an SSL error if the CA bundle can't be loaded
+        context = ssl.create_default_context(cafile=self.ca_bundle_path)
+
+        if not self.verify_cert and self.ca_bundle_path is None:
+            context.check_hostname = False
+            context.verify_mode = ssl.CERT_NONE
+
+        return context
+
+    @staticmethod
+    def _send(connection, path, headers, timeout):
+        connection.timeout = timeout
+
+        if connection.sock is not None:
+            connection.sock.settimeout(timeout)
+
+        connection.request('GET', path, headers=headers)
+        response = connection.getresponse()
+
+        # Body needs to be read before the connection can be reused
+        content = response.read()
+        headers = dict((name.lower(), value)
+                       for name, value in response.getheaders())
+
+        return (TransportResponse(status_code=response.status,
+                                  headers=headers, content=content),
+                not response.will_close)
@@ -0,0 +1,286 @@
+# -*- coding: utf-8 -*-
+#
+# Name: Yubico Python Client
+# Description: Python class for verifying Yubico One Time Passwords (OTPs).
+#
+# Author: Tomaz Muraus (http://www.tomaz.me)
+# License: BSD
+#
+# Copyright (c) 2010-2019, Tomaž Muraus
+# Copyright (c) 2012, Yubico AB
+# All rights reserved.
+
+"""
+Requests to a single API URL and the bookkeeping of their outcome.
+"""
+
+import sys
+import time
+import threading
+import logging
+import warnings
+
+from yubico_client import __version__
+from yubico_client.metrics import NULL_METRICS
+from yubico_client.retry import ConstantBackoff
+from yubico_client.retry import get_retry_delay
+from yubico_client.transports import RequestsTransport
+
+__all__ = [
+    'URLRequest',
+    'URLThread',
+    'RequestStatsMixin'
+]
+
+logger = logging.getLogger('yubico.client')
+
+CLIENT_VERSION = '.'.join([str(part) for part in __version__])
+PYTHON_VERSION = '%s.%s.%s' % (sys.version_info[0], sys.version_info[1],
+                               sys.version_info[2])
+USER_AGENT = ('yubico-python-client/%s (Python v%s)' %
+              (CLIENT_VERSION, PYTHON_VERSION))
+
+# Status codes for which the request is retried
+RETRY_STATUS_CODES = (500, 502, 503, 504)
+
+
+class RequestStatsMixin(object):
+    """
+    Records the outcome of the requests to the API URLs in the server ranking,
+    circuit breakers and hedging latency window of a client.
+    """
+
+    def _allow_request(self, url):
+        circuit_breaker = self._circuit_breakers.get(url)
+        return circuit_breaker is None or circuit_breaker.allow_request()
+
+    def _record_request_stats(self, api_url, response, latency,
+                              cancelled=False):
+        """
+        Record the outcome of a completed request to the provided API URL.
+        """
+        circuit_breaker = self._circuit_breakers.get(api_url)
+
+        if response is not None:
+            self._latency.add(latency)
+            self._ranking.record_success(api_url, latency)
+
+            if circuit_breaker:
+                circuit_breaker.record_success()
+        elif not cancelled:
+            self._ranking.record_failure(api_url)
+
+            if circuit_breaker:
+                circuit_breaker.record_failure()
+        elif circuit_breaker:
+            circuit_breaker.record_cancelled()
+
+    def _record_abandoned_request(self, api_url, start_time, timed_out):
+        """
+        Record a request which was still in progress when the verification
+        completed.
+        """
+        self.metrics.increment('requests_abandoned', tags={'url': api_url})
+
+        # Server didn't answer in time so we use the time it has spent so far
+        # as a lower bound for its latency
+        if start_time is not None:
+            self._ranking.record_latency(api_url, time.time() - start_time)
+
+        circuit_breaker = self._circuit_breakers.get(api_url)
+        if circuit_breaker and timed_out:
+            circuit_breaker.record_failure()
+        elif circuit_breaker:
+            circuit_breaker.record_cancelled()
+
+
+class URLRequest(object):
+    """
+    Request to a single API URL which is executed by one of the client worker
+    threads.
+    """
+
+    # pylint: disable=too-many-instance-attributes
+    def __init__(self, url, timeout, verify_cert, ca_bundle_path=None,
+                 max_retries=3, retry_delay=0.5, transport=None, api_url=None,
+                 retry_backoff=None, retry_budget=None, metrics=None):
+        self.url = url
+        self.api_url = api_url or url
+        self.timeout = timeout
+        self.verify_cert = verify_cert
+        self.ca_bundle_path = ca_bundle_path
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.retry_backoff = retry_backoff or ConstantBackoff(retry_delay)
+        self.retry_budget = retry_budget
+        self.transport = transport
+        self.metrics = metrics or NULL_METRICS
+
+        self.exception = None
+        self.request = None
+        self.response = None
+        self.latency = None
+        self.start_time = None
+        self.name = None
+
+        self._cancelled = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        """
+        Abort this request.
+
+        If the HTTP request is already in progress, it's allowed to finish so
+        the connection can be returned to the pool, but it won't be retried.
+        """
+        self._cancelled.set()
+
+    def run(self):
+        """
+        Send the request and return this object once the response has been
+        received or the request has failed.
+        """
+        self.name = threading.current_thread().name
+        self.start_time = time.time()
+
+        if self.cancelled:
+            logger.debug('Request to %s has been cancelled' % (self.url))
+            return self
+        logger.debug('Sending HTTP request to %s (thread=%s)' % (self.url,
+                                                                 self.name))
+        headers = {
+            'User-Agent': USER_AGENT
+        }
+
+        # Use the client connection pool if available, otherwise a new
+        # connection is established for this request
+        transport = self.transport
+
+        if transport is None:
+            if self.ca_bundle_path is not None:
+                logger.debug('Using custom CA bunde: %s' %
+                             (self.ca_bundle_path))
+
+            transport = RequestsTransport(verify_cert=self.verify_cert,
+                                          ca_bundle_path=self.ca_bundle_path)
+
+        if self.retry_budget:
+            self.retry_budget.record_request()
+
+        metrics = self.metrics
+        tags = {'url': self.api_url}
+
+        try:
+            retry = 0
+            done = False
+            while retry < self.max_retries and not done and \
+                    not self.cancelled:
+                retry += 1
+                start_time = time.time()
+                metrics.increment('requests', tags=tags)
+                self.request = transport.get(url=self.url, headers=headers,
+                                             timeout=self.timeout)
+                status_code = self.request.status_code
+                args = (status_code, self.url, self.name)
+                logger.debug('HTTP %d from %s (thread=%s)' % (args))
+                if status_code in RETRY_STATUS_CODES:
+                    if not self._should_retry(retry):
+                        break
+
+                    delay = get_retry_delay(
+                        self.retry_backoff, retry,
+                        self.request.headers.get('retry-after'))
+
+                    if delay > self.timeout:
+                        logger.debug('Server asked us to retry in %s '
+                                     'seconds, giving up' % (delay))
+                        break
+
+                    logger.debug('Retrying HTTP request in %.2f seconds '
+                                 '(attempt_count=%s, max_retries=%s)' %
+                                 (delay, retry, self.max_retries))
+                    metrics.increment('request_retries', tags=tags)
+                    # Returns early if the request is cancelled
+                    self._cancelled.wait(delay)
+                else:
+                    done = True
+                    # Response is parsed from the raw bytes
+                    self.response = self.request.content
+                    self.latency = time.time() - start_time
+                    metrics.observe('request_latency', self.latency,
+                                    tags=tags)
+        except transport.ssl_errors:
+            e = sys.exc_info()[1]
+            args = (self.url, self.name, str(e))
+            logger.error('SSL error talking to %s (thread=%s): %s' % (args))
+            metrics.increment('request_errors', tags=tags)
+            self.exception = e
+            self.response = None
+        except Exception:  # pylint: disable=broad-except
+            e = sys.exc_info()[1]
+            logger.error('Failed to retrieve response: %s' % (str(e)))
+            metrics.increment('request_errors', tags=tags)
+            self.response = None
+        finally:
+            if self.transport is None:
+                transport.close()
+
+        args = (self.url, self.name, self.response)
+        logger.debug('Received response from %s (thread=%s): %s' % (args))
+        return self
+
+    def _should_retry(self, attempt):
+        if attempt >= self.max_retries:
+            return False
+
+        if self.retry_budget and not self.retry_budget.can_retry():
+            logger.warning('Retry budget has been exhausted, not retrying '
+                           'request to %s' % (self.api_url))
+            return False
+
+        return True
+
+
+class URLThread(threading.Thread):
+    """
+    Thread which sends a single request to an API URL.
+
+    Deprecated, the client now sends requests using :class:`URLRequest`
+    objects which are executed by its worker thread pool. This class is kept
+    for backward compatibility and will be removed in a future release.
+    """
+
+    # pylint: disable=too-many-instance-attributes
+    def __init__(self, url, timeout, verify_cert, ca_bundle_path=None,
+                 max_retries=3, retry_delay=0.5):
+        warnings.warn('URLThread is deprecated, use URLRequest instead',
+                      DeprecationWarning, stacklevel=2)
+        super(URLThread, self).__init__()
+
+        self.url = url
+        self.timeout = timeout
+        self.verify_cert = verify_cert
+        self.ca_bundle_path = ca_bundle_path
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+
+        self.exception = None
+        self.request = None
+        self.response = None
+
+    def run(self):
+        request = URLRequest(url=self.url, timeout=self.timeout,
+                             verify_cert=self.verify_cert,
+                             ca_bundle_path=self.ca_bundle_path,
+                             max_retries=self.max_retries,
+                             retry_delay=self.retry_delay).run()
+
+        self.exception = request.exception
+        self.request = request.request
+
+        # Response used to be decoded by the thread
+        if request.response is not None:
+            self.response = request.response.decode('utf-8')
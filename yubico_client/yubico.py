@@ -10,26 +10,41 @@
 # Copyright (c) 2012, Yubico AB
 # All rights reserved.
 
-import re
 import os
 import sys
-import time
-import hmac
+import ssl
 import base64
-import hashlib
+import time
 import threading
 import logging
 
-import requests
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+from concurrent.futures import FIRST_COMPLETED
 
-from yubico_client import __version__
 from yubico_client.otp import OTP
-from yubico_client.yubico_exceptions import (StatusCodeError,
-                                             InvalidClientIdError,
-                                             InvalidValidationResponse,
-                                             SignatureVerificationError)
+from yubico_client.protocol import ValidationProtocol
+from yubico_client.metrics import NULL_METRICS
+from yubico_client.metrics import get_outcome
+from yubico_client.latency import LatencyWindow
+from yubico_client.servers import ServerRanking
+from yubico_client.servers import CircuitBreaker
+from yubico_client.servers import DEFAULT_RECOVERY_TIMEOUT
+from yubico_client.retry import ConstantBackoff
+from yubico_client.retry import DEFAULT_RETRY_BUDGET
+from yubico_client.tls import TLSSessionCache
+from yubico_client.tls import create_ssl_context
+from yubico_client.transports import RequestsTransport
+from yubico_client.transports import DEFAULT_POOL_MAXSIZE
+from yubico_client.url_request import URLRequest
+from yubico_client.url_request import URLThread  # NOQA
+from yubico_client.url_request import RequestStatsMixin
+from yubico_client.url_request import CLIENT_VERSION  # NOQA
+from yubico_client.url_request import PYTHON_VERSION  # NOQA
+from yubico_client.url_request import USER_AGENT  # NOQA
+from yubico_client.url_request import RETRY_STATUS_CODES  # NOQA
+from yubico_client.yubico_exceptions import StatusCodeError
 from yubico_client.py3 import b
-from yubico_client.py3 import urlencode
 from yubico_client.py3 import unquote
 
 logger = logging.getLogger('yubico.client')
@@ -61,6 +76,18 @@ DEFAULT_API_URLS = ('https://api.yubico.com/wsapi/2.0/verify',)
 # How long to wait before the time out occurs
 DEFAULT_TIMEOUT = 10
 
+# hedge_delay value which means the delay is calculated based on the observed
+# request latency
+HEDGE_DELAY_AUTO = 'auto'
+
+# Latency percentile which is used as a hedging delay with HEDGE_DELAY_AUTO
+DEFAULT_HEDGE_PERCENTILE = 95
+
+# Hedging delay (in seconds) which is used with HEDGE_DELAY_AUTO until enough
+# latency samples have been collected
+DEFAULT_HEDGE_DELAY = 0.5
+MIN_HEDGE_LATENCY_SAMPLES = 10
+
 # How many seconds can pass between the first and last OTP generation so the
 # OTP is still considered valid
 DEFAULT_MAX_TIME_WINDOW = 5
@@ -70,16 +97,20 @@ BAD_STATUS_CODES = ['BAD_OTP', 'REPLAYED_OTP', 'BAD_SIGNATURE',
                     'BACKEND_ERROR', 'NOT_ENOUGH_ANSWERS',
                     'REPLAYED_REQUEST']
 
-CLIENT_VERSION = '.'.join([str(part) for part in __version__])
-PYTHON_VERSION = '%s.%s.%s' % (sys.version_info[0], sys.version_info[1],
-                               sys.version_info[2])
-
 
-class Yubico(object):
+class Yubico(RequestStatsMixin):
     # pylint: disable=too-many-instance-attributes
     def __init__(self, client_id, key=None, verify_cert=True,
                  translate_otp=True, api_urls=DEFAULT_API_URLS,
-                 ca_certs_bundle_path=None, max_retries=3, retry_delay=0.5):
+                 ca_certs_bundle_path=None, max_retries=3, retry_delay=0.5,
+                 pool_maxsize=DEFAULT_POOL_MAXSIZE, max_workers=None,
+                 hedge_delay=None,
+                 hedge_percentile=DEFAULT_HEDGE_PERCENTILE,
+                 rank_api_urls=False, circuit_breaker_threshold=None,
+                 circuit_breaker_timeout=DEFAULT_RECOVERY_TIMEOUT,
+                 retry_backoff=None, retry_budget=DEFAULT_RETRY_BUDGET,
+                 layout_cache=None, local_validator=None, replay_cache=None,
+                 transport=None, metrics=None):
         """
         :param max_retries: Number of times to try to retry the request if
                             server returns 5xx status code.
@@ -87,6 +118,77 @@ class Yubico(object):
         :param retry_delay: How long to wait (in seconds) beteween each retry
                             attempt.
         :param retry_delay: ``float``
+        :param retry_backoff: Backoff strategy which is used to determine how
+                              long to wait before each retry attempt (e.g.
+                              :class:`yubico_client.retry.ExponentialBackoff`).
+                              Defaults to a constant retry_delay. If the
+                              server sends a longer delay in the Retry-After
+                              header, that delay is used instead.
+        :type retry_backoff: :class:`yubico_client.retry.ConstantBackoff`
+        :param retry_budget: Budget which limits the number of retries to a
+                             ratio of the total number of requests. By
+                             default, a budget which is shared by all the
+                             clients in the process is used. Pass None to
+                             disable it.
+        :type retry_budget: :class:`yubico_client.retry.RetryBudget`
+        :param layout_cache: Optional cache which remembers the keyboard
+                             layout used by each device so subsequent OTPs
+                             from the same device are translated faster.
+        :type layout_cache: :class:`yubico_client.modhex.LayoutCache`
+        :param local_validator: If specified, OTPs from the devices whose AES
+                                key is known to the validator are verified
+                                locally without contacting the API servers.
+        :type local_validator: :class:`yubico_client.local.LocalValidator`
+        :param replay_cache: If specified, OTPs which have already been sent
+                             to the API servers are rejected without
+                             contacting the servers.
+        :type replay_cache: :class:`yubico_client.replay.MemoryReplayCache`
+                            or :class:`yubico_client.replay.SQLiteReplayCache`
+        :param transport: Transport class which is used to send requests to
+                          the API servers (e.g.
+                          :class:`yubico_client.transports.HTTPClientTransport`
+                          which doesn't depend on requests). Defaults to
+                          :class:`yubico_client.transports.RequestsTransport`.
+        :type transport: ``type``
+        :param metrics: Collector which receives the verification and request
+                        metrics (e.g.
+                        :class:`yubico_client.metrics.InMemoryMetrics`). By
+                        default, metrics are discarded.
+        :type metrics: :class:`yubico_client.metrics.Metrics`
+        :param pool_maxsize: Maximum number of persistent (keep-alive)
+                             connections which are kept open to each API
+                             host.
+        :type pool_maxsize: ``int``
+        :param max_workers: Maximum number of worker threads which are used
+                            to send requests to the API servers. Defaults to
+                            number of API URLs multiplied by pool_maxsize.
+        :type max_workers: ``int``
+        :param hedge_delay: If not specified, requests are sent to all the API
+                            URLs at once. Otherwise a request is sent to the
+                            first URL and a request to the next URL is only
+                            sent if no answer has been received in
+                            hedge_delay seconds. Use HEDGE_DELAY_AUTO
+                            ("auto") to use the hedge_percentile of the
+                            observed request latency as a delay.
+        :type hedge_delay: ``float`` or ``str``
+        :param hedge_percentile: Latency percentile which is used as a delay
+                                 when hedge_delay is "auto".
+        :type hedge_percentile: ``int``
+        :param rank_api_urls: True to order API URLs by the observed latency
+                              and error rate instead of using the provided
+                              order. This way, the fastest and most reliable
+                              server receives the first request.
+        :type rank_api_urls: ``bool``
+        :param circuit_breaker_threshold: If specified, an API URL is skipped
+                                          for circuit_breaker_timeout seconds
+                                          after this many consecutive failed
+                                          requests. After that, a single
+                                          trial request is allowed which
+                                          decides if the URL is used again.
+        :type circuit_breaker_threshold: ``int``
+        :param circuit_breaker_timeout: Number of seconds a failing API URL
+                                        is skipped for.
+        :type circuit_breaker_timeout: ``float``
         """
 
         if ca_certs_bundle_path and \
@@ -94,18 +196,77 @@ class Yubico(object):
             raise ValueError('Invalid value provided for ca_certs_bundle_path'
                              ' argument')
 
+        if hedge_delay not in (None, HEDGE_DELAY_AUTO) and \
+           not (isinstance(hedge_delay, (int, float)) and hedge_delay >= 0):
+            raise ValueError('hedge_delay needs to be a positive number or '
+                             '"%s"' % (HEDGE_DELAY_AUTO))
+
         self.client_id = client_id
 
         if key is not None:
             key = base64.b64decode(key.encode('ascii'))
 
         self.key = key
+        self.metrics = metrics or NULL_METRICS
+        self._protocol = ValidationProtocol(client_id, key, self.metrics)
         self.verify_cert = verify_cert
         self.translate_otp = translate_otp
+        self.layout_cache = layout_cache
+        self.local_validator = local_validator
+        self.replay_cache = replay_cache
+        self.transport_class = transport or RequestsTransport
         self.api_urls = self._init_request_urls(api_urls=api_urls)
         self.ca_certs_bundle_path = ca_certs_bundle_path
+        # Resolved once, use refresh_ca_bundle() to resolve it again
+        self._ca_bundle_path = self._find_ca_bundle_path()
         self.max_retries = max_retries
         self.retry_delay = retry_delay
+        self.retry_backoff = retry_backoff or ConstantBackoff(retry_delay)
+        self.retry_budget = retry_budget
+        self.pool_maxsize = pool_maxsize
+        self.max_workers = max_workers or \
+            (len(self.api_urls) * self.pool_maxsize)
+        self.hedge_delay = hedge_delay
+        self.hedge_percentile = hedge_percentile
+        self.rank_api_urls = rank_api_urls
+
+        self._latency = LatencyWindow()
+        self._ranking = ServerRanking(urls=self.api_urls)
+        self._circuit_breakers = {}
+
+        if circuit_breaker_threshold:
+            for url in self.api_urls:
+                self._circuit_breakers[url] = CircuitBreaker(
+                    url=url, failure_threshold=circuit_breaker_threshold,
+                    recovery_timeout=circuit_breaker_timeout)
+
+        # Transport and SSL context are created on first use so importing and
+        # instantiating the client doesn't import the HTTP library or load
+        # the CA bundle
+        self._transport = None
+        self._ssl_context = None
+        # New connections to an API host resume the TLS session of a
+        # previous connection
+        self._tls_session_cache = TLSSessionCache()
+        self._transport_lock = threading.Lock()
+        self._executor, self._verify_executor = self._create_executors()
+
+    def close(self):
+        """
+        Stop the worker threads and close all the persistent connections which
+        are held by this client.
+        """
+        self._verify_executor.shutdown(wait=False)
+        self._executor.shutdown(wait=False)
+
+        if self._transport is not None:
+            self._transport.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
 
     def verify(self, otp, timestamp=False, sl=None, timeout=None,
                return_response=False):
@@ -133,44 +294,141 @@ class Yubico(object):
         REPLAYED_OTP status value is returned or the response message signature
         verification failed and None for the rest of the status values.
         """
-        ca_bundle_path = self._get_ca_bundle_path()
+        start_time = time.time()
+        otp = OTP(otp, self.translate_otp, self.layout_cache)
+        source = 'local' if self._is_local_otp(otp) else 'remote'
 
-        otp = OTP(otp, self.translate_otp)
-        rand_str = b(os.urandom(30))
-        nonce = base64.b64encode(rand_str, b('xz'))[:25].decode('utf-8')
-        query_string = self.generate_query_string(otp.otp, nonce, timestamp,
-                                                  sl, timeout)
+        try:
+            if source == 'local':
+                result = self.local_validator.verify(otp, return_response)
+            else:
+                result = self._verify_with_replay_cache(otp, timestamp, sl,
+                                                        timeout,
+                                                        return_response)
+        except Exception:
+            self._record_verification(source, start_time,
+                                      sys.exc_info()[1])
+            raise
+
+        self._record_verification(source, start_time)
+        return result
+
+    def _verify_with_replay_cache(self, otp, timestamp, sl, timeout,
+                                  return_response):
+        """
+        Verify the provided OTP using the API servers unless it's rejected by
+        the replay cache.
+        """
+        if self.replay_cache is None:
+            return self._verify_remote(otp, timestamp, sl, timeout,
+                                       return_response)
+
+        if not self.replay_cache.add(otp.otp):
+            logger.debug('OTP %s has already been used' % (otp.otp))
+            self.metrics.increment('replay_cache_rejections')
+            raise StatusCodeError('REPLAYED_OTP')
+
+        try:
+            return self._verify_remote(otp, timestamp, sl, timeout,
+                                       return_response)
+        except StatusCodeError:
+            # Server has seen the OTP
+            raise
+        except Exception:
+            # No definitive answer has been received so the OTP can be used
+            # again
+            self.replay_cache.discard(otp.otp)
+            raise
+
+    def _verify_remote(self, otp, timestamp, sl, timeout, return_response):
+        """
+        Verify the provided OTP using the API servers.
+        """
+        transport = self._get_transport()
+
+        validation_request = self._protocol.create_request(otp.otp,
+                                                           timestamp, sl,
+                                                           timeout)
 
-        threads = []
         timeout = timeout or DEFAULT_TIMEOUT
-        for url in self.api_urls:
-            thread = URLThread(url='%s?%s' % (url, query_string),
-                               timeout=timeout,
-                               verify_cert=self.verify_cert,
-                               ca_bundle_path=ca_bundle_path,
-                               max_retries=self.max_retries,
-                               retry_delay=self.retry_delay)
-            thread.start()
-            threads.append(thread)
+        hedge_delay = self._get_hedge_delay()
 
-        # Wait for a first positive or negative response
-        start_time = time.time()
+        if self.rank_api_urls:
+            urls = self._ranking.get_ranked_urls()
+        else:
+            urls = list(self.api_urls)
+        requests_map = {}
+        pending = set()
 
-        # If there's only one server to talk to, raise thread exceptions.
+        # If there's only one server to talk to, raise request exceptions.
         # Otherwise we end up ignoring a good answer from a different
         # server later.
-        raise_exceptions = (len(threads) == 1)
-
-        # pylint: disable=too-many-nested-blocks
-        while threads and (start_time + timeout) > time.time():
-            for thread in threads:
-                if not thread.is_alive():
-                    if thread.exception and raise_exceptions:
-                        raise thread.exception
-                    elif thread.response:
-                        status = self.verify_response(thread.response,
-                                                      otp.otp, nonce,
-                                                      return_response)
+        raise_exceptions = (len(urls) == 1)
+
+        deadline = time.time() + timeout
+        next_request_time = 0
+        timed_out = False
+
+        # Wait for a first positive or negative response
+        try:
+            while urls or pending:
+                now = time.time()
+
+                if now >= deadline:
+                    timed_out = True
+                    break
+
+                # Send a request to the next server once the hedging delay has
+                # passed or when all the previous requests have completed
+                # without a definitive answer
+                while urls and (next_request_time <= now or not pending):
+                    url = urls.pop(0)
+
+                    if not self._allow_request(url):
+                        logger.debug('Circuit breaker for %s is open, '
+                                     'skipping it' % (url))
+                        continue
+
+                    request = URLRequest(url=validation_request.get_url(url),
+                                         api_url=url,
+                                         timeout=timeout,
+                                         verify_cert=self.verify_cert,
+                                         max_retries=self.max_retries,
+                                         retry_delay=self.retry_delay,
+                                         transport=transport,
+                                         metrics=self.metrics,
+                                         retry_backoff=self.retry_backoff,
+                                         retry_budget=self.retry_budget)
+                    future = self._executor.submit(request.run)
+                    requests_map[future] = request
+                    pending.add(future)
+                    next_request_time = now + hedge_delay
+
+                wait_time = deadline - now
+                if urls:
+                    wait_time = min(wait_time, next_request_time - now)
+
+                done, pending = wait(pending, timeout=wait_time,
+                                     return_when=FIRST_COMPLETED)
+
+                # Stats for all the completed requests need to be recorded
+                # before we return or raise, otherwise a half-open circuit
+                # breaker would wait for the trial request forever
+                done_requests = [future.result() for future in done]
+
+                for request in done_requests:
+                    self._record_request_stats(request.api_url,
+                                               request.response,
+                                               request.latency,
+                                               request.cancelled)
+
+                for request in done_requests:
+                    if request.exception and raise_exceptions:
+                        raise request.exception
+                    elif request.response:
+                        status = self._protocol.verify_response(
+                            request.response, otp.otp,
+                            validation_request.nonce, return_response)
 
                         if status:
                             # pylint: disable=no-else-return
@@ -178,43 +436,86 @@ class Yubico(object):
                                 return status
                             else:
                                 return True
-                    threads.remove(thread)
-            time.sleep(0.1)
+        finally:
+            # Outcome has been decided, abort all the outstanding requests
+            for future, request in requests_map.items():
+                future.cancel()
+                request.cancel()
+
+                if future in pending:
+                    self._record_abandoned_request(request.api_url,
+                                                   request.start_time,
+                                                   timed_out)
 
         # Timeout or no valid response received
         raise Exception('NO_VALID_ANSWERS')
 
+    def verify_many(self, otps, concurrency=None, timestamp=False, sl=None,
+                    timeout=None, return_response=False, ordered=True):
+        """
+        Verify many independent OTPs (e.g. OTPs which belong to different
+        users) concurrently.
+
+        :param otps: OTPs to verify.
+        :type otps: iterable of ``str``
+
+        :param concurrency: Maximum number of OTPs which are verified at the
+                            same time. Defaults to pool_maxsize.
+        :type concurrency: ``int``
+
+        :param ordered: True to return results in the same order as the
+                        input OTPs, False to return results as soon as each
+                        verification completes.
+        :type ordered: ``bool``
+
+        Other arguments are the same as for the :meth:`verify` method.
+
+        :return: If ordered is True, a list with a result for each OTP,
+                 otherwise an iterator which yields (index, result) tuples in
+                 the order the verifications complete. Result is the value
+                 returned by the :meth:`verify` method or an exception
+                 instance if the verification failed.
+        :rtype: ``list`` or iterator of ``tuple``
+        """
+        otps = list(otps)
+        concurrency = concurrency or self.pool_maxsize
+        kwargs = {'timestamp': timestamp, 'sl': sl, 'timeout': timeout,
+                  'return_response': return_response}
+
+        results = self._iter_verify_many(otps, concurrency, kwargs)
+
+        if not ordered:
+            return results
+
+        ordered_results = [None] * len(otps)
+        for index, result in results:
+            ordered_results[index] = result
+
+        return ordered_results
+
     def verify_multi(self, otp_list, max_time_window=DEFAULT_MAX_TIME_WINDOW,
                      sl=None, timeout=None):
         """
         Verify a provided list of OTPs.
 
+        OTPs need to be provided in the order they have been generated.
+
         :param max_time_window: Maximum number of seconds which can pass
                                 between the first and last OTP generation for
                                 the OTP to still be considered valid.
         :type max_time_window: ``int``
         """
 
-        # Create the OTP objects
-        otps = []
-        for otp in otp_list:
-            otps.append(OTP(otp, self.translate_otp))
-
-        if len(otp_list) < 2:
-            raise ValueError('otp_list needs to contain at least two OTPs')
-
-        device_ids = set()
-        for otp in otps:
-            device_ids.add(otp.device_id)
-
-        # Check that all the OTPs contain same device id
-        if len(device_ids) != 1:
-            raise Exception('OTPs contain different device ids')
+        otps = self._init_otp_list(otp_list)
 
-        # Now we verify the OTPs and save the server response for each OTP.
-        # We need the server response, to retrieve the timestamp.
-        # It's possible to retrieve this value locally, without querying the
-        # server but in this case, user would need to provide his AES key.
+        # Now we verify the OTPs and save the response for each OTP. We need
+        # the response to retrieve the timestamp. If the device AES key is
+        # known to the local_validator, the timestamp is decrypted locally,
+        # otherwise it's returned by the server.
+        # All the OTPs belong to the same device so they are verified one
+        # after another in the order they have been generated. Otherwise a
+        # newer OTP could reach the server first and the older one would be
+        # rejected as replayed.
         for otp in otps:
             response = self.verify(otp.otp, True, sl, timeout,
                                    return_response=True)
@@ -224,22 +525,7 @@ class Yubico(object):
 
             otp.timestamp = int(response['timestamp'])
 
-        count = len(otps)
-        delta = otps[count - 1].timestamp - otps[0].timestamp
-
-        # OTPs have an 8Hz timestamp counter so we need to divide it to get
-        # seconds
-        delta = delta / 8
-
-        if delta < 0:
-            raise Exception('delta is smaller than zero. First OTP appears to '
-                            'be older than the last one')
-
-        if delta > max_time_window:
-            raise Exception('More than %s seconds have passed between '
-                            'generating the first and the last OTP.' %
-                            (max_time_window))
-
+        self._verify_otp_time_window(otps, max_time_window)
         return True
 
     def verify_response(self, response, otp, nonce, return_response=False):
@@ -252,85 +538,22 @@ class Yubico(object):
         verification failed or the client id is invalid, returns False
         otherwise.
         """
-        try:
-            status = re.search(r'status=([A-Z0-9_]+)', response) \
-                       .groups()
-
-            if len(status) > 1:
-                message = 'More than one status= returned. Possible attack!'
-                raise InvalidValidationResponse(message, response)
+        return self._protocol.verify_response(response, otp, nonce,
+                                              return_response)
 
-            status = status[0]
-        except (AttributeError, IndexError):
-            return False
-
-        signature, parameters = \
-            self.parse_parameters_from_response(response)
-
-        # Secret key is specified, so we verify the response message
-        # signature
-        if self.key:
-            generated_signature = \
-                self.generate_message_signature(parameters)
-
-            # Signature located in the response does not match the one we
-            # have generated
-            if signature != generated_signature:
-                logger.warning("signature mismatch for parameters=%r",
-                               parameters)
-                raise SignatureVerificationError(generated_signature,
-                                                 signature)
-        param_dict = self.get_parameters_as_dictionary(parameters)
-
-        if 'otp' in param_dict and param_dict['otp'] != otp:
-            message = 'Unexpected OTP in response. Possible attack!'
-            raise InvalidValidationResponse(message, response, param_dict)
-
-        if 'nonce' in param_dict and param_dict['nonce'] != nonce:
-            message = 'Unexpected nonce in response. Possible attack!'
-            raise InvalidValidationResponse(message, response, param_dict)
-
-        if status == 'OK':
-            if return_response:  # pylint: disable=no-else-return
-                return param_dict
-            else:
-                return True
-        elif status == 'NO_SUCH_CLIENT':
-            raise InvalidClientIdError(self.client_id)
-        elif status == 'REPLAYED_OTP':
-            raise StatusCodeError(status)
-
-        return False
+    def generate_nonce(self):
+        """
+        Returns a random nonce which is sent with the verification request.
+        """
+        return self._protocol.generate_nonce()
 
     def generate_query_string(self, otp, nonce, timestamp=False, sl=None,
                               timeout=None):
         """
         Returns a query string which is sent to the validation servers.
         """
-        data = [('id', self.client_id),
-                ('otp', otp),
-                ('nonce', nonce)]
-
-        if timestamp:
-            data.append(('timestamp', '1'))
-
-        if sl is not None:
-            if sl not in range(0, 101) and sl not in ['fast', 'secure']:
-                raise Exception('sl parameter value must be between 0 and '
-                                '100 or string "fast" or "secure"')
-
-            data.append(('sl', sl))
-
-        if timeout:
-            data.append(('timeout', timeout))
-
-        query_string = urlencode(data)
-
-        if self.key:
-            hmac_signature = self.generate_message_signature(query_string)
-            query_string += '&h=%s' % (hmac_signature.replace('+', '%2B'))
-
-        return query_string
+        return self._protocol.encode_query_string(otp, nonce, timestamp, sl,
+                                                  timeout)
 
     def generate_message_signature(self, query_string):
         """
@@ -343,10 +566,7 @@ class Yubico(object):
         pairs_sorted = sorted(pairs)
         pairs_string = '&' . join(['=' . join(pair) for pair in pairs_sorted])
 
-        digest = hmac.new(self.key, b(pairs_string), hashlib.sha1).digest()
-        signature = base64.b64encode(digest).decode('utf-8')
-
-        return signature
+        return self._protocol.signer.sign(b(pairs_string))
 
     def parse_parameters_from_response(self, response):
         """
@@ -368,6 +588,112 @@ class Yubico(object):
         pairs = (x.split('=', 1) for x in query_string.split('&'))
         return dict((k, unquote(v)) for k, v in pairs)
 
+    def get_server_stats(self):
+        """
+        Return average latency and error rate for each API URL which are
+        based on the verification requests sent by this client.
+
+        :rtype: ``list`` of ``dict``
+        """
+        return self._ranking.get_stats()
+
+    def get_circuit_breakers(self):
+        """
+        Return circuit breaker for each API URL or an empty dictionary if
+        circuit breakers are disabled.
+
+        :rtype: ``dict`` of ``str`` to
+                :class:`yubico_client.servers.CircuitBreaker`
+        """
+        return dict(self._circuit_breakers)
+
+    def get_tls_stats(self):
+        """
+        Return number of TLS handshakes performed by this client, how many of
+        them resumed a previous TLS session and the resumption hit rate.
+
+        :rtype: ``dict``
+        """
+        return self._tls_session_cache.get_stats()
+
+    def _iter_verify_many(self, otps, concurrency, kwargs):
+        """
+        Verify the provided OTPs concurrently and yield (index, result) tuple
+        for each OTP as soon as the verification completes.
+        """
+        futures = {}
+        index = 0
+
+        try:
+            while index < len(otps) or futures:
+                while index < len(otps) and len(futures) < concurrency:
+                    future = self._verify_executor.submit(self.verify,
+                                                          otps[index],
+                                                          **kwargs)
+                    futures[future] = index
+                    index += 1
+
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    try:
+                        result = future.result()
+                    except Exception:  # pylint: disable=broad-except
+                        result = sys.exc_info()[1]
+
+                    yield futures.pop(future), result
+        finally:
+            # Iteration has been abandoned, no need to verify the rest of the
+            # OTPs
+            for future in futures:
+                future.cancel()
+
+    def _init_otp_list(self, otp_list):
+        """
+        Return a list of OTP objects for the provided list of OTPs which are
+        verified in multi mode.
+
+        Throws an exception if the list contains less than two OTPs or if
+        the OTPs belong to different devices.
+        """
+        otps = []
+        for otp in otp_list:
+            otps.append(OTP(otp, self.translate_otp, self.layout_cache))
+
+        if len(otp_list) < 2:
+            raise ValueError('otp_list needs to contain at least two OTPs')
+
+        device_ids = set()
+        for otp in otps:
+            device_ids.add(otp.device_id)
+
+        # Check that all the OTPs contain same device id
+        if len(device_ids) != 1:
+            raise Exception('OTPs contain different device ids')
+
+        return otps
+
+    def _verify_otp_time_window(self, otps, max_time_window):
+        """
+        Throws an exception if more than max_time_window seconds have passed
+        between generating the first and the last OTP.
+        """
+        count = len(otps)
+        delta = otps[count - 1].timestamp - otps[0].timestamp
+
+        # OTPs have an 8Hz timestamp counter so we need to divide it to get
+        # seconds
+        delta = delta / 8
+
+        if delta < 0:
+            raise Exception('delta is smaller than zero. First OTP appears to '
+                            'be older than the last one')
+
+        if delta > max_time_window:
+            raise Exception('More than %s seconds have passed between '
+                            'generating the first and the last OTP.' %
+                            (max_time_window))
+
     def _init_request_urls(self, api_urls):
         """
         Returns a list of the API URLs.
@@ -388,11 +714,150 @@ class Yubico(object):
 
         return list(api_urls)
 
+    def _create_executors(self):
+        """
+        Return (requests executor, verifications executor) tuple of the worker
+        thread pools.
+        """
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+
+        # Separate pool is used for running whole verifications in parallel
+        # (verify_many) since those block on requests submitted to the
+        # requests pool
+        verify_executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        return executor, verify_executor
+
+    def _record_verification(self, source, start_time, exception=None):
+        # Building the tags and timing the verification is skipped when
+        # metrics are disabled
+        if self.metrics is NULL_METRICS:
+            return
+
+        self.metrics.increment('verifications',
+                               tags={'source': source,
+                                     'outcome': get_outcome(exception)})
+        self.metrics.observe('verification_latency',
+                             time.time() - start_time,
+                             tags={'source': source})
+
+    def _get_hedge_delay(self):
+        """
+        Return number of seconds to wait for an answer before sending a
+        request to the next API URL.
+        """
+        if self.hedge_delay is None:
+            # Send requests to all the URLs at once
+            return 0
+
+        if self.hedge_delay == HEDGE_DELAY_AUTO:
+            if len(self._latency) < MIN_HEDGE_LATENCY_SAMPLES:
+                return DEFAULT_HEDGE_DELAY
+
+            return self._latency.percentile(self.hedge_percentile)
+
+        return self.hedge_delay
+
+    def _is_local_otp(self, otp):
+        """
+        Return True if the provided OTP can be verified locally.
+        """
+        if self.local_validator is None:
+            return False
+
+        return self.local_validator.has_key(otp.public_id)
+
+    def _get_transport(self):
+        """
+        Return a transport which is shared by all the requests sent by this
+        client. Transport is created on first call.
+        """
+        if self._transport is None:
+            with self._transport_lock:
+                if self._transport is None:
+                    self._transport = self._init_transport()
+
+        return self._transport
+
+    def _init_transport(self):
+        """
+        Return a transport with a connection pool which is shared by all the
+        request threads spawned by this client.
+
+        Connections are kept alive between verifications so the TCP and TLS
+        handshake only needs to be performed once per connection. All the
+        HTTPS connections use the same SSL context so the CA bundle is only
+        loaded once.
+        """
+        try:
+            self._ssl_context = self._create_ssl_context()
+        except (ssl.SSLError, IOError):
+            e = sys.exc_info()[1]
+            logger.warning('Failed to load CA bundle %s: %s' %
+                           (self._ca_bundle_path, str(e)))
+            self._ssl_context = None
+
+        return self.transport_class(ssl_context=self._ssl_context,
+                                    verify_cert=self.verify_cert,
+                                    ca_bundle_path=self._ca_bundle_path,
+                                    pool_connections=len(self.api_urls),
+                                    pool_maxsize=self.pool_maxsize)
+
+    def _create_ssl_context(self):
+        """
+        Return an SSL context with the CA bundle loaded.
+        """
+        ca_bundle_path = self._ca_bundle_path
+
+        if ca_bundle_path is None:
+            try:
+                import certifi
+            except ImportError:
+                pass
+            else:
+                ca_bundle_path = certifi.where()
+
+        context = create_ssl_context(cafile=ca_bundle_path,
+                                     session_cache=self._tls_session_cache)
+
+        # Same as with requests, a CA bundle which has been found takes
+        # precedence over verify_cert=False
+        if not self.verify_cert and self._ca_bundle_path is None:
+            context.check_hostname = False
+            context.verify_mode = ssl.CERT_NONE
+
+        return context
+
+    def refresh_ca_bundle(self):
+        """
+        Resolve the CA bundle path again and reload the bundle (e.g. after the
+        system CA bundle has been updated).
+
+        New requests use a new connection pool, persistent connections from
+        the old pool are closed.
+        """
+        with self._transport_lock:
+            self._ca_bundle_path = self._find_ca_bundle_path()
+            transport = self._transport
+            self._transport = None
+            self._ssl_context = None
+            # Sessions can only be resumed using the same SSL context
+            self._tls_session_cache.clear()
+
+        if transport is not None:
+            transport.close()
+
     def _get_ca_bundle_path(self):
         """
         Return a path to the CA bundle which is used for verifying the hosts
         SSL certificate.
         """
+        return self._ca_bundle_path
+
+    def _find_ca_bundle_path(self):
+        """
+        Find a CA bundle which is used for verifying the hosts SSL
+        certificate.
+        """
         if self.ca_certs_bundle_path:
             # User provided a custom path
             return self.ca_certs_bundle_path
@@ -406,68 +871,3 @@ class Yubico(object):
 
     def _is_valid_ca_bundle_file(self, file_path):
         return os.path.exists(file_path) and os.path.isfile(file_path)
-
-
-class URLThread(threading.Thread):
-    # pylint: disable=too-many-instance-attributes
-    def __init__(self, url, timeout, verify_cert, ca_bundle_path=None,
-                 max_retries=3, retry_delay=0.5):
-        super(URLThread, self).__init__()
-
-        self.url = url
-        self.timeout = timeout
-        self.verify_cert = verify_cert
-        self.ca_bundle_path = ca_bundle_path
-        self.max_retries = max_retries
-        self.retry_delay = retry_delay
-
-        self.exception = None
-        self.request = None
-        self.response = None
-
-    def run(self):
-        logger.debug('Sending HTTP request to %s (thread=%s)' % (self.url,
-                                                                 self.name))
-        verify = self.verify_cert
-
-        if self.ca_bundle_path is not None:
-            verify = self.ca_bundle_path
-            logger.debug('Using custom CA bunde: %s' % (self.ca_bundle_path))
-
-        headers = {
-            'User-Agent': ('yubico-python-client/%s (Python v%s)' %
-                           (CLIENT_VERSION, PYTHON_VERSION))
-        }
-
-        try:
-            retry = 0
-            done = False
-            while retry < self.max_retries and not done:
-                retry += 1
-                self.request = requests.get(
-                    url=self.url, timeout=self.timeout, verify=verify,
-                    headers=headers
-                )
-                status_code = self.request.status_code
-                args = (status_code, self.url, self.name)
-                logger.debug('HTTP %d from %s (thread=%s)' % (args))
-                if status_code in (500, 502, 503, 504):
-                    logger.debug('Retrying HTTP request (attempt_count=%s,'
-                                 'max_retries=%s)' % (retry, self.max_retries))
-                    time.sleep(self.retry_delay)
-                else:
-                    done = True
-                    self.response = self.request.content.decode("utf-8")
-        except requests.exceptions.SSLError:
-            e = sys.exc_info()[1]
-            args = (self.url, self.name, str(e))
-            logger.error('SSL error talking to %s (thread=%s): %s' % (args))
-            self.exception = e
-            self.response = None
-        except Exception:  # pylint: disable=broad-except
-            e = sys.exc_info()[1]
-            logger.error('Failed to retrieve response: %s' % (str(e)))
-            self.response = None
-
-        args = (self.url, self.name, self.response)
-        logger.debug('Received response from %s (thread=%s): %s' % (args))